@@ -0,0 +1,266 @@
+import argparse
+import glob
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+import duckdb
+import pandas as pd
+import pyarrow as pa
+from APIs import store
+from APIs.countries import get_index, normalize_sql
+from APIs.sdmx import country_column
+from APIs.sql import quote_identifier, quote_literal
+
+logger = logging.getLogger(__name__)
+
+# One DuckDB file for every source: a table per dataset-store source (with its
+# run_date), a <name>_latest view of the current records, and a <name>_africa
+# table for sources with a country column. Tables are only ever appended to or
+# upserted; _catalog_files records which store part files are already loaded.
+# The country reference (countries, country_keys) is loaded alongside, so SQL
+# can join any spelling of a country to its M49 code.
+CATALOG_DB = os.environ.get('CATALOG_DB', 'unicef_data.db')
+AFRICA_SUFFIX = '_africa'
+LATEST_SUFFIX = '_latest'
+KEY_COLUMN = 'data_link'
+INTEGER_TYPES = {'TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'UTINYINT', 'USMALLINT', 'UINTEGER', 'UBIGINT'}
+
+
+def _wider_type(existing: str, incoming: str) -> Optional[str]:
+    # The store only ever widens a column (int -> DOUBLE, anything -> VARCHAR); follow it, never narrow
+    if existing == incoming:
+        return None
+    if incoming == 'VARCHAR' or (existing in INTEGER_TYPES and incoming in ('FLOAT', 'DOUBLE')):
+        return incoming
+    return None
+
+
+def _country_filter(column: str) -> str:
+    # Every name, alias and ISO3 code of an African country, compared after the same
+    # normalization, or an exact ISO2 code (as CountryIndex.code matches them)
+    index = get_index()
+    spellings = ', '.join(quote_literal(key) for key in index.spellings())
+    iso2 = ', '.join(quote_literal(code) for code in index.iso2_codes())
+    return (f"({normalize_sql(quote_identifier(column))} IN ({spellings}) "
+            f"OR trim({quote_identifier(column)}) IN ({iso2}))")
+
+
+class Catalog:
+    """The DuckDB catalog over the dataset store and the UNICEF dataflow files."""
+
+    def __init__(self, path: str = CATALOG_DB, read_only: bool = False):
+        self.path = path
+        self.con = duckdb.connect(path, read_only=read_only)
+        if not read_only:
+            self.con.execute("""
+                CREATE TABLE IF NOT EXISTS _catalog_files (
+                    table_name VARCHAR, path VARCHAR, rows BIGINT, loaded_at TIMESTAMP,
+                    PRIMARY KEY (table_name, path)
+                )
+            """)
+            self._load_country_reference()
+
+    def close(self):
+        self.con.close()
+
+    def __enter__(self) -> 'Catalog':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _load_country_reference(self):
+        index = get_index()
+        for name, frame in (('countries', index.to_frame()), ('country_keys', index.keys_frame())):
+            self.con.register('_reference', frame)
+            self.con.execute(f"CREATE OR REPLACE TABLE {name} AS SELECT * FROM _reference")
+            self.con.unregister('_reference')
+
+    # Introspection
+
+    def tables(self) -> List[str]:
+        return [name for (name,) in self.con.execute(
+            "SELECT table_name FROM information_schema.tables WHERE table_schema = 'main' "
+            "AND table_name NOT LIKE '\\_%' ESCAPE '\\' ORDER BY table_name"
+        ).fetchall()]
+
+    def _exists(self, name: str) -> bool:
+        return self.con.execute(
+            "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = 'main' AND table_name = ?", [name]
+        ).fetchone()[0] > 0
+
+    def _columns(self, name: str) -> Dict[str, str]:
+        return dict(self.con.execute(
+            "SELECT column_name, data_type FROM information_schema.columns WHERE table_schema = 'main' "
+            "AND table_name = ? ORDER BY ordinal_position", [name]
+        ).fetchall())
+
+    # Queries
+
+    def query(self, sql: str, params: Optional[list] = None) -> pd.DataFrame:
+        return self.con.execute(sql, params or []).df()
+
+    def arrow(self, sql: str, params: Optional[list] = None) -> pa.Table:
+        return self.con.execute(sql, params or []).to_arrow_table()
+
+    # Maintenance
+
+    def _add_missing_columns(self, name: str, relation: str):
+        """Widens a table (and its Africa subset) with the columns, or wider types, a newer file brings along."""
+        existing = self._columns(name)
+        described = self.con.execute(f"DESCRIBE SELECT * FROM {relation}").fetchall()
+        for column, data_type, *_ in described:
+            if column in existing:
+                wider = _wider_type(existing[column], data_type)
+                if wider is None:
+                    continue
+                for table in (name, name + AFRICA_SUFFIX):
+                    if self._exists(table):
+                        self.con.execute(f"ALTER TABLE {quote_identifier(table)} "
+                                         f"ALTER COLUMN {quote_identifier(column)} TYPE {wider}")
+                logger.info(f"{name}: widened column {column} from {existing[column]} to {wider}")
+                continue
+            for table in (name, name + AFRICA_SUFFIX):
+                if self._exists(table):
+                    self.con.execute(f"ALTER TABLE {quote_identifier(table)} "
+                                     f"ADD COLUMN {quote_identifier(column)} {data_type}")
+            logger.info(f"{name}: added column {column} ({data_type})")
+
+    def _create(self, name: str, relation: str, with_latest: bool):
+        self.con.execute(f"CREATE TABLE {quote_identifier(name)} AS SELECT * FROM {relation}")
+        country = country_column(self._columns(name))
+        if country is not None:
+            self.con.execute(f"CREATE TABLE {quote_identifier(name + AFRICA_SUFFIX)} AS "
+                             f"SELECT * FROM {quote_identifier(name)} WHERE {_country_filter(country)}")
+        if with_latest:
+            self._create_latest_view(name)
+
+    def _create_latest_view(self, name: str):
+        if KEY_COLUMN in self._columns(name):
+            # Incremental crawls only store new or changed records: latest row per dataset
+            latest = (f"QUALIFY row_number() OVER (PARTITION BY {quote_identifier(KEY_COLUMN)} "
+                      f"ORDER BY run_date DESC) = 1")
+        else:
+            latest = f"WHERE run_date = (SELECT max(run_date) FROM {quote_identifier(name)})"
+        self.con.execute(f"CREATE OR REPLACE VIEW {quote_identifier(name + LATEST_SUFFIX)} AS "
+                         f"SELECT * FROM {quote_identifier(name)} {latest}")
+
+    def _append(self, name: str, relation: str):
+        self._add_missing_columns(name, relation)
+        self.con.execute(f"INSERT INTO {quote_identifier(name)} BY NAME SELECT * FROM {relation}")
+        country = country_column(self._columns(name))
+        if country is not None and self._exists(name + AFRICA_SUFFIX):
+            self.con.execute(f"INSERT INTO {quote_identifier(name + AFRICA_SUFFIX)} BY NAME "
+                             f"SELECT * FROM {relation} WHERE {_country_filter(country)}")
+
+    def _loaded_files(self, name: str) -> set:
+        return {path for (path,) in self.con.execute(
+            "SELECT path FROM _catalog_files WHERE table_name = ?", [name]).fetchall()}
+
+    def refresh_source(self, source: str, root: Optional[str] = None) -> int:
+        """Loads the store part files of `source` that aren't in its table yet; returns rows added.
+
+        Each run's files go in with their run_date column, one transaction per
+        refresh, and the Africa subset gets the matching rows of the same files.
+        """
+        pattern = os.path.join(store.source_dir(source, root), 'run_date=*', 'part-*.parquet')
+        loaded = self._loaded_files(source)
+        new_files = sorted(path for path in glob.glob(pattern) if os.path.abspath(path) not in loaded)
+        if not new_files:
+            return 0
+        files = '[' + ', '.join(quote_literal(path) for path in new_files) + ']'
+        relation = (f"(SELECT * EXCLUDE (source) FROM read_parquet({files}, hive_partitioning = true, "
+                    f"union_by_name = true, hive_types = {{'run_date': VARCHAR}}))")
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        self.con.execute("BEGIN TRANSACTION")
+        try:
+            before = self._count(source)
+            if self._exists(source):
+                self._append(source, relation)
+            else:
+                self._create(source, relation, with_latest=True)
+            added = self._count(source) - before
+            for path in new_files:
+                rows = self.con.execute(f"SELECT COUNT(*) FROM read_parquet({quote_literal(path)})").fetchone()[0]
+                self.con.execute("INSERT INTO _catalog_files VALUES (?, ?, ?, ?)",
+                                 [source, os.path.abspath(path), rows, now])
+            self.con.execute("COMMIT")
+        except BaseException:
+            self.con.execute("ROLLBACK")
+            raise
+        logger.info(f"{source}: loaded {len(new_files)} new part files, {added} rows")
+        return added
+
+    def refresh_store(self, sources: Optional[Iterable[str]] = None, root: Optional[str] = None) -> Dict[str, int]:
+        """refresh_source for every store source (or the given ones)."""
+        return {source: self.refresh_source(source, root) for source in (sources or store.sources(root))}
+
+    def _count(self, name: str) -> int:
+        if not self._exists(name):
+            return 0
+        return self.con.execute(f"SELECT COUNT(*) FROM {quote_identifier(name)}").fetchone()[0]
+
+    def load_table(self, name: str, parquet_file: str) -> int:
+        """Replaces a table (and its Africa subset) with a whole file, for full reloads."""
+        self.con.execute("BEGIN TRANSACTION")
+        try:
+            for table in (name, name + AFRICA_SUFFIX):
+                self.con.execute(f"DROP TABLE IF EXISTS {quote_identifier(table)}")
+            self._create(name, f"read_parquet({quote_literal(parquet_file)})", with_latest=False)
+            self.con.execute("COMMIT")
+        except BaseException:
+            self.con.execute("ROLLBACK")
+            raise
+        return self._count(name)
+
+    def apply_delta(self, name: str, delta_file: str, key_columns: List[str]) -> int:
+        """Upserts an updatedAfter delta into a table and its Africa subset on `key_columns`.
+
+        Only the changed series are touched: rows whose key is in the delta are
+        deleted and the delta's rows inserted, in one transaction. Returns the
+        table's new row count.
+        """
+        relation = f"read_parquet({quote_literal(delta_file)})"
+        on = ' AND '.join(f"t.{quote_identifier(k)} IS NOT DISTINCT FROM d.{quote_identifier(k)}" for k in key_columns)
+        self.con.execute("BEGIN TRANSACTION")
+        try:
+            self._add_missing_columns(name, relation)
+            for table in (name, name + AFRICA_SUFFIX):
+                if self._exists(table):
+                    self.con.execute(f"DELETE FROM {quote_identifier(table)} t WHERE EXISTS "
+                                     f"(SELECT 1 FROM {relation} d WHERE {on})")
+            self._append(name, relation)
+            self.con.execute("COMMIT")
+        except BaseException:
+            self.con.execute("ROLLBACK")
+            raise
+        return self._count(name)
+
+
+def query(sql: str, params: Optional[list] = None, path: str = CATALOG_DB) -> pd.DataFrame:
+    """Runs SQL against the catalog without keeping it open (or locked) afterwards."""
+    with Catalog(path, read_only=True) as catalog:
+        return catalog.query(sql, params)
+
+
+def refresh(path: str = CATALOG_DB, sources: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    with Catalog(path) as catalog:
+        return catalog.refresh_store(sources)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Load new dataset store partitions into the DuckDB catalog, "
+                                                 "or query it.")
+    parser.add_argument('sql', nargs='?', help="SQL to run after refreshing, e.g. \"SELECT * FROM kaggle_latest\"")
+    parser.add_argument('--source', action='append', help="Only refresh this store source (repeatable)")
+    parser.add_argument('--no-refresh', action='store_true')
+    args = parser.parse_args()
+
+    if not args.no_refresh:
+        for source, rows in refresh(sources=args.source).items():
+            print(f"{source:30} +{rows} rows")
+    if args.sql:
+        with pd.option_context('display.max_columns', None, 'display.width', 200):
+            print(query(args.sql))
@@ -1,23 +1,14 @@
 import pandas as pd
+from APIs.countries import african_names, in_africa
 
 
-african_countries = [
-    'Algeria', 'Angola', 'Benin', 'Botswana', 'Burkina Faso', 'Burundi',
-    'Cabo Verde', 'Cameroon', 'Central African Republic', 'Chad', 'Comoros',
-    'Congo', 'Democratic Republic of the Congo', "Côte d'Ivoire", 'Djibouti',
-    'Egypt', 'Equatorial Guinea', 'Eritrea', 'Eswatini', 'Ethiopia', 'Gabon',
-    'Gambia', 'Ghana', 'Guinea', 'Guinea-Bissau', 'Kenya', 'Lesotho', 'Liberia',
-    'Libya', 'Madagascar', 'Malawi', 'Mali', 'Mauritania', 'Mauritius',
-    'Morocco', 'Mozambique', 'Namibia', 'Niger', 'Nigeria', 'Rwanda',
-    'Sao Tome and Principe', 'Senegal', 'Seychelles', 'Sierra Leone', 'Somalia',
-    'South Africa', 'South Sudan', 'Sudan', 'Togo', 'Tunisia', 'Uganda',
-    'United Republic of Tanzania', 'Zambia', 'Zimbabwe'
-]
+# Canonical names; filters match any spelling through APIs.countries
+african_countries = african_names()
 
 def filter_african_countries(csv_file):
     df = pd.read_csv(csv_file)
     
-    df_filtered = df[df['Reference area'].isin(african_countries)]
+    df_filtered = df[in_africa(df['Reference area'])]
     
     return df_filtered
 
@@ -30,9 +21,10 @@ def main(csv_file_path, output_file_path=None):
     return filtered_df
 
 
-csv_file = 'UNESCO UIS Education.csv '
-output_file = 'unicef_UNESCO UIS Education.csv'
+if __name__ == "__main__":
+    csv_file = 'UNESCO UIS Education.csv '
+    output_file = 'unicef_UNESCO UIS Education.csv'
 
-# Run the main function
-filtered_african_df = main(csv_file, output_file)
-print(filtered_african_df)
+    # Run the main function
+    filtered_african_df = main(csv_file, output_file)
+    print(filtered_african_df)
@@ -0,0 +1,290 @@
+import logging
+import os
+import unicodedata
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+logger = logging.getLogger(__name__)
+
+# UN Population Data Portal locations (its location ids are the M49 codes)
+LOCATIONS_CSV = os.path.join('output', 'locations.csv')
+UNKNOWN = -1
+
+
+class Country(NamedTuple):
+    m49: int          # also the UN Pop location id
+    iso2: str
+    iso3: str
+    name: str         # UN M49 English name
+    region: int       # M49 sub-region
+
+
+class Region(NamedTuple):
+    name: str
+    parent: Optional[int]
+    unpop_id: int     # UN Pop (WPP) location id of the aggregate
+
+
+# M49 region hierarchy for Africa
+AFRICA = 2
+SUB_SAHARAN_AFRICA = 202
+REGIONS: Dict[int, Region] = {
+    AFRICA: Region('Africa', None, 903),
+    15: Region('Northern Africa', AFRICA, 912),
+    SUB_SAHARAN_AFRICA: Region('Sub-Saharan Africa', AFRICA, 947),
+    14: Region('Eastern Africa', SUB_SAHARAN_AFRICA, 910),
+    17: Region('Middle Africa', SUB_SAHARAN_AFRICA, 911),
+    18: Region('Southern Africa', SUB_SAHARAN_AFRICA, 913),
+    11: Region('Western Africa', SUB_SAHARAN_AFRICA, 914),
+}
+
+COUNTRIES: List[Country] = [
+    Country(12, 'DZ', 'DZA', 'Algeria', 15),
+    Country(818, 'EG', 'EGY', 'Egypt', 15),
+    Country(434, 'LY', 'LBY', 'Libya', 15),
+    Country(504, 'MA', 'MAR', 'Morocco', 15),
+    Country(729, 'SD', 'SDN', 'Sudan', 15),
+    Country(788, 'TN', 'TUN', 'Tunisia', 15),
+    Country(108, 'BI', 'BDI', 'Burundi', 14),
+    Country(174, 'KM', 'COM', 'Comoros', 14),
+    Country(262, 'DJ', 'DJI', 'Djibouti', 14),
+    Country(232, 'ER', 'ERI', 'Eritrea', 14),
+    Country(231, 'ET', 'ETH', 'Ethiopia', 14),
+    Country(404, 'KE', 'KEN', 'Kenya', 14),
+    Country(450, 'MG', 'MDG', 'Madagascar', 14),
+    Country(454, 'MW', 'MWI', 'Malawi', 14),
+    Country(480, 'MU', 'MUS', 'Mauritius', 14),
+    Country(508, 'MZ', 'MOZ', 'Mozambique', 14),
+    Country(646, 'RW', 'RWA', 'Rwanda', 14),
+    Country(690, 'SC', 'SYC', 'Seychelles', 14),
+    Country(706, 'SO', 'SOM', 'Somalia', 14),
+    Country(728, 'SS', 'SSD', 'South Sudan', 14),
+    Country(800, 'UG', 'UGA', 'Uganda', 14),
+    Country(834, 'TZ', 'TZA', 'United Republic of Tanzania', 14),
+    Country(894, 'ZM', 'ZMB', 'Zambia', 14),
+    Country(716, 'ZW', 'ZWE', 'Zimbabwe', 14),
+    Country(24, 'AO', 'AGO', 'Angola', 17),
+    Country(120, 'CM', 'CMR', 'Cameroon', 17),
+    Country(140, 'CF', 'CAF', 'Central African Republic', 17),
+    Country(148, 'TD', 'TCD', 'Chad', 17),
+    Country(178, 'CG', 'COG', 'Congo', 17),
+    Country(180, 'CD', 'COD', 'Democratic Republic of the Congo', 17),
+    Country(226, 'GQ', 'GNQ', 'Equatorial Guinea', 17),
+    Country(266, 'GA', 'GAB', 'Gabon', 17),
+    Country(678, 'ST', 'STP', 'Sao Tome and Principe', 17),
+    Country(72, 'BW', 'BWA', 'Botswana', 18),
+    Country(748, 'SZ', 'SWZ', 'Eswatini', 18),
+    Country(426, 'LS', 'LSO', 'Lesotho', 18),
+    Country(516, 'NA', 'NAM', 'Namibia', 18),
+    Country(710, 'ZA', 'ZAF', 'South Africa', 18),
+    Country(204, 'BJ', 'BEN', 'Benin', 11),
+    Country(854, 'BF', 'BFA', 'Burkina Faso', 11),
+    Country(132, 'CV', 'CPV', 'Cabo Verde', 11),
+    Country(384, 'CI', 'CIV', "Côte d'Ivoire", 11),
+    Country(270, 'GM', 'GMB', 'Gambia', 11),
+    Country(288, 'GH', 'GHA', 'Ghana', 11),
+    Country(324, 'GN', 'GIN', 'Guinea', 11),
+    Country(624, 'GW', 'GNB', 'Guinea-Bissau', 11),
+    Country(430, 'LR', 'LBR', 'Liberia', 11),
+    Country(466, 'ML', 'MLI', 'Mali', 11),
+    Country(478, 'MR', 'MRT', 'Mauritania', 11),
+    Country(562, 'NE', 'NER', 'Niger', 11),
+    Country(566, 'NG', 'NGA', 'Nigeria', 11),
+    Country(686, 'SN', 'SEN', 'Senegal', 11),
+    Country(694, 'SL', 'SLE', 'Sierra Leone', 11),
+    Country(768, 'TG', 'TGO', 'Togo', 11),
+]
+
+# Other spellings seen in our sources (UNICEF, World Bank, UN Info, older lists) -> M49
+ALIASES: Dict[str, int] = {
+    'Egypt, Arab Rep.': 818,
+    'Egypt, Arab Republic of': 818,
+    'Libyan Arab Jamahiriya': 434,
+    'Tanzania': 834,
+    'Tanzania, United Republic of': 834,
+    'United Republic of Tanzania (the)': 834,
+    'Swaziland': 748,
+    'Kingdom of Eswatini': 748,
+    'Cape Verde': 132,
+    'Ivory Coast': 384,
+    "Cote d'Ivoire": 384,
+    'The Gambia': 270,
+    'Gambia, The': 270,
+    'Gambia (Republic of The)': 270,
+    'Guinea Bissau': 624,
+    'Sao Tome & Principe': 678,
+    'Republic of the Congo': 178,
+    'Congo, Rep.': 178,
+    'Congo (Brazzaville)': 178,
+    'Congo Republic': 178,
+    'Democratic Republic of Congo': 180,
+    'Congo, Dem. Rep.': 180,
+    'Congo, Democratic Republic of the': 180,
+    'Congo (Kinshasa)': 180,
+    'DR Congo': 180,
+    'DRC': 180,
+    'Central African Rep.': 140,
+}
+
+
+# ISO2 codes only match as exact uppercase codes, and never these: in free-text
+# country columns 'NA' means "not available" far more often than Namibia
+AMBIGUOUS_ISO2 = {'NA'}
+
+
+def normalize_name(name: str) -> str:
+    """Case, accents, curly quotes and spacing folded away, for matching names."""
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    return ' '.join(name.replace('’', "'").casefold().split())
+
+
+def normalize_sql(expression: str) -> str:
+    """normalize_name as a DuckDB expression (close enough for the names we carry)."""
+    return (f"regexp_replace(trim(lower(strip_accents(replace({expression}, '’', '''')))), "
+            f"'\\s+', ' ', 'g')")
+
+
+class CountryIndex:
+    """Name, alias and ISO code -> M49 lookups, plus region membership.
+
+    Names, aliases and ISO3 codes match after normalize_name; ISO2 codes are too
+    short to match loosely, so they only match exactly (see AMBIGUOUS_ISO2).
+
+    resolve() works a column at a time: values are hash-factorized, only the
+    distinct ones are looked up, and the codes are scattered back with one take.
+    """
+
+    def __init__(self, countries: Iterable[Country], aliases: Dict[str, int], regions: Dict[int, Region]):
+        self.countries: Dict[int, Country] = {}
+        self.regions = regions
+        self._keys: Dict[str, int] = {}
+        self._iso2: Dict[str, int] = {}
+        for country in countries:
+            self.add(country)
+        for alias, m49 in aliases.items():
+            self._keys.setdefault(normalize_name(alias), m49)
+
+    def add(self, country: Country):
+        self.countries.setdefault(country.m49, country)
+        for key in (country.name, country.iso3):
+            if key:
+                self._keys.setdefault(normalize_name(key), country.m49)
+        if country.iso2 and country.iso2 not in AMBIGUOUS_ISO2:
+            self._iso2.setdefault(country.iso2.upper(), country.m49)
+
+    def keys(self) -> Dict[str, int]:
+        """Every normalized spelling the index knows (not the ISO2 codes), with its M49 code."""
+        return dict(self._keys)
+
+    def code(self, name) -> int:
+        if name is None or (isinstance(name, float) and np.isnan(name)):
+            return UNKNOWN
+        name = str(name)
+        m49 = self._keys.get(normalize_name(name))
+        if m49 is None:
+            m49 = self._iso2.get(name.strip(), UNKNOWN)
+        return m49
+
+    def resolve(self, values) -> np.ndarray:
+        """M49 codes (int32, UNKNOWN where unmatched) for a Series, list or array of names or ISO codes."""
+        labels, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+        lookup = np.fromiter((self.code(value) for value in uniques), dtype=np.int32, count=len(uniques))
+        # factorize marks nulls with -1: give them a trailing UNKNOWN slot
+        lookup = np.append(lookup, np.int32(UNKNOWN))
+        return lookup[labels]
+
+    def resolve_arrow(self, array) -> pa.Array:
+        """resolve() for an Arrow string array, through its dictionary encoding."""
+        if isinstance(array, pa.ChunkedArray):
+            return pa.chunked_array([self.resolve_arrow(chunk) for chunk in array.chunks], type=pa.int32())
+        encoded = array if pa.types.is_dictionary(array.type) else pc.dictionary_encode(array)
+        lookup = pa.array([self.code(value) for value in encoded.dictionary.to_pylist()], type=pa.int32())
+        return pc.fill_null(pc.take(lookup, encoded.indices), UNKNOWN)
+
+    def members(self, region: int = AFRICA) -> Set[int]:
+        """M49 codes of the countries in a region or any of its sub-regions."""
+        return {m49 for m49, country in self.countries.items() if self._within(country.region, region)}
+
+    def _within(self, region: Optional[int], ancestor: int) -> bool:
+        while region is not None:
+            if region == ancestor:
+                return True
+            region = self.regions[region].parent if region in self.regions else None
+        return False
+
+    def in_region(self, values, region: int = AFRICA) -> np.ndarray:
+        """Boolean mask of the values that name a country in `region`."""
+        return np.isin(self.resolve(values), np.fromiter(self.members(region), dtype=np.int32))
+
+    def in_region_arrow(self, array, region: int = AFRICA) -> pa.Array:
+        return pc.is_in(self.resolve_arrow(array), value_set=pa.array(sorted(self.members(region)), type=pa.int32()))
+
+    def names(self, region: int = AFRICA) -> List[str]:
+        return sorted(self.countries[m49].name for m49 in self.members(region))
+
+    def spellings(self, region: int = AFRICA) -> List[str]:
+        """Every normalized name, alias and ISO3 code of the countries in `region`."""
+        members = self.members(region)
+        return sorted(key for key, m49 in self._keys.items() if m49 in members)
+
+    def iso2_codes(self, region: int = AFRICA) -> List[str]:
+        """The ISO2 codes code() accepts for the countries in `region`."""
+        members = self.members(region)
+        return sorted(code for code, m49 in self._iso2.items() if m49 in members)
+
+    def region_code(self, name: str) -> Optional[int]:
+        wanted = normalize_name(name)
+        return next((m49 for m49, region in self.regions.items() if normalize_name(region.name) == wanted), None)
+
+    def to_frame(self) -> pd.DataFrame:
+        frame = pd.DataFrame(self.countries.values(), columns=Country._fields)
+        frame['africa'] = frame['m49'].isin(self.members(AFRICA))
+        return frame
+
+    def keys_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(list(self._keys.items()), columns=['name_key', 'm49'])
+
+
+def load_locations(path: str = LOCATIONS_CSV) -> List[Country]:
+    """Countries from a saved UN Pop /locations export (id, name, iso2, iso3), without a region."""
+    frame = pd.read_csv(path, usecols=['id', 'name', 'iso2', 'iso3'], keep_default_na=False)
+    frame = frame[(frame['iso3'] != '') & (frame['id'] != '')]
+    return [Country(int(row.id), row.iso2, row.iso3, row.name, None) for row in frame.itertuples(index=False)]
+
+
+_index: Optional[CountryIndex] = None
+
+
+def get_index() -> CountryIndex:
+    """The shared index: the African reference table plus any countries in LOCATIONS_CSV."""
+    global _index
+    if _index is None:
+        index = CountryIndex(COUNTRIES, ALIASES, REGIONS)
+        if os.path.exists(LOCATIONS_CSV):
+            try:
+                for country in load_locations(LOCATIONS_CSV):
+                    index.add(country)
+            except (ValueError, KeyError) as e:
+                logger.warning(f"Could not read {LOCATIONS_CSV}: {e}")
+        _index = index
+    return _index
+
+
+def resolve(values) -> np.ndarray:
+    return get_index().resolve(values)
+
+
+def in_africa(values) -> np.ndarray:
+    return get_index().in_region(values, AFRICA)
+
+
+def is_african(name) -> bool:
+    return get_index().code(name) in get_index().members(AFRICA)
+
+
+def african_names() -> List[str]:
+    return get_index().names(AFRICA)
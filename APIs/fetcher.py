@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from APIs import http_client
+from APIs.scheduler import get_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class FetchResult(NamedTuple):
+    url: str
+    response: Any
+    error: Optional[BaseException]
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second, with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def default_fetch(url: str) -> requests.Response:
+    return http_client.get(url)
+
+
+class AsyncFetcher:
+    """Runs blocking fetches concurrently on an asyncio loop, capped per host.
+
+    Every host gets its own semaphore (`max_per_host` requests in flight) and
+    token bucket (`rate` requests started per second). `host_limits` overrides
+    both for individual hosts: {"sdmx.data.unicef.org": (4, 2.0)}.
+
+    The fetches themselves run on the process-wide CrawlScheduler, so the host's
+    global budget also holds when other sources hit the same site concurrently.
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = 4,
+        rate: float = 2.0,
+        host_limits: Optional[Dict[str, Tuple[int, float]]] = None,
+        fetch: Callable[[str], Any] = default_fetch,
+    ):
+        self.max_per_host = max_per_host
+        self.rate = rate
+        self.host_limits = host_limits or {}
+        self.fetch = fetch
+
+    def _limits_for(self, host: str) -> Tuple[int, float]:
+        return self.host_limits.get(host, (self.max_per_host, self.rate))
+
+    async def _run_one(self, url: str, limits: Dict[str, Tuple[asyncio.Semaphore, TokenBucket]]) -> FetchResult:
+        host = urlsplit(url).netloc
+        if host not in limits:
+            max_in_flight, rate = self._limits_for(host)
+            limits[host] = (asyncio.Semaphore(max_in_flight), TokenBucket(rate))
+        semaphore, bucket = limits[host]
+
+        async with semaphore:
+            await bucket.acquire()
+            started = time.monotonic()
+            try:
+                response = await asyncio.wrap_future(get_scheduler().submit(url, self.fetch, url))
+            except Exception as e:
+                logger.error(f"Fetch failed for {url}: {e}")
+                return FetchResult(url, None, e)
+            logger.info(f"Fetched {url} in {time.monotonic() - started:.2f}s")
+            return FetchResult(url, response, None)
+
+    async def fetch_iter(self, urls: Iterable[str]):
+        """Yields a FetchResult for every url, in completion order."""
+        limits: Dict[str, Tuple[asyncio.Semaphore, TokenBucket]] = {}
+        tasks = [asyncio.ensure_future(self._run_one(url, limits)) for url in urls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def iter_completed(self, urls: Iterable[str]) -> Iterator[FetchResult]:
+        """Synchronous view of fetch_iter for scripts and Streamlit callbacks.
+
+        The event loop runs on a background thread, so whatever the caller does
+        with one result (parsing, filtering, writing) overlaps with the fetches
+        still in flight. Stopping early (break, an exception, or close()) cancels
+        the fetches that haven't started; ones already running finish unread.
+        """
+        urls = list(urls)
+        results: "queue.Queue" = queue.Queue()
+        done = object()
+        failure: List[BaseException] = []
+        started = threading.Event()
+        running: Dict[str, Any] = {}
+
+        async def produce():
+            running['loop'], running['task'] = asyncio.get_running_loop(), asyncio.current_task()
+            started.set()
+            fetches = self.fetch_iter(urls)
+            try:
+                async for result in fetches:
+                    results.put(result)
+            finally:
+                await fetches.aclose()
+
+        def run():
+            try:
+                asyncio.run(produce())
+            except BaseException as e:
+                failure.append(e)
+            finally:
+                started.set()
+                results.put(done)
+
+        thread = threading.Thread(target=run, name="async-fetcher", daemon=True)
+        thread.start()
+        finished = False
+        try:
+            while True:
+                item = results.get()
+                if item is done:
+                    finished = True
+                    break
+                yield item
+        finally:
+            if not finished:
+                started.wait()
+                try:
+                    running['loop'].call_soon_threadsafe(running['task'].cancel)
+                except (KeyError, RuntimeError):
+                    pass  # the loop never started or has already finished
+            thread.join()
+        if failure:
+            raise failure[0]
+
+    def fetch_all(self, urls: Iterable[str]) -> List[FetchResult]:
+        return list(self.iter_completed(urls))
@@ -0,0 +1,274 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import closing
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+
+from APIs import http_client
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_DIR = os.environ.get('HTTP_CACHE_DIR', os.path.join('cache', 'http'))
+# Least recently used entries are evicted once the stored bodies exceed this
+HTTP_CACHE_MAX_BYTES = int(os.environ.get('HTTP_CACHE_MAX_BYTES', 5 * 1024 ** 3))
+# Request headers that change the representation, so they are part of the key
+KEY_HEADERS = ('Accept',)
+
+# Bodies handed out by cached_get that their CachedResponse hasn't released
+# yet, by digest. Eviction skips them, so a fetch finishing on another thread
+# can't delete a blob before its caller has opened it. (Per process: workers
+# sharing one cache directory can still evict each other's bodies.)
+_pinned: Counter = Counter()
+_pinned_lock = threading.Lock()
+
+
+def _pin(digest: str):
+    with _pinned_lock:
+        _pinned[digest] += 1
+
+
+def _unpin(digest: str):
+    with _pinned_lock:
+        _pinned[digest] -= 1
+        if _pinned[digest] <= 0:
+            del _pinned[digest]
+
+
+def pinned() -> set:
+    with _pinned_lock:
+        return set(_pinned)
+
+
+class CachedResponse:
+    """The parts of requests.Response callers use, backed by a body file on disk.
+
+    A body from the cache (`digest`) is pinned against eviction until the
+    response is closed or garbage collected; use it as a context manager to
+    release it promptly.
+    """
+
+    def __init__(self, url: str, status_code: int, headers: Dict[str, str], digest: Optional[str] = None,
+                 content: Optional[bytes] = None, from_cache: bool = False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.digest = digest
+        self.path = blob_path(digest) if digest else None
+        self._content = content
+        self.from_cache = from_cache
+        if digest:
+            _pin(digest)
+
+    def close(self):
+        digest, self.digest = self.digest, None
+        if digest:
+            _unpin(digest)
+
+    def __enter__(self) -> 'CachedResponse':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def open(self):
+        """Binary file object over the body, for streaming parsers."""
+        return open(self.path, 'rb')
+
+    @property
+    def content(self) -> bytes:
+        if self._content is None:
+            with self.open() as f:
+                self._content = f.read()
+        return self._content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+
+def cache_key(url: str, params: Optional[dict] = None, headers: Optional[dict] = None) -> str:
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += [(k, str(v)) for k, v in params.items()]
+    canonical = urlunsplit(parts._replace(query=urlencode(sorted(query)), fragment=''))
+    varying = {name: (headers or {}).get(name, '') for name in KEY_HEADERS}
+    return hashlib.sha256(f"{canonical}\n{json.dumps(varying, sort_keys=True)}".encode()).hexdigest()
+
+
+def _connect() -> sqlite3.Connection:
+    os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+    con = sqlite3.connect(os.path.join(HTTP_CACHE_DIR, 'index.sqlite'), timeout=30)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            url TEXT,
+            digest TEXT,
+            size INTEGER,
+            etag TEXT,
+            last_modified TEXT,
+            content_type TEXT,
+            stored_at REAL,
+            last_used REAL
+        )
+    """)
+    return con
+
+
+def blob_path(digest: str) -> str:
+    return os.path.join(HTTP_CACHE_DIR, 'blobs', digest[:2], digest)
+
+
+def _lookup(key: str) -> Optional[dict]:
+    with closing(_connect()) as con:
+        row = con.execute(
+            "SELECT digest, etag, last_modified, content_type FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+    if row is None or not os.path.exists(blob_path(row[0])):
+        return None
+    return {'digest': row[0], 'etag': row[1], 'last_modified': row[2], 'content_type': row[3]}
+
+
+def _touch(key: str):
+    with closing(_connect()) as con, con:
+        con.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+
+
+def _store_body(key: str, url: str, params: Optional[dict], headers: dict,
+                response: Optional[requests.Response], **kwargs) -> http_client.DownloadResult:
+    """Downloads the body (resumably) and moves it to its content-addressed blob."""
+    downloads_dir = os.path.join(HTTP_CACHE_DIR, 'downloads')
+    os.makedirs(downloads_dir, exist_ok=True)
+    body_path = os.path.join(downloads_dir, key)
+    result = http_client.download(url, body_path, params=params, headers=headers, response=response, **kwargs)
+    path = blob_path(result.sha256)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(body_path, path)
+    os.remove(body_path + '.sha256')
+    return result
+
+
+def _record(key: str, url: str, result: http_client.DownloadResult):
+    now = time.time()
+    with closing(_connect()) as con, con:
+        con.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, url, result.sha256, result.size, result.etag, result.last_modified, result.content_type, now, now),
+        )
+    evict(keep=key)
+
+
+def evict(max_bytes: Optional[int] = None, keep: Optional[str] = None):
+    """Drops least recently used entries until the distinct stored bodies fit in max_bytes.
+
+    `keep` is never evicted, nor is any entry whose body is pinned by a
+    CachedResponse that hasn't been released.
+    """
+    max_bytes = HTTP_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    in_use = pinned()
+    with closing(_connect()) as con, con:
+        total = con.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM entries)"
+        ).fetchone()[0]
+        if total <= max_bytes:
+            return
+        for key, digest, size in con.execute(
+            "SELECT key, digest, size FROM entries WHERE key != ? ORDER BY last_used", (keep or '',)
+        ).fetchall():
+            if digest in in_use:
+                continue
+            con.execute("DELETE FROM entries WHERE key = ?", (key,))
+            # Identical bodies are stored once; only drop the blob when nothing else points at it
+            if con.execute("SELECT 1 FROM entries WHERE digest = ?", (digest,)).fetchone() is None:
+                if os.path.exists(blob_path(digest)):
+                    os.remove(blob_path(digest))
+                total -= size
+            logger.info(f"Evicted cached response {key[:12]} ({size} bytes)")
+            if total <= max_bytes:
+                break
+
+
+def cached_get(url: str, params: Optional[dict] = None, headers: Optional[dict] = None, **kwargs) -> CachedResponse:
+    """GET through the on-disk cache, revalidating with ETag / Last-Modified.
+
+    A 304 replays the stored body without transferring it again; a 200 replaces
+    the entry. Bodies are written through http_client.download, so a dropped
+    connection (or a killed run) resumes from the last byte received. Error
+    statuses are returned uncached.
+    """
+    headers = dict(headers or {})
+    key = cache_key(url, params, headers)
+    if os.path.exists(os.path.join(HTTP_CACHE_DIR, 'downloads', key + '.part')):
+        # An earlier run died mid-body: pick the transfer up where it stopped
+        logger.info(f"Resuming interrupted download of {url}")
+        result = _store_body(key, url, params, headers, None, **kwargs)
+        # Pinned before it's recorded, so its own eviction pass can't take it either
+        cached = CachedResponse(url, 200, {'Content-Type': result.content_type or ''}, digest=result.sha256)
+        _record(key, url, result)
+        return cached
+
+    entry = _lookup(key)
+    cached = None
+    conditional = dict(headers)
+    if entry:
+        cached = CachedResponse(url, 200, {'Content-Type': entry['content_type'] or ''}, digest=entry['digest'],
+                                from_cache=True)
+        if not os.path.exists(cached.path):
+            # Evicted between the lookup and the pin
+            cached.close()
+            entry = cached = None
+    if entry:
+        if entry['etag']:
+            conditional['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            conditional['If-Modified-Since'] = entry['last_modified']
+
+    try:
+        response = http_client.get(url, params=params, headers=conditional, stream=True, **kwargs)
+    except BaseException:
+        if cached is not None:
+            cached.close()
+        raise
+    if response.status_code == 304 and cached is not None:
+        response.close()
+        _touch(key)
+        logger.info(f"Not modified, using cached body for {response.url}")
+        cached.url = response.url
+        return cached
+    if cached is not None:
+        cached.close()
+
+    if response.status_code != 200:
+        with response:
+            return CachedResponse(response.url, response.status_code, dict(response.headers),
+                                  content=response.content)
+
+    final_url = response.url
+    result = _store_body(key, url, params, headers, response, **kwargs)
+    cached = CachedResponse(final_url, 200, {'Content-Type': result.content_type or ''}, digest=result.sha256)
+    _record(key, final_url, result)
+    return cached
+
+
+def cached_get_json(url: str, **kwargs):
+    with cached_get(url, **kwargs) as response:
+        response.raise_for_status()
+        return response.json()
@@ -0,0 +1,333 @@
+import base64
+import email.utils
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from typing import NamedTuple, Optional
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) seconds; read is per socket read, not for the whole body
+DEFAULT_TIMEOUT = (10, 60)
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+RETRY_AFTER_CAP = 120.0
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+RETRY_EXCEPTIONS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+# Errors while reading a body straight off response.raw, where requests doesn't wrap them
+BODY_READ_EXCEPTIONS = RETRY_EXCEPTIONS + (urllib3.exceptions.HTTPError,)
+DOWNLOAD_ATTEMPTS = 8
+CHUNK_SIZE = 1 << 20
+POOL_CONNECTIONS = 16  # hosts kept in the pool
+POOL_MAXSIZE = 16      # keep-alive connections per host
+
+try:
+    import brotli  # urllib3 decodes "br" only when this is installed
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    brotli = None
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+USER_AGENT = 'Africa-DataScrape/1.0'
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """The process-wide session every API module shares.
+
+    One HTTPAdapter pool per scheme keeps up to POOL_MAXSIZE keep-alive
+    connections open per host, so back-to-back requests to the same API reuse a
+    warm connection instead of doing a new TCP/TLS handshake each time.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update({
+                    'User-Agent': USER_AGENT,
+                    'Accept-Encoding': ACCEPT_ENCODING,
+                    'Connection': 'keep-alive',
+                })
+                _session = session
+    return _session
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def backoff_delay(attempt: int) -> float:
+    # "Full jitter": spreads retries from parallel workers instead of having them retry in lockstep
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def request(method: str, url: str, retries: int = MAX_RETRIES, timeout=DEFAULT_TIMEOUT, **kwargs) -> requests.Response:
+    """Sends a request through the shared session, retrying transient failures.
+
+    Connection errors, timeouts and RETRY_STATUSES are retried with exponential
+    backoff; a Retry-After header, when present, sets the wait instead. Once the
+    retries are used up the last response is returned as is (so callers can keep
+    checking status_code) or the last exception is raised.
+    """
+    session = get_session()
+    for attempt in range(retries + 1):
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except RETRY_EXCEPTIONS as e:
+            if attempt == retries:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(f"{method} {url} failed ({e}); retry {attempt + 1}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+
+        delay = retry_after_seconds(response)
+        delay = min(delay, RETRY_AFTER_CAP) if delay is not None else backoff_delay(attempt)
+        logger.warning(f"{method} {url} returned {response.status_code}; retry {attempt + 1}/{retries} in {delay:.1f}s")
+        # Release the connection before sleeping
+        response.close()
+        time.sleep(delay)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request('POST', url, **kwargs)
+
+
+def get_json(url: str, **kwargs):
+    """GET that raises requests.HTTPError on an error status instead of parsing an error page."""
+    response = get(url, **kwargs)
+    response.raise_for_status()
+    return response.json()
+
+
+class IncompleteDownload(IOError):
+    pass
+
+
+class DownloadResult(NamedTuple):
+    sha256: str
+    size: int
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_type: Optional[str]
+
+
+def _resume_validator(response: requests.Response) -> Optional[str]:
+    # If-Range only accepts a strong ETag or a date
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return response.headers.get('Last-Modified')
+
+
+def _total_length(response: requests.Response) -> Optional[int]:
+    content_range = response.headers.get('Content-Range', '')
+    match = re.match(r'bytes (\d+)-\d+/(\d+)', content_range)
+    if match:
+        return int(match.group(2))
+    length = response.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else None
+
+
+def _digest_header(response: requests.Response) -> Optional[str]:
+    match = re.search(r'sha-256=([^,\s]+)', response.headers.get('Digest', ''))
+    return match.group(1) if match else None
+
+
+def _load_meta(meta_path: str) -> dict:
+    if not os.path.exists(meta_path):
+        return {}
+    with open(meta_path) as f:
+        return json.load(f)
+
+
+def _save_meta(meta_path: str, meta: dict):
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+
+def _check_server_digest(part_path: str, meta: dict):
+    """Compares the transferred bytes against Content-MD5 / Digest: sha-256 when the server sent one."""
+    for header, algorithm in (('digest_sha256', 'sha256'), ('content_md5', 'md5')):
+        expected = meta.get(header)
+        if not expected:
+            continue
+        digest = hashlib.new(algorithm)
+        with open(part_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        if base64.b64encode(digest.digest()).decode() != expected:
+            raise IncompleteDownload(f"{algorithm} mismatch for {part_path}")
+
+
+def _decoder(encoding: Optional[str]):
+    if encoding == 'gzip':
+        return zlib.decompressobj(16 + zlib.MAX_WBITS).decompress
+    if encoding == 'deflate':
+        return zlib.decompressobj().decompress
+    if encoding == 'br' and brotli is not None:
+        return brotli.Decompressor().process
+    return None
+
+
+def _finish(part_path: str, tmp_path: str, encoding: Optional[str]) -> str:
+    """Decodes the part-file into `tmp_path` and returns the sha256 of the result."""
+    decode = _decoder(encoding)
+    digest = hashlib.sha256()
+    with open(part_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+        for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+            if decode is not None:
+                chunk = decode(chunk)
+            digest.update(chunk)
+            dst.write(chunk)
+    return digest.hexdigest()
+
+
+def download(url: str, path: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+             expected_sha256: Optional[str] = None, attempts: int = DOWNLOAD_ATTEMPTS,
+             response: Optional[requests.Response] = None, **kwargs) -> DownloadResult:
+    """Downloads `url` to `path` through a part-file that survives dropped connections and restarts.
+
+    The body is written as transferred (still gzip/br encoded) to `path`.part,
+    with the validator and length in `path`.part.json. After a failure, and on
+    the next call after an interrupted run, the remaining bytes are requested
+    with Range + If-Range; if the resource changed the server sends it whole and
+    the part-file starts over. The finished part-file is checked against the
+    expected length and any Content-MD5 / Digest header, decoded, checked
+    against `expected_sha256` and atomically renamed to `path`. A sidecar
+    `path`.sha256 records the checksum.
+
+    `response` lets a caller hand over a GET it already started (stream=True).
+    Other keyword arguments (timeout, ...) go to every request it makes.
+    """
+    part_path = path + '.part'
+    meta_path = part_path + '.json'
+    meta = _load_meta(meta_path)
+    if meta.get('url') != url or meta.get('params') != params:
+        meta = {}
+    if not meta and os.path.exists(part_path):
+        os.remove(part_path)
+
+    for attempt in range(attempts):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if meta.get('total') is not None and offset == meta['total']:
+            break
+
+        request_headers = dict(headers or {})
+        if response is None and offset and meta.get('validator'):
+            request_headers['Range'] = f"bytes={offset}-"
+            request_headers['If-Range'] = meta['validator']
+
+        try:
+            if response is None:
+                response = get(url, params=params, headers=request_headers, stream=True, **kwargs)
+            with response:
+                if response.status_code == 206:
+                    start = int(re.match(r'bytes (\d+)-', response.headers.get('Content-Range', 'bytes 0-')).group(1))
+                    if start != offset:
+                        raise IncompleteDownload(f"asked for byte {offset}, got {start}")
+                    mode = 'ab'
+                elif response.status_code == 200:
+                    # Fresh body: first request, server ignored Range, or the resource changed
+                    meta = {
+                        'url': url,
+                        'params': params,
+                        'validator': _resume_validator(response),
+                        'encoding': response.headers.get('Content-Encoding'),
+                        'total': _total_length(response),
+                        'content_md5': response.headers.get('Content-MD5'),
+                        'digest_sha256': _digest_header(response),
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified'),
+                        'content_type': response.headers.get('Content-Type'),
+                    }
+                    _save_meta(meta_path, meta)
+                    mode = 'wb'
+                else:
+                    response.raise_for_status()
+                    raise IncompleteDownload(f"unexpected status {response.status_code} for {url}")
+
+                with open(part_path, mode) as f:
+                    for chunk in response.raw.stream(CHUNK_SIZE, decode_content=False):
+                        f.write(chunk)
+        except BODY_READ_EXCEPTIONS + (IncompleteDownload,) as e:
+            if isinstance(e, IncompleteDownload) and os.path.exists(part_path):
+                os.remove(part_path)
+            delay = backoff_delay(attempt)
+            logger.warning(f"Download of {url} interrupted ({e}); resuming in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+        finally:
+            response = None
+
+        size = os.path.getsize(part_path)
+        if meta.get('total') is None or size >= meta['total']:
+            break
+        logger.warning(f"Download of {url} stopped at {size}/{meta['total']} bytes; resuming")
+    else:
+        raise IncompleteDownload(f"Gave up on {url} after {attempts} attempts")
+
+    size = os.path.getsize(part_path)
+    if meta.get('total') is not None and size != meta['total']:
+        os.remove(part_path)
+        raise IncompleteDownload(f"{url}: expected {meta['total']} bytes, got {size}")
+    try:
+        _check_server_digest(part_path, meta)
+    except IncompleteDownload:
+        os.remove(part_path)
+        raise
+
+    tmp_path = path + '.tmp'
+    sha256 = _finish(part_path, tmp_path, meta.get('encoding'))
+    if expected_sha256 and sha256 != expected_sha256.lower():
+        # Whatever is already at `path` stays as it was
+        os.remove(tmp_path)
+        os.remove(part_path)
+        raise IncompleteDownload(f"{url}: sha256 {sha256} does not match expected {expected_sha256}")
+
+    os.replace(tmp_path, path)
+    os.remove(part_path)
+    os.remove(meta_path)
+    with open(path + '.sha256', 'w') as f:
+        f.write(f"{sha256}  {os.path.basename(path)}\n")
+    return DownloadResult(sha256, os.path.getsize(path), meta.get('etag'), meta.get('last_modified'),
+                          meta.get('content_type'))
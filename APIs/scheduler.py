@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+class HostBudget(NamedTuple):
+    max_concurrency: int  # tasks running against the host at once
+    rate: float           # tasks started per second
+
+
+# One entry per site we crawl; every scraper and API client shares these
+HOST_BUDGETS: Dict[str, HostBudget] = {
+    'open.africa': HostBudget(2, 0.5),
+    'kaggle.com': HostBudget(1, 0.25),
+    'databank.worldbank.org': HostBudget(2, 0.25),
+    'sdmx.data.unicef.org': HostBudget(4, 2.0),
+    'population.un.org': HostBudget(4, 5.0),
+    'data.un.org': HostBudget(2, 1.0),
+    'uninfo.org': HostBudget(2, 1.0),
+}
+DEFAULT_BUDGET = HostBudget(2, 1.0)
+
+
+def host_of(url_or_host: str) -> str:
+    host = urlsplit(url_or_host).netloc if '://' in url_or_host else url_or_host
+    host = host.split(':')[0].lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class RateLimiter:
+    """Thread-safe token bucket: `rate` acquisitions per second, bursts of one."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + 1 / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+
+class _HostQueue:
+    def __init__(self, budget: HostBudget):
+        self.budget = budget
+        self.limiter = RateLimiter(budget.rate)
+        self.pending = deque()
+        self.running = 0
+
+
+class CrawlScheduler:
+    """Runs page loads and fetches for every source inside per-host budgets.
+
+    Tasks for one host queue up behind its concurrency limit and are started no
+    faster than its rate; tasks for different hosts never wait on each other.
+
+    A task that calls run() or map() for its own host would wait for a slot it
+    is itself holding, so those calls run inline on the task's thread instead
+    (still paced by the host's rate). Waiting on submit() futures for the same
+    host from inside a task can still deadlock and should be avoided.
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, HostBudget]] = None, max_workers: Optional[int] = None):
+        self.budgets = dict(HOST_BUDGETS if budgets is None else budgets)
+        workers = max_workers or sum(b.max_concurrency for b in self.budgets.values()) + 8
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='crawl')
+        self._hosts: Dict[str, _HostQueue] = {}
+        self._lock = threading.Lock()
+        # Hosts whose slot the current thread is running a task in
+        self._held = threading.local()
+
+    def _holding(self, host: str) -> bool:
+        return host in getattr(self._held, 'hosts', ())
+
+    def _queue_for(self, host: str) -> _HostQueue:
+        queue = self._hosts.get(host)
+        if queue is None:
+            queue = self._hosts[host] = _HostQueue(self.budgets.get(host, DEFAULT_BUDGET))
+        return queue
+
+    def submit(self, url_or_host: str, fn: Callable, *args, **kwargs) -> Future:
+        """Schedules fn(*args, **kwargs) against the host of `url_or_host`."""
+        host = host_of(url_or_host)
+        future: Future = Future()
+        with self._lock:
+            queue = self._queue_for(host)
+            queue.pending.append((future, fn, args, kwargs))
+            self._dispatch(host, queue)
+        return future
+
+    def _dispatch(self, host: str, queue: _HostQueue):
+        # Caller holds self._lock
+        while queue.pending and queue.running < queue.budget.max_concurrency:
+            task = queue.pending.popleft()
+            queue.running += 1
+            self._executor.submit(self._run, host, queue, *task)
+
+    def _run(self, host: str, queue: _HostQueue, future: Future, fn: Callable, args, kwargs):
+        try:
+            if future.set_running_or_notify_cancel():
+                queue.limiter.acquire()
+                self._held.hosts = getattr(self._held, 'hosts', set()) | {host}
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+                finally:
+                    self._held.hosts = self._held.hosts - {host}
+        finally:
+            with self._lock:
+                queue.running -= 1
+                self._dispatch(host, queue)
+
+    def run(self, url_or_host: str, fn: Callable, *args, **kwargs):
+        """submit() and wait: for sequential loops that should still respect the host budget."""
+        host = host_of(url_or_host)
+        if self._holding(host):
+            self._hosts[host].limiter.acquire()
+            return fn(*args, **kwargs)
+        return self.submit(url_or_host, fn, *args, **kwargs).result()
+
+    def map(self, url_or_host: str, fn: Callable, items: Iterable) -> List:
+        """Results of fn(item) for every item, in input order."""
+        if self._holding(host_of(url_or_host)):
+            return [self.run(url_or_host, fn, item) for item in items]
+        futures = [self.submit(url_or_host, fn, item) for item in items]
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+_scheduler: Optional[CrawlScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> CrawlScheduler:
+    """The process-wide scheduler, so sources running side by side share budgets."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = CrawlScheduler()
+    return _scheduler
@@ -0,0 +1,185 @@
+import logging
+import os
+from typing import Dict, Iterable, List, Optional
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# A string column becomes a dictionary when it has at most this many distinct
+# values, and they make up no more than DICTIONARY_RATIO of its values.
+MAX_DICTIONARY_SIZE = 1 << 15
+DICTIONARY_RATIO = 0.5
+DICTIONARY_TYPE = pa.dictionary(pa.int32(), pa.string())
+# Codes such as "001" or "08" have to stay strings
+LEADING_ZERO = r'^[+-]?0[0-9]'
+PARQUET_OPTIONS = dict(compression='zstd', compression_level=6)
+
+
+def _casts(values: pa.Array, target: pa.DataType) -> bool:
+    try:
+        pc.cast(values, target)
+        return True
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return False
+
+
+class ColumnType:
+    """Narrowest type that fits every chunk of a string column seen so far.
+
+    Each chunk can only rule types out (int64 -> float64 -> date/timestamp ->
+    string), so a value deep in the file that contradicts the first chunk
+    widens the column instead of failing the cast.
+    """
+
+    def __init__(self):
+        self.can_int = self.can_float = self.can_date = self.can_timestamp = True
+        self.values = 0
+        self.distinct: Optional[set] = set()
+
+    def observe(self, array: pa.Array):
+        values = pc.drop_null(array)
+        if not len(values):
+            return
+        self.values += len(values)
+        if self.can_int or self.can_float:
+            if pc.any(pc.match_substring_regex(values, LEADING_ZERO)).as_py():
+                self.can_int = self.can_float = False
+        self.can_int = self.can_int and _casts(values, pa.int64())
+        if self.can_float or self.can_date or self.can_timestamp:
+            numeric = self.can_int or _casts(values, pa.float64())
+            self.can_float = self.can_float and numeric
+            if numeric:
+                # Years such as "2019" are numbers here, not dates
+                self.can_date = self.can_timestamp = False
+        if self.can_date or self.can_timestamp:
+            lengths = pc.utf8_length(values)
+            self.can_date = self.can_date and pc.all(pc.equal(lengths, 10)).as_py() and _casts(values, pa.date32())
+            self.can_timestamp = self.can_timestamp and _casts(values, pa.timestamp('us'))
+        if self.distinct is not None:
+            self.distinct.update(pc.unique(values).to_pylist())
+            if len(self.distinct) > MAX_DICTIONARY_SIZE:
+                self.distinct = None
+
+    def resolve(self) -> pa.DataType:
+        if not self.values:
+            return pa.string()
+        if self.can_int:
+            return pa.int64()
+        if self.can_float:
+            return pa.float64()
+        if self.can_date:
+            return pa.date32()
+        if self.can_timestamp:
+            return pa.timestamp('us')
+        if self.distinct is not None and len(self.distinct) <= DICTIONARY_RATIO * self.values:
+            return DICTIONARY_TYPE
+        return pa.string()
+
+
+class SchemaInference:
+    """Feeds string record batches through a ColumnType per column."""
+
+    def __init__(self):
+        self.columns: Dict[str, ColumnType] = {}
+        self.passthrough: Dict[str, pa.DataType] = {}
+        self.names: List[str] = []
+
+    def observe(self, batch):
+        for name, column in zip(batch.schema.names, batch.columns):
+            if name not in self.columns and name not in self.passthrough:
+                self.names.append(name)
+            if isinstance(column, pa.ChunkedArray):
+                chunks = column.chunks
+            else:
+                chunks = [column]
+            if not (pa.types.is_string(column.type) or pa.types.is_large_string(column.type)):
+                # Already typed upstream (or a dictionary from an earlier pass): keep as is
+                self.passthrough.setdefault(name, column.type)
+                continue
+            state = self.columns.setdefault(name, ColumnType())
+            for chunk in chunks:
+                state.observe(chunk)
+
+    def schema(self) -> pa.Schema:
+        return pa.schema([pa.field(name, self.columns[name].resolve() if name in self.columns
+                                   else self.passthrough[name]) for name in self.names])
+
+
+def infer_schema(batches: Iterable) -> pa.Schema:
+    inference = SchemaInference()
+    for batch in batches:
+        inference.observe(batch)
+    return inference.schema()
+
+
+def cast_batch(batch, schema: pa.Schema) -> pa.Table:
+    """A batch or table in `schema`: parsed, dictionary-encoded, missing columns as nulls."""
+    table = batch if isinstance(batch, pa.Table) else pa.Table.from_batches([batch])
+    columns = []
+    for field in schema:
+        if field.name not in table.column_names:
+            columns.append(pa.nulls(table.num_rows, field.type))
+            continue
+        column = table.column(field.name)
+        if column.type == field.type:
+            columns.append(column)
+        elif pa.types.is_dictionary(field.type):
+            if pa.types.is_dictionary(column.type):
+                column = column.cast(pa.string())
+            encoded = pc.dictionary_encode(column)
+            columns.append(encoded.cast(field.type) if encoded.type != field.type else encoded)
+        else:
+            columns.append(pc.cast(column, field.type))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def typed_table(table: pa.Table, chunk_size: int = 1 << 16) -> pa.Table:
+    """Infers types over a string table chunk by chunk and returns it cast."""
+    schema = infer_schema(table.to_batches(max_chunksize=chunk_size))
+    return cast_batch(table, schema)
+
+
+def optimize_parquet(path: str, batch_size: int = 1 << 16) -> pa.Schema:
+    """Rewrites a Parquet file of string columns with inferred types, in two streaming passes.
+
+    The first pass only collects type evidence batch by batch; the second casts
+    and writes, so memory stays at a batch regardless of file size.
+    """
+    source = pq.ParquetFile(path)
+    schema = infer_schema(source.iter_batches(batch_size=batch_size))
+    tmp_path = path + '.typed.tmp'
+    writer = pq.ParquetWriter(tmp_path, schema, **PARQUET_OPTIONS)
+    try:
+        for batch in source.iter_batches(batch_size=batch_size):
+            writer.write_table(cast_batch(batch, schema))
+    except BaseException:
+        writer.close()
+        os.remove(tmp_path)
+        raise
+    writer.close()
+    source.close()
+    before, after = os.path.getsize(path), os.path.getsize(tmp_path)
+    os.replace(tmp_path, path)
+    logger.info(f"Typed {path}: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB "
+                f"({', '.join(f'{f.name}: {f.type}' for f in schema if not pa.types.is_string(f.type))})")
+    return schema
+
+
+def cast_parquet(path: str, schema: pa.Schema) -> bool:
+    """Casts a file to another file's schema (a delta to the file it merges into).
+
+    Returns False, leaving the file alone, when a value doesn't fit; the caller
+    then re-infers the merged result instead.
+    """
+    table = pq.read_table(path)
+    target = pa.schema([schema.field(name) if name in schema.names else table.schema.field(name)
+                        for name in table.column_names])
+    try:
+        table = cast_batch(table, target)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        logger.info(f"{path} doesn't fit the existing types ({e})")
+        return False
+    pq.write_table(table, path, **PARQUET_OPTIONS)
+    return True
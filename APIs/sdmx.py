@@ -0,0 +1,402 @@
+import csv
+import io
+import json
+import logging
+import os
+import time
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import duckdb
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import requests
+
+from APIs import http_cache, http_client, store
+from APIs.countries import get_index, normalize_name
+from APIs.schema_inference import PARQUET_OPTIONS, cast_batch, optimize_parquet
+from APIs.sql import quote_identifier, quote_literal
+
+logger = logging.getLogger(__name__)
+
+# Bytes of CSV text parsed per record batch; peak memory stays around a few of these.
+STREAM_BLOCK_SIZE = 4 << 20
+# Rows per Arrow batch when a merged file is streamed back out of DuckDB
+MERGE_BATCH_SIZE = 1 << 16
+COUNTRY_COLUMNS = ['Geographic area', 'Country']
+
+SDMX_CACHE_DIR = os.environ.get('SDMX_CACHE_DIR', os.path.join('cache', 'sdmx'))
+# Codelists barely change; refetch a cached key structure after this many seconds.
+STRUCTURE_MAX_AGE = 30 * 24 * 3600
+REF_AREA = 'REF_AREA'
+TIME_PERIOD = 'TIME_PERIOD'
+
+SDMX_NS = {
+    'str': 'http://www.sdmx.org/resources/sdmxml/schemas/v2_1/structure',
+    'com': 'http://www.sdmx.org/resources/sdmxml/schemas/v2_1/common',
+}
+XML_LANG = '{http://www.w3.org/XML/1998/namespace}lang'
+
+
+def open_stream(url: str) -> requests.Response:
+    response = http_client.get(url, stream=True)
+    response.raw.decode_content = True
+    # Keep the raw stream readable at EOF; the buffered reader on top of it
+    # asks for more bytes after the body ends and would hit a closed file.
+    response.raw.auto_close = False
+    return response
+
+
+def _dedupe(names: List[str]) -> List[str]:
+    # Same naming pandas.read_csv uses for repeated headers: "X", "X.1", "X.2"
+    seen = {}
+    result = []
+    for name in names:
+        if name in seen:
+            seen[name] += 1
+            result.append(f"{name}.{seen[name]}")
+        else:
+            seen[name] = 0
+            result.append(name)
+    return result
+
+
+def iter_csv_batches(raw, block_size: int = STREAM_BLOCK_SIZE) -> Iterator[pa.RecordBatch]:
+    """Parses a CSV byte stream into record batches without buffering the whole body.
+
+    Every column is read as string so a value that only shows up deep in the
+    file can't clash with a type inferred from the first block.
+    """
+    stream = io.BufferedReader(raw, buffer_size=1 << 20) if not isinstance(raw, io.BufferedIOBase) else raw
+    header = stream.readline().decode('utf-8-sig')
+    if not header.strip():
+        return
+    names = _dedupe(next(csv.reader([header])))
+
+    reader = pa_csv.open_csv(
+        stream,
+        read_options=pa_csv.ReadOptions(column_names=names, block_size=block_size),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in names},
+            strings_can_be_null=True,
+        ),
+    )
+    for batch in reader:
+        yield batch
+
+
+def country_column(names: Iterable[str]) -> Optional[str]:
+    for candidate in COUNTRY_COLUMNS:
+        if candidate in names:
+            return candidate
+    return None
+
+
+def iter_filtered_batches(batches: Iterable[pa.RecordBatch], countries: List[str], file_name: str) -> Iterator[pa.RecordBatch]:
+    # Matched on M49 codes, so any spelling of a country in the file counts
+    index = get_index()
+    value_set = pa.array(sorted({index.code(name) for name in countries} - {-1}), type=pa.int32())
+    column_name = None
+    first = True
+    for batch in batches:
+        if column_name is None:
+            column_name = country_column(batch.schema.names)
+            if column_name is None:
+                logger.warning(f"Neither 'Geographic area' nor 'Country' column found in {file_name}")
+                return
+        mask = pc.is_in(index.resolve_arrow(batch.column(column_name)), value_set=value_set)
+        filtered = batch.filter(mask)
+        # Always pass the first batch on, even when empty, so the output gets a header/schema
+        if filtered.num_rows or first:
+            yield filtered
+        first = False
+
+
+def _write_stream(batches: Iterable[pa.RecordBatch], path: str, open_writer) -> int:
+    tmp_path = path + '.tmp'
+    writer = None
+    rows = 0
+    try:
+        for batch in batches:
+            if writer is None:
+                writer = open_writer(tmp_path, batch.schema)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            os.remove(tmp_path)
+        raise
+    if writer is None:
+        return 0
+    writer.close()
+    os.replace(tmp_path, path)
+    return rows
+
+
+def write_parquet_stream(batches: Iterable[pa.RecordBatch], path: str) -> int:
+    """Appends batches to `path` as they arrive; returns the number of rows written."""
+    return _write_stream(batches, path, pq.ParquetWriter)
+
+
+def write_csv_stream(batches: Iterable[pa.RecordBatch], path: str) -> int:
+    return _write_stream(batches, path, pa_csv.CSVWriter)
+
+
+def _write_dataflow(raw, path: str, countries: Optional[List[str]], file_name: str, fmt: str) -> int:
+    batches = iter_csv_batches(raw)
+    if countries is not None:
+        batches = iter_filtered_batches(batches, countries, file_name)
+    if fmt == 'csv':
+        return write_csv_stream(batches, path)
+    if fmt == 'store':
+        return store.write_batches(batches, path)
+    return write_parquet_stream(batches, path)
+
+
+def stream_dataflow(url: str, path: str, countries: Optional[List[str]], file_name: str, fmt: str = 'parquet',
+                    use_cache: bool = True) -> int:
+    """Downloads one SDMX CSV export straight into `path`.
+
+    Rows are filtered against `countries` batch by batch; pass None when the
+    query key already restricts REF_AREA on the server. With `use_cache` the
+    body is streamed into the HTTP cache first (or revalidated there, costing a
+    304 when the dataflow hasn't changed) and parsed from that file.
+    With fmt='store', `path` is a source name and the rows are appended to the
+    partitioned dataset store instead of a single file.
+    """
+    if use_cache:
+        with http_cache.cached_get(url) as response:
+            response.raise_for_status()
+            with response.open() as body:
+                return _write_dataflow(body, path, countries, file_name, fmt)
+
+    with open_stream(url) as response:
+        response.raise_for_status()
+        return _write_dataflow(response.raw, path, countries, file_name, fmt)
+
+
+def split_target(target_url: str) -> Tuple[str, str, str, str, str]:
+    """Splits "UNICEF,CME,1.0/all?format=csv" into (agency, flow, version, key, query)."""
+    path, _, query = target_url.partition('?')
+    flow_ref, _, key = path.partition('/')
+    agency, flow, version = flow_ref.split(',')
+    return agency, flow, version, key or 'all', query
+
+
+def parse_key_structure(content: bytes, flow: str) -> Optional[dict]:
+    """Reads dimension order and the REF_AREA codelist out of an SDMX-ML 2.1 structure message."""
+    root = ET.fromstring(content)
+
+    dsd_id = None
+    for dataflow in root.iter(f"{{{SDMX_NS['str']}}}Dataflow"):
+        if dataflow.get('id') == flow:
+            ref = dataflow.find('str:Structure/Ref', SDMX_NS)
+            if ref is not None:
+                dsd_id = ref.get('id')
+
+    dsd = None
+    for candidate in root.iter(f"{{{SDMX_NS['str']}}}DataStructure"):
+        if dsd_id is None or candidate.get('id') == dsd_id:
+            dsd = candidate
+            break
+    if dsd is None:
+        return None
+
+    dimensions = []
+    codelist_id = None
+    for dimension in dsd.iterfind('.//str:DimensionList/str:Dimension', SDMX_NS):
+        dimensions.append((int(dimension.get('position', len(dimensions) + 1)), dimension.get('id')))
+        if dimension.get('id') == REF_AREA:
+            ref = dimension.find('str:LocalRepresentation/str:Enumeration/Ref', SDMX_NS)
+            if ref is not None:
+                codelist_id = ref.get('id')
+
+    ref_area = {}
+    for codelist in root.iter(f"{{{SDMX_NS['str']}}}Codelist"):
+        if codelist.get('id') != codelist_id:
+            continue
+        for code in codelist.iterfind('str:Code', SDMX_NS):
+            names = code.findall('com:Name', SDMX_NS)
+            english = [n.text for n in names if n.get(XML_LANG) == 'en'] or [n.text for n in names]
+            ref_area[code.get('id')] = english[0] if english else code.get('id')
+
+    return {
+        'dimensions': [dimension_id for _, dimension_id in sorted(dimensions)],
+        'ref_area': ref_area,
+    }
+
+
+def load_key_structure(base_url: str, agency: str, flow: str, version: str) -> Optional[dict]:
+    """Dimension order and REF_AREA codes for a dataflow, cached under SDMX_CACHE_DIR."""
+    cache_path = os.path.join(SDMX_CACHE_DIR, f"{agency}_{flow}_{version}.json")
+    if os.path.exists(cache_path) and time.time() - os.path.getmtime(cache_path) < STRUCTURE_MAX_AGE:
+        with open(cache_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    structure_url = base_url.replace('/data/', '/dataflow/') + f"{agency}/{flow}/{version}"
+    try:
+        response = http_client.get(
+            structure_url,
+            params={'references': 'all', 'detail': 'full'},
+            headers={'Accept': 'application/vnd.sdmx.structure+xml;version=2.1'},
+        )
+        response.raise_for_status()
+        structure = parse_key_structure(response.content, flow)
+    except (requests.RequestException, ET.ParseError) as e:
+        logger.warning(f"Could not load key structure for {flow}: {e}")
+        structure = None
+
+    if structure is None:
+        # A stale cache entry is still better than downloading the whole world
+        if os.path.exists(cache_path):
+            with open(cache_path, encoding='utf-8') as f:
+                return json.load(f)
+        return None
+
+    os.makedirs(SDMX_CACHE_DIR, exist_ok=True)
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(structure, f)
+    return structure
+
+
+def resolve_ref_area_codes(names: Iterable[str], ref_area: Dict[str, str]) -> List[str]:
+    """REF_AREA codes for country names: the ISO3 code where the codelist uses it, else a label match."""
+    index = get_index()
+    by_name = {normalize_name(label): code for code, label in ref_area.items()}
+    spellings: Dict[int, List[str]] = {}
+    for key, m49 in index.keys().items():
+        spellings.setdefault(m49, []).append(key)
+    codes = []
+    missing = []
+    for name in dict.fromkeys(names):
+        m49 = index.code(name)
+        country = index.countries.get(m49)
+        if country is not None and country.iso3 in ref_area:
+            code = country.iso3
+        else:
+            code = next((by_name[key] for key in [normalize_name(name)] + spellings.get(m49, []) if key in by_name),
+                        None)
+        if code is None:
+            missing.append(name)
+        elif code not in codes:
+            codes.append(code)
+    if missing:
+        logger.warning(f"No REF_AREA code for: {', '.join(missing)}")
+    return codes
+
+
+def africa_query_url(base_url: str, target_url: str, countries: Iterable[str]) -> Tuple[str, bool]:
+    """Rewrites an `.../all?...` target so the server only returns African series.
+
+    Returns the full url and whether REF_AREA was pushed into the key. When the
+    dataflow has no enumerated REF_AREA dimension (or its structure can't be
+    loaded) the original `all` query comes back and the caller filters rows itself.
+    """
+    agency, flow, version, key, query = split_target(target_url)
+    fallback = (base_url + target_url, False)
+    if key != 'all':
+        return fallback
+
+    structure = load_key_structure(base_url, agency, flow, version)
+    if not structure or REF_AREA not in structure['dimensions'] or not structure['ref_area']:
+        logger.info(f"{flow}: REF_AREA can't be set in the key, filtering client-side")
+        return fallback
+
+    codes = resolve_ref_area_codes(countries, structure['ref_area'])
+    if not codes:
+        return fallback
+
+    parts = [''] * len(structure['dimensions'])
+    parts[structure['dimensions'].index(REF_AREA)] = '+'.join(codes)
+    url = f"{base_url}{agency},{flow},{version}/{'.'.join(parts)}"
+    if query:
+        url += '?' + query
+    return url, True
+
+
+def updated_after_url(url: str, since: str) -> str:
+    """Adds SDMX's updatedAfter parameter so only observations changed since `since` come back."""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != 'updatedAfter']
+    query.append(('updatedAfter', since))
+    return urlunsplit(parts._replace(query=urlencode(query, safe=':')))
+
+
+def stream_updates(url: str, since: str, path: str, countries: Optional[List[str]], file_name: str) -> int:
+    """Streams only the observations updated after `since` into `path`; 0 when nothing changed.
+
+    Deltas bypass the HTTP cache: every updatedAfter value is a one-off query.
+    """
+    try:
+        return stream_dataflow(updated_after_url(url, since), path, countries, file_name, use_cache=False)
+    except requests.HTTPError as e:
+        # SDMX answers "NoResultsFound" with a 404 when no series changed
+        if e.response is not None and e.response.status_code == 404:
+            return 0
+        raise
+
+
+def series_key_columns(structure: Optional[dict], columns: Iterable[str]) -> Optional[List[str]]:
+    """Columns identifying one observation: the series dimensions plus TIME_PERIOD."""
+    columns = list(columns)
+    if not structure or TIME_PERIOD not in columns:
+        return None
+    keys = [dimension for dimension in structure['dimensions'] if dimension in columns]
+    if not keys:
+        return None
+    return keys + [TIME_PERIOD]
+
+
+def merge_parquet(existing_path: str, delta_path: str, key_columns: List[str], as_text: bool = False) -> int:
+    """Upserts the rows of `delta_path` into `existing_path` on `key_columns`.
+
+    Rows of the existing file whose key appears in the delta are replaced;
+    everything else is carried over. DuckDB does the anti-join out of core and
+    the result is streamed back through Arrow in the existing file's types
+    (dictionaries and zstd included), then replaces it atomically.
+
+    With `as_text` (a delta whose values don't fit those types) both sides are
+    joined as VARCHAR and the merged file's types are inferred afresh.
+    Returns the new row count.
+    """
+    tmp_path = existing_path + '.tmp'
+    existing = pq.read_schema(existing_path)
+    columns = "COLUMNS(*)::VARCHAR" if as_text else "*"
+    on = ' AND '.join(f"e.{quote_identifier(k)} IS NOT DISTINCT FROM d.{quote_identifier(k)}" for k in key_columns)
+    con = duckdb.connect()
+    writer = None
+    rows = 0
+    try:
+        reader = con.execute(f"""
+            WITH e AS (SELECT {columns} FROM read_parquet({quote_literal(existing_path)})),
+                 d AS (SELECT {columns} FROM read_parquet({quote_literal(delta_path)}))
+            SELECT e.* FROM e ANTI JOIN d ON {on}
+            UNION ALL BY NAME
+            SELECT * FROM d
+        """).to_arrow_reader(MERGE_BATCH_SIZE)
+        if as_text:
+            schema = reader.schema
+        else:
+            # Columns only the delta has keep whatever type it brought
+            schema = pa.schema([existing.field(name) if name in existing.names else reader.schema.field(name)
+                                for name in reader.schema.names])
+        writer = pq.ParquetWriter(tmp_path, schema, **PARQUET_OPTIONS)
+        for batch in reader:
+            writer.write_table(cast_batch(batch, schema))
+            rows += batch.num_rows
+        writer.close()
+        if as_text:
+            optimize_parquet(tmp_path)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            os.remove(tmp_path)
+        raise
+    finally:
+        con.close()
+    os.replace(tmp_path, existing_path)
+    return rows
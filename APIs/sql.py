@@ -0,0 +1,10 @@
+# Quoting for the SQL the modules build for DuckDB: identifiers come from CSV
+# headers and paths from the file system, so neither can be pasted in raw.
+
+
+def quote_identifier(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def quote_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
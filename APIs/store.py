@@ -0,0 +1,335 @@
+import glob
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Union
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# One Hive-partitioned Parquet dataset for every source:
+#   STORE_DIR/source=<source>/run_date=<YYYY-MM-DD>/part-<UTC time>-<id>.parquet
+# Every run appends a new part file; each source keeps one Arrow schema
+# (STORE_DIR/source=<source>/_schema.arrow) that later runs are cast to. A
+# run whose values don't fit widens it (int -> float64, anything -> string)
+# and the source's existing part files are rewritten to match.
+STORE_DIR = os.environ.get('STORE_DIR', os.path.join('output', 'store'))
+COMPRESSION = 'zstd'
+COMPRESSION_LEVEL = 6
+ROW_GROUP_SIZE = 128 * 1024
+RUN_DATE = pa.field('run_date', pa.string())
+
+Records = Union[pa.Table, pa.RecordBatch, pd.DataFrame, Iterable]
+
+
+class SchemaMismatch(ValueError):
+    pass
+
+
+def source_dir(source: str, root: Optional[str] = None) -> str:
+    return os.path.join(root or STORE_DIR, f'source={source}')
+
+
+def today() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+
+def _schema_path(source: str, root: Optional[str]) -> str:
+    # Leading underscore: dataset discovery skips it
+    return os.path.join(source_dir(source, root), '_schema.arrow')
+
+
+def load_schema(source: str, root: Optional[str] = None) -> Optional[pa.Schema]:
+    path = _schema_path(source, root)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pa.ipc.read_schema(pa.py_buffer(f.read()))
+
+
+def _save_schema(source: str, schema: pa.Schema, root: Optional[str]):
+    path = _schema_path(source, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(schema.serialize().to_pybytes())
+    os.replace(tmp_path, path)
+
+
+def _plain(value):
+    # pydantic field types (AnyUrl, ...) are stored as their string form
+    if value is None or isinstance(value, (str, int, float, bool, datetime)):
+        return value
+    return str(value)
+
+
+def to_array(values: list) -> pa.Array:
+    """Arrow array of a column's values, as strings when they mix kinds Arrow can't unify."""
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Mixed kinds across records (1 here, "n/a" there): keep the column as text
+        return pa.array([None if value is None else str(value) for value in values], pa.string())
+
+
+def to_table(records: Records) -> pa.Table:
+    """Arrow table from a table/batch, a DataFrame, or an iterable of dicts or pydantic models."""
+    if isinstance(records, pa.Table):
+        return records
+    if isinstance(records, pa.RecordBatch):
+        return pa.Table.from_batches([records])
+    if isinstance(records, pd.DataFrame):
+        try:
+            return pa.Table.from_pandas(records, preserve_index=False)
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            # Object columns holding e.g. AnyUrl values: go through the records path
+            records = records.to_dict('records')
+    # Column by column, so keys missing from the first record aren't dropped
+    columns = {}
+    num_rows = 0
+    for record in records:
+        if hasattr(record, 'dict'):
+            record = record.dict()
+        for key, value in record.items():
+            columns.setdefault(key, [None] * num_rows).append(_plain(value))
+        num_rows += 1
+        for column in columns.values():
+            if len(column) < num_rows:
+                column.append(None)
+    return pa.table({key: to_array(values) for key, values in columns.items()})
+
+
+def initial_schema(schema: pa.Schema) -> pa.Schema:
+    """A first write's schema, with columns that were all null typed as string."""
+    return pa.schema([pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f.remove_metadata()
+                      for f in schema])
+
+
+def widen(stored: pa.DataType, incoming: pa.DataType) -> pa.DataType:
+    """The next type up that holds both: int64 for integers, float64 for numbers, else string."""
+    numeric = [pa.types.is_integer(t) or pa.types.is_floating(t) for t in (stored, incoming)]
+    if pa.types.is_integer(stored) and pa.types.is_integer(incoming):
+        wider = pa.int64()
+    elif all(numeric):
+        wider = pa.float64()
+    else:
+        wider = pa.string()
+    # int64 that still doesn't fit (a uint64 beyond its range, say) goes on up
+    if wider == stored:
+        wider = pa.float64() if pa.types.is_integer(stored) else pa.string()
+    return wider
+
+
+def _fits(column, target: pa.DataType) -> bool:
+    try:
+        column.cast(target)
+        return True
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return False
+
+
+def fit_schema(table: pa.Table, schema: pa.Schema) -> pa.Schema:
+    """`schema` with each column `table` can't be cast into losslessly widened until it can."""
+    fields = []
+    for field in schema:
+        if field.name in table.column_names:
+            column = table.column(field.name)
+            target = field.type
+            while column.type != target and not _fits(column, target):
+                if pa.types.is_string(target):
+                    raise SchemaMismatch(f"Column {field.name!r} ({column.type}) can't be stored as {target}")
+                target = widen(target, column.type)
+            if target != field.type:
+                field = field.with_type(target)
+        fields.append(field)
+    return pa.schema(fields)
+
+
+def conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    """Lines a table up with a source schema: same column order, missing columns as nulls, values cast."""
+    columns = []
+    for field in schema:
+        if field.name not in table.column_names:
+            columns.append(pa.nulls(table.num_rows, field.type))
+            continue
+        column = table.column(field.name)
+        try:
+            columns.append(column if column.type == field.type else column.cast(field.type))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            raise SchemaMismatch(f"Column {field.name!r} ({column.type}) doesn't fit the stored {field.type}: {e}")
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def part_files(source: str, root: Optional[str] = None) -> List[str]:
+    return sorted(glob.glob(os.path.join(source_dir(source, root), 'run_date=*', 'part-*.parquet')))
+
+
+def _write_part(table: pa.Table, path: str):
+    tmp_path = os.path.join(os.path.dirname(path), '.' + os.path.basename(path) + '.tmp')
+    pq.write_table(table, tmp_path, compression=COMPRESSION, compression_level=COMPRESSION_LEVEL,
+                   row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp_path, path)
+
+
+def rewrite_parts(source: str, schema: pa.Schema, root: Optional[str] = None) -> int:
+    """Casts every stored part file of a source to a widened schema; returns the number rewritten."""
+    paths = part_files(source, root)
+    for path in paths:
+        # ParquetFile, not read_table: the run_date in the path mustn't come back as a column
+        _write_part(conform(pq.ParquetFile(path).read(), schema), path)
+    return len(paths)
+
+
+class DatasetWriter:
+    """Writes one run of a source into a new part file of its run_date partition.
+
+    Batches are appended as they come, so streamed downloads are never held
+    whole. The first write of a new source fixes its schema; columns that
+    show up later are appended to it (mid-run, by starting another part file).
+    A batch that doesn't fit an existing column's type widens it, and the
+    source's part files written so far are rewritten in the wider type. Part
+    files only become visible once the writer is closed cleanly.
+    """
+
+    def __init__(self, source: str, run_date: Optional[str] = None, root: Optional[str] = None):
+        self.source = source
+        self.root = root
+        self.run_date = run_date or today()
+        self.schema = load_schema(source, root)
+        self.directory = os.path.join(source_dir(source, root), f'run_date={self.run_date}')
+        self.paths: List[str] = []
+        self._writer = None
+        self._tmp_path = None
+        self.rows = 0
+
+    def _open(self):
+        name = f"part-{datetime.now(timezone.utc).strftime('%H%M%S%f')}-{uuid.uuid4().hex[:8]}.parquet"
+        os.makedirs(self.directory, exist_ok=True)
+        self._tmp_path = os.path.join(self.directory, '.' + name + '.tmp')
+        self._writer = pq.ParquetWriter(self._tmp_path, self.schema, compression=COMPRESSION,
+                                        compression_level=COMPRESSION_LEVEL)
+        self.paths.append(os.path.join(self.directory, name))
+
+    def _finish_part(self):
+        self._writer.close()
+        self._writer = None
+        os.replace(self._tmp_path, self.paths[-1])
+
+    def _evolve(self, table: pa.Table):
+        if self.schema is None:
+            self.schema = initial_schema(table.schema)
+            _save_schema(self.source, self.schema, self.root)
+            return
+        added = [pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f.remove_metadata()
+                 for f in table.schema if f.name not in self.schema.names]
+        widened = fit_schema(table, self.schema)
+        changed = [f"{f.name}: {old.type} -> {f.type}" for f, old in zip(widened, self.schema) if f.type != old.type]
+        if not added and not changed:
+            return
+        if self._writer is not None:
+            self._finish_part()
+        if added:
+            logger.info(f"{self.source}: adding columns {[f.name for f in added]} to the stored schema")
+        schema = pa.schema(list(widened) + added)
+        if changed:
+            logger.info(f"{self.source}: widening {', '.join(changed)}")
+            rewrite_parts(self.source, schema, self.root)
+        self.schema = schema
+        _save_schema(self.source, self.schema, self.root)
+
+    def write(self, records: Records) -> int:
+        table = to_table(records)
+        self._evolve(table)
+        if not table.num_rows:
+            return 0
+        if self._writer is None:
+            self._open()
+        self._writer.write_table(conform(table, self.schema), row_group_size=ROW_GROUP_SIZE)
+        self.rows += table.num_rows
+        return table.num_rows
+
+    def close(self) -> List[str]:
+        if self._writer is not None:
+            self._finish_part()
+            logger.info(f"Stored {self.rows} {self.source} rows in {self.directory}")
+        return self.paths
+
+    def abort(self):
+        """Drops the part being written; parts already finished for new columns stay."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            os.remove(self._tmp_path)
+            self.paths.pop()
+
+    def __enter__(self) -> 'DatasetWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_records(source: str, records: Records, run_date: Optional[str] = None,
+                  root: Optional[str] = None) -> int:
+    """Appends one run's records to the store; returns the number of rows written."""
+    with DatasetWriter(source, run_date, root) as writer:
+        writer.write(records)
+    return writer.rows
+
+
+def write_batches(batches: Iterable[pa.RecordBatch], source: str, run_date: Optional[str] = None,
+                  root: Optional[str] = None) -> int:
+    """Streams record batches into the store; returns the number of rows written."""
+    with DatasetWriter(source, run_date, root) as writer:
+        for batch in batches:
+            writer.write(batch)
+    return writer.rows
+
+
+def sources(root: Optional[str] = None) -> List[str]:
+    root = root or STORE_DIR
+    if not os.path.isdir(root):
+        return []
+    return sorted(name[len('source='):] for name in os.listdir(root) if name.startswith('source='))
+
+
+def run_dates(source: str, root: Optional[str] = None) -> List[str]:
+    directory = source_dir(source, root)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name[len('run_date='):] for name in os.listdir(directory) if name.startswith('run_date='))
+
+
+def dataset(source: str, root: Optional[str] = None) -> ds.Dataset:
+    """A source's partitions as one pyarrow dataset, with run_date as a column."""
+    stored = load_schema(source, root)
+    schema = pa.schema(list(stored) + [RUN_DATE]) if stored is not None else None
+    return ds.dataset(source_dir(source, root), format='parquet', schema=schema,
+                      partitioning=ds.partitioning(pa.schema([RUN_DATE]), flavor='hive'))
+
+
+def read(source: str, columns: Optional[List[str]] = None, since: Optional[str] = None,
+         run_date: Optional[str] = None, latest: bool = False, root: Optional[str] = None) -> pa.Table:
+    """Reads a source, pruned to the requested columns and run dates.
+
+    `since` keeps run dates on or after it, `run_date` a single one and
+    `latest` only the most recent run date.
+    """
+    if latest:
+        dates = run_dates(source, root)
+        if not dates:
+            raise FileNotFoundError(f"Nothing stored for {source} under {root or STORE_DIR}")
+        run_date = dates[-1]
+    condition = None
+    if run_date is not None:
+        condition = ds.field('run_date') == run_date
+    elif since is not None:
+        condition = ds.field('run_date') >= since
+    return dataset(source, root).to_table(columns=columns, filter=condition)
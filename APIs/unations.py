@@ -1,51 +1,190 @@
-import requests
 import json
 import os
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 import pandas as pd
+import pyarrow as pa
 from tqdm import tqdm
+from APIs import http_cache, http_client, store
+from APIs.fetcher import AsyncFetcher
 
 base_path = 'https://population.un.org/dataportalapi/api/v1/'
 relative_path = "indicators"
 
+# population.un.org: pages fetched in parallel and new requests per second
+UNPOP_MAX_WORKERS = 4
+UNPOP_RATE = 5.0
+
 def fetch_data(page, page_size=100):
     params = {
         'pageNumber': page,
         'pageSize': page_size
     }
-    response = requests.get(base_path + relative_path, params=params)
+    response = http_client.get(base_path + relative_path, params=params)
     if response.status_code == 200:
         return response.json()
     else:
         print(f"Error fetching page {page}: Status code {response.status_code}")
         return None
 
-os.makedirs('output', exist_ok=True)
 
-all_data = []
-max_pages = 100
+def page_url(url: str, page: int, page_size: Optional[int] = None) -> str:
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query['pageNumber'] = str(page)
+    if page_size is not None:
+        query['pageSize'] = str(page_size)
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def page_number(url: str) -> int:
+    return int(dict(parse_qsl(urlsplit(url).query))['pageNumber'])
+
+
+def iter_pages(
+    url: str,
+    page_size: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    max_workers: int = UNPOP_MAX_WORKERS,
+    on_page: Optional[Callable[[int, int], None]] = None,
+) -> Iterator[dict]:
+    """Yields the raw payload of every page of a Data Portal query, in page order.
+
+    Page 1 reports how many pages there are, so pages 2..N are requested all at
+    once (at most `max_workers` in flight) instead of following `nextPage` one
+    hop at a time. A page that arrives early is held only until the pages before
+    it have been yielded. Responses that aren't paginated are yielded as is.
+    `on_page(done, total)` is called from the consuming thread as pages arrive.
+    """
+    first = http_cache.cached_get_json(page_url(url, 1, page_size))
+    yield first
+    if not isinstance(first, dict) or 'pages' not in first:
+        return
+
+    total = first['pages'] or 1
+    if max_pages is not None:
+        total = min(total, max_pages)
+    if on_page:
+        on_page(1, total)
+
+    waiting = {}
+    next_page = 2
+    done = 1
+    fetcher = AsyncFetcher(max_per_host=max_workers, rate=UNPOP_RATE, fetch=http_cache.cached_get_json)
+    for result in fetcher.iter_completed(page_url(url, page, page_size) for page in range(2, total + 1)):
+        if result.error is not None:
+            raise result.error
+        waiting[page_number(result.url)] = result.response
+        done += 1
+        if on_page:
+            on_page(done, total)
+        while next_page in waiting:
+            yield waiting.pop(next_page)
+            next_page += 1
+
+
+def fetch_pages(url: str, **kwargs) -> List[dict]:
+    return list(iter_pages(url, **kwargs))
+
+
+def page_records(pages: Iterable[dict]) -> Iterator[dict]:
+    for page in pages:
+        yield from page.get('data') or []
+
+
+def _flatten(record: dict, prefix: str = '') -> Iterator[Tuple[str, object]]:
+    # Same column names as pd.json_normalize: nested dicts become "parent.child"
+    for key, value in record.items():
+        name = prefix + key
+        if isinstance(value, dict):
+            yield from _flatten(value, name + '.')
+        else:
+            yield name, value
+
+
+class PageCollector:
+    """Gathers paginated records column by column in a single pass.
+
+    Every value is appended once to its column's list; nothing is re-copied as
+    pages come in, unlike growing a DataFrame page by page.
+    """
+
+    def __init__(self):
+        self.columns: Dict[str, list] = {}
+        self.num_rows = 0
+
+    def add_records(self, records: Iterable[dict]):
+        for record in records:
+            for name, value in _flatten(record):
+                column = self.columns.get(name)
+                if column is None:
+                    # Column first seen now: earlier rows didn't have it
+                    column = self.columns[name] = [None] * self.num_rows
+                column.append(value)
+            self.num_rows += 1
+            for column in self.columns.values():
+                if len(column) < self.num_rows:
+                    column.append(None)
+
+    def add_pages(self, pages: Iterable[dict]) -> 'PageCollector':
+        for page in pages:
+            self.add_records(page.get('data') or [])
+        return self
+
+    def to_table(self) -> pa.Table:
+        return pa.table({name: store.to_array(values) for name, values in self.columns.items()})
+
+    def to_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame(self.columns)
+
+
+def pages_to_dataframe(pages: Iterable[dict]) -> pd.DataFrame:
+    return PageCollector().add_pages(pages).to_dataframe()
+
+
+def pages_to_table(pages: Iterable[dict]) -> pa.Table:
+    return PageCollector().add_pages(pages).to_table()
+
+
+def write_pages_store(pages: Iterable[dict], source: str) -> int:
+    """Streams pages into the dataset store as one run of `source`; returns rows written.
+
+    Only the page being written is held in memory. A page whose values don't
+    fit the types earlier pages set widens the stored schema.
+    """
+    with store.DatasetWriter(source) as writer:
+        for page in pages:
+            collector = PageCollector()
+            collector.add_records(page.get('data') or [])
+            if collector.num_rows:
+                writer.write(collector.to_table())
+    return writer.rows
+
+
+def main():
+    os.makedirs('output', exist_ok=True)
+
+    max_pages = 100
 
-for page in tqdm(range(1, max_pages + 1), desc="Fetching pages"):
-    page_data = fetch_data(page)
-    if page_data is None or not page_data['data']:
-        break
-    all_data.extend(page_data['data'])
-    
-    if page_data['nextPage'] is None:
-        print(f"Reached last page at {page}")
-        break
+    with tqdm(desc="Fetching pages") as progress:
+        def on_page(done, total):
+            progress.total = total
+            progress.update(done - progress.n)
 
+        pages = fetch_pages(base_path + relative_path, page_size=100, max_pages=max_pages, on_page=on_page)
+    all_data = list(page_records(pages))
 
-with open('output/un_population_data_all.json', 'w') as f:
-    json.dump(all_data, f, indent=4)
+    with open('output/un_population_data_all.json', 'w') as f:
+        json.dump(all_data, f, indent=4)
 
-print("Complete JSON data saved to output/un_population_data_all.json")
+    print("Complete JSON data saved to output/un_population_data_all.json")
 
 
-df = pd.json_normalize(all_data)
+    rows = write_pages_store(pages, 'un_population')
+    print(f"Stored {rows} records in the dataset store")
 
-csv_file_path = 'output/un_population_data_all.csv'
-df.to_csv(csv_file_path, index=False)
+    print(f"Total records fetched: {len(all_data)}")
 
-print(f"Complete CSV data saved to {csv_file_path}")
 
-print(f"Total records fetched: {len(all_data)}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
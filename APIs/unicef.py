@@ -1,7 +1,6 @@
-import requests
-import pandas as pd
-import io
-import time
+from APIs.countries import african_names
+from APIs.fetcher import AsyncFetcher
+from APIs.sdmx import africa_query_url, stream_dataflow
 
 base_url = "https://sdmx.data.unicef.org/ws/public/sdmxapi/rest/data/"
 
@@ -37,47 +36,49 @@ target_url_list = [
                 "UNICEF,WT,1.0/all?format=csv&labels=both"
                    ]
 
-african_countries = [
-    'Algeria', 'Angola', 'Benin', 'Botswana', 'Burkina Faso', 'Burundi', 'Cameroon',
-    'Cape Verde', 'Central African Republic', 'Chad', 'Comoros', 'Congo',
-    'Democratic Republic of the Congo', 'Djibouti', 'Egypt', 'Equatorial Guinea',
-    'Eritrea', 'Ethiopia', 'Gabon', 'Gambia', 'Ghana', 'Guinea', 'Guinea-Bissau',
-    'Ivory Coast', 'Kenya', 'Lesotho', 'Liberia', 'Libya', 'Madagascar', 'Malawi',
-    'Mali', 'Mauritania', 'Mauritius', 'Morocco', 'Mozambique', 'Namibia', 'Niger',
-    'Nigeria', 'Rwanda', 'Sao Tome and Principe', 'Senegal', 'Seychelles',
-    'Sierra Leone', 'Somalia', 'South Africa', 'South Sudan', 'Sudan', 'Swaziland',
-    'Tanzania', 'Togo', 'Tunisia', 'Uganda', 'Zambia', 'Zimbabwe'
-]
-
-for target_url in target_url_list:
-    file_name = target_url.split(',')[1].split('/')[0]
-    print(f"Processing: {file_name}")
-    
-    response = requests.get(base_url + target_url)
-    if response.status_code == 200:
-        print("Request successful")
-        
-        df = pd.read_csv(io.StringIO(response.text))
-        
-    
-        if 'Geographic area' in df.columns:
-            column_name = 'Geographic area'
-        elif 'Country' in df.columns:
-            column_name = 'Country'
-        else:
-            print(f"Warning: Neither 'Geographic area' nor 'Country' column found in {file_name}")
+african_countries = african_names()
+
+# sdmx.data.unicef.org: at most 4 downloads in flight, 2 new requests per second
+UNICEF_MAX_PER_HOST = 4
+UNICEF_RATE = 2.0
+
+
+def dataflow_name(target_url):
+    return target_url.split(',')[1].split('/')[0]
+
+
+def africa_url(url):
+    """Returns (url, pushed_down): REF_AREA limited to Africa in the key where the dataflow allows it."""
+    return africa_query_url(base_url, url[len(base_url):], african_countries)
+
+
+def stream_to_store(url):
+    file_name = dataflow_name(url)
+    url, pushed_down = africa_url(url)
+    source = f"unicef_{file_name}"
+    rows = stream_dataflow(url, source, None if pushed_down else african_countries, file_name, fmt='store')
+    return source, rows
+
+
+def main():
+    # Each download is parsed and filtered batch by batch on its fetcher thread,
+    # so no dataflow is ever held in memory as a whole.
+    fetcher = AsyncFetcher(max_per_host=UNICEF_MAX_PER_HOST, rate=UNICEF_RATE, fetch=stream_to_store)
+    urls = [base_url + target_url for target_url in target_url_list]
+
+    for result in fetcher.iter_completed(urls):
+        file_name = dataflow_name(result.url)
+
+        if result.error is not None:
+            print(f"Request failed for {file_name}: {result.error}")
             continue
-        
-        df_africa = df[df[column_name].isin(african_countries)]
-        
-        print(f"Number of rows for African countries: {len(df_africa)}")
-        
-        output_file = f"unicef_{file_name}.csv"
-        df_africa.to_csv(output_file, index=False)
-        print(f"Saved {output_file} successfully")
-        
-    else:
-        print(f"Request failed with status code: {response.status_code}")
-    time.sleep(1)
-
-print("All processing completed.")
\ No newline at end of file
+
+        source, rows = result.response
+        print(f"Number of rows for African countries in {file_name}: {rows}")
+        print(f"Stored {source} successfully")
+
+    print("All processing completed.")
+
+
+if __name__ == "__main__":
+    main()
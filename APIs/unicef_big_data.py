@@ -1,17 +1,25 @@
-import requests
-import pandas as pd
-import pyarrow as pa
+import argparse
+import os
+from datetime import datetime, timezone
 import pyarrow.parquet as pq
-import duckdb
 import json
-import io
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, NamedTuple, Optional
+import duckdb
+from APIs.catalog import Catalog
+from APIs.fetcher import AsyncFetcher
+from APIs.unicef import UNICEF_MAX_PER_HOST, UNICEF_RATE, african_countries, africa_url, dataflow_name
+from APIs.schema_inference import cast_parquet, optimize_parquet
+from APIs.sdmx import (load_key_structure, merge_parquet, series_key_columns, split_target, stream_dataflow,
+                       stream_updates)
 
 base_url = "https://sdmx.data.unicef.org/ws/public/sdmxapi/rest/data/"
 target_url_list = ["UNICEF,NUTRITION,1.0/all?format=csv&labels=both", 
                    "UNICEF,GLOBAL_DATAFLOW,1.0/all?format=csv&labels=both"
                   ]
 
+# Per-dataflow high-water marks (UTC start time of the last successful refresh)
+STATE_FILE = 'unicef_refresh_state.json'
+
 #  "UNICEF,CME_DF_2021_WQ,1.0/all?format=csv&labels=both"
 # def fetch_and_save_parquet(target_url):
 #     file_name = target_url.split(',')[1].split('/')[0]
@@ -32,60 +40,143 @@ target_url_list = ["UNICEF,NUTRITION,1.0/all?format=csv&labels=both",
 #         print(f"Request failed for {file_name}: {response.status_code}")
 
 
-def fetch_and_save_parquet(target_url):
-    file_name = target_url.split(',')[1].split('/')[0]
-    response = requests.get(base_url + target_url)
-    
-    if response.status_code == 200:
-        df = pd.read_csv(io.StringIO(response.text), low_memory=False)
-        
-        # # Convert 'SERIES_YEAR' to string to avoid type conflicts
-        # df['SERIES_YEAR'] = df['SERIES_YEAR'].astype(str)
-        
-        for col in df.select_dtypes(include=['object']):
-            df[col] = df[col].astype(str)
-        
-        table = pa.Table.from_pandas(df)
-        
-        pq.write_table(table, f"unicef_{file_name}.parquet")
-        
-        print(f"Saved {file_name} as Parquet")
-    else:
-        print(f"Request failed for {file_name}: {response.status_code}")
+def load_watermarks():
+    if not os.path.exists(STATE_FILE):
+        return {}
+    with open(STATE_FILE) as f:
+        return json.load(f)
 
-def process_with_duckdb():
-    con = duckdb.connect('unicef_data.db')
-    
-    for target_url in target_url_list:
-        file_name = target_url.split(',')[1].split('/')[0]
-        parquet_file = f"unicef_{file_name}.parquet"
-        
-        con.execute(f"CREATE OR REPLACE TABLE {file_name} AS SELECT * FROM parquet_scan('{parquet_file}')")
-        
-        con.execute(f"""
-            CREATE OR REPLACE TABLE {file_name}_africa AS
-            SELECT * FROM {file_name}
-            WHERE "Geographic area" IN (
-                'Algeria', 'Angola', 'Benin', 'Botswana', 'Burkina Faso', 'Burundi', 'Cameroon',
-                'Cape Verde', 'Central African Republic', 'Chad', 'Comoros', 'Congo',
-                'Democratic Republic of the Congo', 'Djibouti', 'Egypt', 'Equatorial Guinea',
-                'Eritrea', 'Ethiopia', 'Gabon', 'Gambia', 'Ghana', 'Guinea', 'Guinea-Bissau',
-                'Ivory Coast', 'Kenya', 'Lesotho', 'Liberia', 'Libya', 'Madagascar', 'Malawi',
-                'Mali', 'Mauritania', 'Mauritius', 'Morocco', 'Mozambique', 'Namibia', 'Niger',
-                'Nigeria', 'Rwanda', 'Sao Tome and Principe', 'Senegal', 'Seychelles',
-                'Sierra Leone', 'Somalia', 'South Africa', 'South Sudan', 'Sudan', 'Swaziland',
-                'Tanzania', 'Togo', 'Tunisia', 'Uganda', 'Zambia', 'Zimbabwe'
-            )
-        """)
-        
-        print(f"Processed {file_name}")
 
-with ThreadPoolExecutor(max_workers=5) as executor:
-    futures = [executor.submit(fetch_and_save_parquet, url) for url in target_url_list]
-    for future in as_completed(futures):
-        future.result()
+def save_watermarks(watermarks):
+    tmp_file = STATE_FILE + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(watermarks, f, indent=2)
+    os.replace(tmp_file, STATE_FILE)
+
+
+class DataflowRefresh(NamedTuple):
+    file_name: str
+    summary: str
+    changed: bool
+    delta_file: Optional[str]          # set for delta refreshes; removed once the catalog has it
+    key_columns: Optional[List[str]]
+
+
+def refresh_dataflow(url, since=None):
+    """Full download when `since` is None, otherwise an updatedAfter delta upserted into the Parquet file.
+
+    A delta file is left in place for process_with_duckdb to apply to the catalog.
+    """
+    file_name = dataflow_name(url)
+    parquet_file = f"unicef_{file_name}.parquet"
+    url, pushed_down = africa_url(url)
+    countries = None if pushed_down else african_countries
+
+    key_columns = None
+    if since is not None and os.path.exists(parquet_file):
+        agency, flow, version, _, _ = split_target(url[len(base_url):])
+        structure = load_key_structure(base_url, agency, flow, version)
+        key_columns = series_key_columns(structure, pq.read_schema(parquet_file).names)
+        if key_columns is None:
+            print(f"No series key for {file_name}, doing a full reload")
+
+    if key_columns is None:
+        rows = stream_dataflow(url, parquet_file, countries, file_name)
+        if rows:
+            optimize_parquet(parquet_file)
+        return DataflowRefresh(file_name, f"{rows} rows (full reload)", True, None, None)
+
+    delta_file = f"unicef_{file_name}.delta.parquet"
+    changed = stream_updates(url, since, delta_file, countries, file_name)
+    if not changed:
+        if os.path.exists(delta_file):
+            os.remove(delta_file)
+        return DataflowRefresh(file_name, f"no changes since {since}", False, None, None)
+    try:
+        # The delta arrives as strings; give it the file's types, or re-type the merged file if it doesn't fit
+        fits = cast_parquet(delta_file, pq.read_schema(parquet_file))
+        rows = merge_parquet(parquet_file, delta_file, key_columns, as_text=not fits)
+    except BaseException:
+        os.remove(delta_file)
+        raise
+    if not fits:
+        # The catalog table has the old types too, so it gets the re-typed file whole
+        os.remove(delta_file)
+        return DataflowRefresh(file_name, f"{changed} rows updated since {since}, {rows} rows total (re-typed)", True,
+                               None, None)
+    return DataflowRefresh(file_name, f"{changed} rows updated since {since}, {rows} rows total", True,
+                           delta_file, key_columns)
+
+
+def process_with_duckdb(refreshes) -> List[str]:
+    """Brings the catalog's dataflow tables up to date with this run's refreshes.
+
+    A delta only upserts the changed series into {name} and {name}_africa;
+    full reloads (and tables the catalog doesn't have yet) are loaded whole,
+    as is a table whose delta fails to apply. New dataset store partitions are
+    appended as well. Returns the dataflows the catalog has caught up with;
+    a delta file is only removed once it is in the catalog.
+    """
+    caught_up = []
+    with Catalog() as catalog:
+        existing = set(catalog.tables())
+        for refresh in refreshes:
+            parquet_file = f"unicef_{refresh.file_name}.parquet"
+            try:
+                if refresh.delta_file is not None and refresh.file_name in existing:
+                    try:
+                        rows = catalog.apply_delta(refresh.file_name, refresh.delta_file, refresh.key_columns)
+                    except duckdb.Error as e:
+                        # The Parquet file already has the delta merged in, so it can stand in for it
+                        print(f"Delta for {refresh.file_name} didn't apply ({e}), reloading the table")
+                        rows = catalog.load_table(refresh.file_name, parquet_file)
+                elif refresh.changed or refresh.file_name not in existing:
+                    rows = catalog.load_table(refresh.file_name, parquet_file)
+                else:
+                    rows = None
+            except duckdb.Error as e:
+                # Left out of caught_up: its watermark stays, so the next run fetches the changes again
+                print(f"Catalog update failed for {refresh.file_name}: {e}")
+                continue
+            if refresh.delta_file is not None:
+                os.remove(refresh.delta_file)
+            caught_up.append(refresh.file_name)
+            if rows is not None:
+                print(f"Processed {refresh.file_name}: {rows} rows")
+        catalog.refresh_store()
+    return caught_up
+
+
+def main(full_reload=False):
+    # Marks are taken before any request, so updates published mid-run are picked up next time
+    run_started = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    watermarks = {} if full_reload else load_watermarks()
+
+    def refresh(url):
+        return refresh_dataflow(url, since=watermarks.get(dataflow_name(url)))
+
+    fetcher = AsyncFetcher(max_per_host=UNICEF_MAX_PER_HOST, rate=UNICEF_RATE, fetch=refresh)
+    urls = [base_url + target_url for target_url in target_url_list]
+
+    refreshes = []
+    for result in fetcher.iter_completed(urls):
+        if result.error is not None:
+            print(f"Request failed for {dataflow_name(result.url)}: {result.error}")
+            continue
+        refreshes.append(result.response)
+        print(f"Saved {result.response.file_name} as Parquet: {result.response.summary}")
+
+    # A watermark only moves once the catalog has the changes too; until then
+    # every run asks for them again (the Parquet upsert is idempotent)
+    for file_name in process_with_duckdb(refreshes):
+        watermarks[file_name] = run_started
+    save_watermarks(watermarks)
 
+    print("All processing completed.")
 
-process_with_duckdb()
 
-print("All processing completed.")
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the large UNICEF dataflows as Parquet + DuckDB")
+    parser.add_argument('--full', action='store_true', help="ignore the stored high-water marks and reload everything")
+    args = parser.parse_args()
+    main(full_reload=args.full)
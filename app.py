@@ -1,36 +1,33 @@
 import streamlit as st
 import pandas as pd
-import requests
 import io
 import time
 from pathlib import Path
 import json
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from APIs.unicef import african_countries
+from APIs import catalog, store
+from APIs.countries import in_africa
 from APIs.unicef_big_data import base_url as unicef_base_url
-from scraping.openAfrica2 import scrape_page_data as scrape_open_africa
-from scraping.nbs import scrape_page_data as scrape_nbs
+from scraping.openAfrica_ckan import scrape_with_fallback as scrape_open_africa
+from scraping.nbs import load_catalog as load_nbs_catalog, scrape_page_data as scrape_nbs
 from scraping.pnfa import scrape_data as scrape_pnfa
-from scraping.un_women import country_data as scrape_un_women
+from scraping.un_women import scrape_country_profiles as scrape_un_women
 from scraping.un_info import scrape_documents as scrape_un_info
 from scraping.databank_worldbank import scrape_page_data as scrape_worldbank
 from scraping.uninfoed import scrape_documents as scrape_uninfo_ed
 from scraping.africaed import scrape_un_data
 from scraping.unpop import base_url as unpop_base_url
+from APIs.unations import fetch_pages, pages_to_dataframe
+from scraping.browser import get_pool
 
 st.set_page_config(page_title="Africa Data Scraper", page_icon="🌍", layout="wide")
 
 def create_download_folder():
     Path("downloads").mkdir(exist_ok=True)
 
-def setup_selenium_driver():
-    options = Options()
-    options.add_argument("--headless")  # Run in headless mode
-    return webdriver.Chrome(options=options)
-
 def main():
+    # Starts warming the shared headless Chrome sessions on the first run of the script
+    get_pool()
     st.title("🌍 Africa Data Scraper")
     st.markdown("""
     Extract and download data related to Africa from various sources including:
@@ -51,20 +48,20 @@ def main():
         "World Bank",
         "UN Population",
         "UN Education",
-        "Custom Data"
+        "Custom Data",
+        "SQL"
     ])
 
     with tabs[0]:  # Open Africa
         st.header("Open Africa Data")
         if st.button("Scrape Open Africa Data"):
-            with st.spinner("Scraping data from Open Africa..."):
-                driver = setup_selenium_driver()
-                data = scrape_open_africa(driver)
-                driver.quit()
+            with st.spinner("Fetching data from Open Africa..."):
+                data = scrape_open_africa()
                 
                 if data:
                     df = pd.DataFrame([item.dict() for item in data])
                     st.dataframe(df)
+                    store.write_records('open_africa', df)
                     
                     csv = df.to_csv(index=False)
                     st.download_button(
@@ -78,13 +75,14 @@ def main():
         st.header("Nigerian Bureau of Statistics")
         if st.button("Scrape NBS Data"):
             with st.spinner("Scraping data from NBS..."):
-                driver = setup_selenium_driver()
-                data = scrape_nbs(driver)
-                driver.quit()
+                with get_pool().driver('nigerianstat.gov.ng') as driver:
+                    load_nbs_catalog(driver)
+                    data = scrape_nbs(driver)
                 
                 if data:
                     df = pd.DataFrame([item.dict() for item in data])
                     st.dataframe(df)
+                    store.write_records('nbs', df)
                     
                     csv = df.to_csv(index=False)
                     st.download_button(
@@ -98,13 +96,13 @@ def main():
         st.header("UN Women Data")
         if st.button("Scrape UN Women Data"):
             with st.spinner("Scraping data from UN Women..."):
-                driver = setup_selenium_driver()
-                data = scrape_un_women(driver)
-                driver.quit()
+                with get_pool().driver('data.unwomen.org') as driver:
+                    data = scrape_un_women(driver)
                 
                 if data:
                     df = pd.DataFrame(data)
                     st.dataframe(df)
+                    store.write_records('un_women', df)
                     
                     csv = df.to_csv(index=False)
                     st.download_button(
@@ -123,6 +121,7 @@ def main():
                 if data:
                     df = pd.DataFrame(data)
                     st.dataframe(df)
+                    store.write_records('un_info', df)
                     
                     csv = df.to_csv(index=False)
                     st.download_button(
@@ -136,13 +135,13 @@ def main():
         st.header("World Bank Data")
         if st.button("Scrape World Bank Data"):
             with st.spinner("Scraping data from World Bank..."):
-                driver = setup_selenium_driver()
-                data = scrape_worldbank(driver)
-                driver.quit()
+                with get_pool().driver('databank.worldbank.org') as driver:
+                    data = scrape_worldbank(driver)
                 
                 if data:
                     df = pd.DataFrame([item.dict() for item in data])
                     st.dataframe(df)
+                    store.write_records('databank', df)
                     
                     csv = df.to_csv(index=False)
                     st.download_button(
@@ -156,11 +155,11 @@ def main():
         st.header("UN Population Data")
         if st.button("Fetch UN Population Data"):
             with st.spinner("Fetching UN Population data..."):
-                response = requests.get(unpop_base_url + "/indicators/")
-                if response.status_code == 200:
-                    data = response.json()
-                    df = pd.json_normalize(data['data'])
+                pages = fetch_pages(unpop_base_url + "/indicators/")
+                df = pages_to_dataframe(pages)
+                if not df.empty:
                     st.dataframe(df)
+                    store.write_records('un_population_indicators', df)
                     
                     csv = df.to_csv(index=False)
                     st.download_button(
@@ -179,6 +178,7 @@ def main():
                 if data:
                     df = pd.DataFrame([item.dict() for item in data])
                     st.dataframe(df)
+                    store.write_records('un_data_search', df)
                     
                     csv = df.to_csv(index=False)
                     st.download_button(
@@ -198,7 +198,7 @@ def main():
             st.dataframe(df.head())
             
             if st.button("Filter for African Countries"):
-                filtered_df = df[df['Geographic area'].isin(african_countries)]
+                filtered_df = df[in_africa(df['Geographic area'])]
                 st.write("Preview of filtered data:")
                 st.dataframe(filtered_df.head())
                 
@@ -210,6 +210,28 @@ def main():
                     "text/csv"
                 )
 
+    with tabs[8]:  # SQL over the catalog
+        st.header("Query All Sources")
+        if st.button("Refresh Catalog"):
+            with st.spinner("Loading new partitions into the catalog..."):
+                added = catalog.refresh()
+            st.write({source: rows for source, rows in added.items() if rows} or "Catalog is up to date")
+
+        sql = st.text_area("SQL", "SELECT * FROM open_africa_latest LIMIT 100")
+        if st.button("Run Query"):
+            try:
+                df = catalog.query(sql)
+            except Exception as e:
+                st.error(f"Query failed: {e}")
+            else:
+                st.dataframe(df)
+                st.download_button(
+                    "Download Query Results",
+                    df.to_csv(index=False),
+                    f"query_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                    "text/csv"
+                )
+
 if __name__ == "__main__":
     create_download_folder()
     main()
\ No newline at end of file
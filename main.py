@@ -1,14 +1,15 @@
 import streamlit as st
 import pandas as pd
-import requests
-import io
 import time
 from pathlib import Path
 import json
-from APIs.unicef import african_countries
+from APIs.countries import in_africa
 from APIs.clean import filter_african_countries, main as clean_main
-from APIs.unations import fetch_data
+from APIs.unations import base_path as unpop_base_path, relative_path as unpop_relative_path, fetch_pages, pages_to_dataframe
 from APIs.unicef_big_data import base_url as unicef_base_url
+from APIs.unicef import UNICEF_MAX_PER_HOST, UNICEF_RATE, africa_url
+from APIs.fetcher import AsyncFetcher
+from APIs.http_cache import cached_get
 
 
 st.set_page_config(page_title="Africa Data Scraper", page_icon="🌍", layout="wide")
@@ -19,10 +20,14 @@ def create_download_folder():
 def fetch_unicef_data(dataset_name):
     """Fetch data from UNICEF API for a specific dataset"""
     target_url = f"UNICEF,{dataset_name},1.0/all?format=csv&labels=both"
-    response = requests.get(unicef_base_url + target_url)
+    url, _ = africa_url(unicef_base_url + target_url)
+    fetcher = AsyncFetcher(max_per_host=UNICEF_MAX_PER_HOST, rate=UNICEF_RATE, fetch=cached_get)
+    result = fetcher.fetch_all([url])[0]
+    response = result.response
     
-    if response.status_code == 200:
-        df = pd.read_csv(io.StringIO(response.text))
+    if response is not None and response.status_code == 200:
+        with response.open() as body:
+            df = pd.read_csv(body)
         return df
     return None
 
@@ -57,7 +62,7 @@ def main():
                 df = fetch_unicef_data(selected_dataset)
                 if df is not None:
                     # Filter for African countries
-                    df_africa = df[df['Geographic area'].isin(african_countries)]
+                    df_africa = df[in_africa(df['Geographic area'])]
                     
                     # Show preview
                     st.dataframe(df_africa.head())
@@ -82,19 +87,15 @@ def main():
         
         if st.button("Fetch UN Population Data"):
             progress_bar = st.progress(0)
-            all_data = []
+            pages = fetch_pages(
+                unpop_base_path + unpop_relative_path,
+                page_size=page_size,
+                max_pages=max_pages,
+                on_page=lambda done, total: progress_bar.progress(done / total),
+            )
+            df = pages_to_dataframe(pages)
             
-            for page in range(1, max_pages + 1):
-                progress_bar.progress(page / max_pages)
-                page_data = fetch_data(page, page_size)
-                
-                if page_data is None or not page_data['data']:
-                    break
-                    
-                all_data.extend(page_data['data'])
-            
-            if all_data:
-                df = pd.json_normalize(all_data)
+            if not df.empty:
                 st.dataframe(df.head())
                 
                 # Save and provide download link
@@ -120,7 +121,7 @@ def main():
             st.dataframe(df.head())
             
             if st.button("Filter for African Countries"):
-                filtered_df = df[df['Geographic area'].isin(african_countries)]
+                filtered_df = df[in_africa(df['Geographic area'])]
                 st.write("Preview of filtered data:")
                 st.dataframe(filtered_df.head())
                 
@@ -1,14 +1,17 @@
 import csv
-from datetime import datetime
 import logging
-from typing import List
+import re
+from typing import Iterator, List, Optional, Tuple
 from urllib.parse import urljoin
-from pydantic import BaseModel, AnyUrl
-from selenium import webdriver
+import lxml.html
+from pydantic import BaseModel, AnyUrl, ValidationError
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from APIs import http_client, store
+from APIs.scheduler import get_scheduler
+from scraping.browser import get_pool
 
 # Set up logging
 logging.basicConfig(
@@ -27,13 +30,119 @@ class DataItem(BaseModel):
     data_site_link: str
 
 
+SEARCH_URL = "https://data.un.org/Search.aspx?q=africa&t=Data"
+RESULTS_XPATH = '//*[@id="ctl00_main_pnlResults"]/div[2]/div[4]/div'
+NEXT_LINK_ID = "ctl00_main_results_linkNext"
+MAX_PAGES = 500
+
+
 def convert_to_absolute_url(base_url: str, relative_url: str) -> str:
     return urljoin(base_url, relative_url)
 
 
-def scrape_un_data():
-    driver = webdriver.Chrome()  # Make sure you have chromedriver installed and in PATH
-    base_url = "https://data.un.org/Search.aspx?q=africa&t=Data"
+def parse_results(document, base_url: str) -> List[DataItem]:
+    """The search hits on one results page, as the browser scraper reads them."""
+    items = []
+    for index, element in enumerate(document.xpath(RESULTS_XPATH), start=1):
+        names = element.xpath(".//h2/a")
+        if not names:
+            continue
+        sources = element.xpath("./div[1]/a")
+        sites = element.xpath("./div[1]/span/a")
+
+        def text_and_link(nodes):
+            if not nodes:
+                return "N/A", "N/A"
+            href = nodes[0].get("href")
+            return nodes[0].text_content().strip(), convert_to_absolute_url(base_url, href) if href else "N/A"
+
+        data_source, data_source_link = text_and_link(sources)
+        data_site, data_site_link = text_and_link(sites)
+        try:
+            items.append(DataItem(
+                data_name=names[0].text_content().strip(),
+                data_name_link=convert_to_absolute_url(base_url, names[0].get("href")),
+                data_source=data_source,
+                data_source_link=data_source_link,
+                data_site=data_site,
+                data_site_link=data_site_link,
+            ))
+        except ValidationError as e:
+            logger.error(f"Data validation error for item {index}: {e}")
+    return items
+
+
+def form_fields(document) -> List[Tuple[str, str]]:
+    """The (name, value) pairs a browser would post back, in document order.
+
+    That is the WebForms state (__VIEWSTATE, __EVENTVALIDATION, ...) plus every
+    enabled control: text inputs, checked checkboxes and radios ("on" without a
+    value), the selected options of each select (the first one if none is
+    selected) and textareas. Buttons are left out; the postback names its
+    target in __EVENTTARGET instead.
+    """
+    buttons = {field.get("name") for field in document.xpath("//form//input[@name]")
+               if field.get("type", "").lower() == "button"}
+    return [(name, value) for form in document.forms for name, value in form.form_values() if name not in buttons]
+
+
+def next_page_target(document, page_number: int) -> Optional[Tuple[str, str]]:
+    """The (__EVENTTARGET, __EVENTARGUMENT) of the pager link to page_number + 1, if there is one.
+
+    Pages 2-10 have numbered links (rptNav ctl01-ctl09), after that only "Next".
+    """
+    link_ids = [f"ctl00_main_results_rptNav_ctl{page_number:02d}_linkNav"] if page_number < 10 else []
+    for link_id in link_ids + [NEXT_LINK_ID]:
+        links = document.xpath(f'//a[@id="{link_id}"]')
+        if not links:
+            continue
+        match = re.search(r"__doPostBack\('([^']*)','([^']*)'\)", links[0].get("href") or "")
+        if match:
+            return match.group(1), match.group(2)
+    return None
+
+
+def iter_result_pages(url: str = SEARCH_URL, max_pages: int = MAX_PAGES) -> Iterator[List[DataItem]]:
+    """Pages through the search results with plain GET/POSTs replaying the WebForms postbacks."""
+    response = get_scheduler().run(url, http_client.get, url)
+    response.raise_for_status()
+    seen_first = set()
+    for page_number in range(1, max_pages + 1):
+        document = lxml.html.fromstring(response.content, base_url=response.url)
+        items = parse_results(document, response.url)
+        logger.info(f"Scraped {len(items)} items on page {page_number}")
+        # A postback the server didn't honour re-renders the same page; stop instead of looping
+        first = str(items[0].data_name_link) if items else None
+        if first in seen_first:
+            logger.warning(f"Page {page_number} repeats an earlier page, stopping")
+            return
+        seen_first.add(first)
+        yield items
+
+        target = next_page_target(document, page_number)
+        if target is None:
+            logger.info("No more pages to scrape")
+            return
+        event = {"__EVENTTARGET": target[0], "__EVENTARGUMENT": target[1]}
+        fields = [(name, value) for name, value in form_fields(document) if name not in event] + list(event.items())
+        forms = document.xpath("//form")
+        action = urljoin(response.url, forms[0].get("action") or response.url) if forms else response.url
+        response = get_scheduler().run(action, http_client.post, action, data=fields,
+                                       headers={"Referer": response.url})
+        response.raise_for_status()
+
+
+def scrape_un_data() -> List[DataItem]:
+    """All search results, over HTTP only."""
+    return [item for items in iter_result_pages() for item in items]
+
+
+def scrape_un_data_browser(driver=None):
+    if driver is None:
+        with get_pool().driver('data.un.org') as driver:
+            return scrape_un_data_browser(driver)
+
+    base_url = SEARCH_URL
     driver.get(base_url)
 
     results = []
@@ -130,7 +239,7 @@ def scrape_un_data():
             next_button = WebDriverWait(driver, 10).until(
                 EC.element_to_be_clickable((By.XPATH, next_page_xpath))
             )
-            next_button.click()
+            get_scheduler().run('data.un.org', next_button.click)
             page_number += 1
 
             # Wait for the page to load after clicking
@@ -139,7 +248,6 @@ def scrape_un_data():
             logger.info("No more pages to scrape")
             break
 
-    driver.quit()
     return results
 
 
@@ -163,15 +271,10 @@ def save_to_csv(data: List[DataItem], filename: str):
     logger.info(f"Data saved to {filename}")
 
 
-# Run the scraper
-logger.info("Starting the scraping process")
-data = scrape_un_data()
-
-# Generate a filename with current date and time
-current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-filename = f"un_data_africa_{current_time}.csv"
+if __name__ == "__main__":
+    logger.info("Starting the scraping process")
+    data = scrape_un_data()
 
-# Save the data to CSV
-save_to_csv(data, filename)
+    store.write_records('un_data_search', data)
 
-logger.info(f"Scraping completed. Total items scraped: {len(data)}")
+    logger.info(f"Scraping completed. Total items scraped: {len(data)}")
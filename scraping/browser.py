@@ -0,0 +1,260 @@
+import atexit
+import functools
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from APIs.scheduler import host_of
+
+logger = logging.getLogger(__name__)
+
+BROWSER_POOL_SIZE = int(os.environ.get('BROWSER_POOL_SIZE', 2))
+# Chrome's memory creeps up over long sessions, so a session is replaced after this many checkouts
+BROWSER_MAX_USES = int(os.environ.get('BROWSER_MAX_USES', 25))
+# Seconds DriverPool.driver() waits for a free session before giving up
+BROWSER_CHECKOUT_TIMEOUT = float(os.environ.get('BROWSER_CHECKOUT_TIMEOUT', 300))
+
+
+# URL patterns for Network.setBlockedURLs ('*' is a wildcard). We only ever read text and hrefs.
+IMAGES = ('*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.avif')
+FONTS = ('*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot')
+MEDIA = ('*.mp4', '*.webm', '*.mp3')
+TRACKERS = (
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*facebook.net*', '*connect.facebook.com*', '*hotjar.com*', '*clarity.ms*', '*newrelic.com*',
+    '*nr-data.net*', '*segment.io*', '*optimizely.com*', '*addthis.com*', '*sharethis.com*',
+)
+
+
+class BlockingProfile(NamedTuple):
+    blocked_urls: Tuple[str, ...]
+
+
+DEFAULT_PROFILE = BlockingProfile(IMAGES + FONTS + MEDIA + TRACKERS)
+# Heavier sites get their own extra patterns on top of the default
+PROFILES: Dict[str, BlockingProfile] = {
+    'kaggle.com': BlockingProfile(DEFAULT_PROFILE.blocked_urls + (
+        '*storage.googleapis.com/kaggle-datasets-images*',
+        '*storage.googleapis.com/kaggle-avatars*',
+        '*storage.googleapis.com/kaggle-organizations*',
+    )),
+    'pdp.unfpa.org': BlockingProfile(DEFAULT_PROFILE.blocked_urls + (
+        # ArcGIS basemap tiles behind the portal's maps
+        '*basemaps.arcgis.com*', '*services.arcgisonline.com*', '*tiles.arcgis.com*',
+        '*static.arcgis.com/fonts*', '*.pbf',
+    )),
+}
+
+
+def profile_for(site: Optional[str]) -> BlockingProfile:
+    return PROFILES.get(host_of(site), DEFAULT_PROFILE) if site else DEFAULT_PROFILE
+
+
+def apply_profile(driver, profile: BlockingProfile):
+    """Blocks the profile's URLs for everything the session loads from now on."""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(profile.blocked_urls)})
+
+
+def chrome_options(headless: bool = True, page_load_strategy: str = 'eager', performance_log: bool = False) -> Options:
+    """Options for scraping sessions.
+
+    Images are neither fetched nor decoded. 'eager' returns from driver.get()
+    at DOMContentLoaded rather than after every subresource has loaded, so
+    every scraper waits for its own content (scraping.readiness or
+    WebDriverWait) before reading the page. `performance_log` keeps the
+    DevTools Network events for scrapers that read them; chromedriver buffers
+    them otherwise, so it is off by default.
+    """
+    options = Options()
+    if headless:
+        options.add_argument('--headless=new')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--blink-settings=imagesEnabled=false')
+    options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+    options.page_load_strategy = page_load_strategy
+    if performance_log:
+        # Network events for scraping.readiness.NetworkIdle and uninfo_api's endpoint discovery
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return options
+
+
+def new_driver(headless: bool = True, site: Optional[str] = None, performance_log: bool = False,
+               **kwargs) -> webdriver.Chrome:
+    """A standalone session with the blocking profile for `site` (a URL or host) applied."""
+    driver = webdriver.Chrome(options=chrome_options(headless, performance_log=performance_log), **kwargs)
+    apply_profile(driver, profile_for(site))
+    return driver
+
+
+class _Session:
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+
+
+# Put on the idle queue when a background start fails, in place of the session
+_FAILED_START = None
+
+
+class DriverPool:
+    """Keeps up to `size` Chrome sessions warm and lends them out one caller at a time.
+
+    A session is reset between checkouts (extra tabs closed, cookies cleared,
+    back on about:blank) and quit instead of returned once it has served
+    `max_uses` checkouts, or when the caller's block failed with a
+    WebDriverException. Replacements are started in the background so the next
+    checkout doesn't pay for the start-up.
+    """
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, max_uses: int = BROWSER_MAX_USES,
+                 factory: Callable[[], webdriver.Chrome] = new_driver):
+        self.size = size
+        self.max_uses = max_uses
+        self.factory = factory
+        self._idle: "queue.LifoQueue[Optional[_Session]]" = queue.LifoQueue()
+        self._live = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _reserve(self) -> bool:
+        with self._lock:
+            if self._closed or self._live >= self.size:
+                return False
+            self._live += 1
+            return True
+
+    def _release_slot(self):
+        with self._lock:
+            self._live -= 1
+
+    def _start(self) -> _Session:
+        # Caller holds a reserved slot
+        try:
+            return _Session(self.factory())
+        except Exception:
+            self._release_slot()
+            raise
+
+    def _start_in_background(self):
+        def run():
+            try:
+                self._idle.put(self._start())
+            except Exception as e:
+                logger.error(f"Could not start a Chrome session: {e}")
+                # Its slot is free again: wake a caller waiting for this session so it can start one itself
+                self._idle.put(_FAILED_START)
+
+        if self._reserve():
+            threading.Thread(target=run, name='driver-pool-start', daemon=True).start()
+
+    def prewarm(self, count: Optional[int] = None):
+        """Starts sessions in the background until `count` (default: the pool size) exist."""
+        for _ in range(self.size if count is None else count):
+            self._start_in_background()
+
+    def _checkout(self, timeout: Optional[float]) -> _Session:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                if self._reserve():
+                    return self._start()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No browser session free within {timeout}s")
+                try:
+                    session = self._idle.get(timeout=remaining)
+                except queue.Empty:
+                    raise TimeoutError(f"No browser session free within {timeout}s") from None
+            if session is not _FAILED_START:
+                return session
+
+    def _discard(self, session: _Session):
+        try:
+            session.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting Chrome session: {e}")
+        self._release_slot()
+
+    @staticmethod
+    def _reset(driver):
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        # delete_all_cookies() only reaches the current page's domain; CDP clears every domain
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        driver.get('about:blank')
+
+    def _checkin(self, session: _Session, healthy: bool):
+        session.uses += 1
+        if healthy and session.uses < self.max_uses and not self._closed:
+            try:
+                self._reset(session.driver)
+                self._idle.put(session)
+                return
+            except Exception as e:
+                # WebDriverException, or a connection error if the caller quit the driver
+                logger.warning(f"Chrome session failed to reset, replacing it: {e}")
+        self._discard(session)
+        if not self._closed:
+            self._start_in_background()
+
+    @contextmanager
+    def driver(self, site: Optional[str] = None, timeout: Optional[float] = BROWSER_CHECKOUT_TIMEOUT):
+        """Lends a session, with the blocking profile for `site` applied, for the duration of the with-block.
+
+        Raises TimeoutError if no session is free within `timeout` seconds (None waits indefinitely).
+        """
+        session = self._checkout(timeout)
+        healthy = True
+        try:
+            apply_profile(session.driver, profile_for(site))
+            yield session.driver
+        except WebDriverException:
+            healthy = False
+            raise
+        finally:
+            self._checkin(session, healthy)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if session is not _FAILED_START:
+                self._discard(session)
+
+
+_pools: Dict[bool, DriverPool] = {}
+_pool_lock = threading.Lock()
+
+
+def get_pool(performance_log: bool = False) -> DriverPool:
+    """The process-wide pool; the first call starts warming its sessions.
+
+    Sessions that keep the performance log live in a pool of their own, so
+    the ordinary sessions don't buffer events nobody reads.
+    """
+    pool = _pools.get(performance_log)
+    if pool is None:
+        with _pool_lock:
+            pool = _pools.get(performance_log)
+            if pool is None:
+                factory = functools.partial(new_driver, performance_log=True) if performance_log else new_driver
+                pool = _pools[performance_log] = DriverPool(factory=factory)
+                pool.prewarm()
+                atexit.register(pool.close)
+    return pool
@@ -1,13 +1,17 @@
 import csv
 import requests
-import time
 import logging
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel
 from typing import List
-from selenium import webdriver
-from selenium.webdriver.common.by import By
+from scraping.extract import Field, ListingSpec, extract_models
+from scraping.snapshots import capture
+from scraping.readiness import ElementPresent, navigate
+from APIs.scheduler import get_scheduler
+from APIs import store
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from scraping.browser import new_driver
+from scraping.seen_index import SeenIndex, crawl_new
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -18,47 +22,28 @@ class ScrapedData(BaseModel):
     data_description: str 
     last_updated: str 
 
+LISTING = ListingSpec(
+    rows='//*[@id="DatabaseList"]/ul/li',
+    fields={
+        'database_name': Field('div/div/h4'),
+        'data_link': Field('div/div/h4/a', 'href'),
+        # The description divs are numbered MainContent_grdDatabases_divDescription_<n> per row
+        'data_description': Field('.//*[starts-with(@id, "MainContent_grdDatabases_divDescription_")]'),
+        'last_updated': Field('div/div/div[3]/span/em'),
+    },
+)
+
+READY = ElementPresent(LISTING.rows)
+
 def scrape_page_data(driver) -> List[ScrapedData]:
-    data_list = []
-
-    for i in range(1, 10):  # Adjust range according to the number of entries per page 
-        try:
-            database_name_xpath = f'//*[@id="DatabaseList"]/ul/li[{i}]/div/div/h4' 
-            data_link_xpath = f'//*[@id="DatabaseList"]/ul/li[{i}]/div/div/h4/a'
-            data_description_xpath = f'//*[@id="MainContent_grdDatabases_divDescription_{i}"]'
-            last_updated_xpath = f'//*[@id="DatabaseList"]/ul/li[{i}]/div/div/div[3]/span/em'
-            
-            # Extract the data
-            data_name = driver.find_element(By.XPATH, database_name_xpath).text 
-            data_link = driver.find_element(By.XPATH, data_link_xpath).get_attribute('href')
-            data_description = driver.find_element(By.XPATH, data_description_xpath).text
-            last_updated = driver.find_element(By.XPATH, last_updated_xpath).text
-           
-
-            # Validate and store the data
-            scraped_data = ScrapedData(
-                database_name=data_name,
-                data_link=data_link,
-                data_description=data_description,
-                last_updated=last_updated,
-            )
-            data_list.append(scraped_data)
-            logger.info(f"Scraped data: {scraped_data}")
-
-        except ValidationError as ve:
-            logger.error(f"Validation error: {ve}")
-        except Exception as e:
-            logger.error(f"Error while scraping data entry {i}: {e}")
-            continue
-
-    return data_list
+    capture(driver, 'databank')
+    return extract_models(driver, LISTING, ScrapedData)
 
 
 def go_to_next_page(driver, page_num: int):
     base_url = 'https://databank.worldbank.org/databases/page/'
     next_page_url = base_url + str(page_num)
-    driver.get(next_page_url)
-    time.sleep(4)
+    navigate(driver, lambda: get_scheduler().run(next_page_url, driver.get, next_page_url), READY, 'databank')
     logger.info(f"Navigated to page {page_num}")
 
 
@@ -76,25 +61,22 @@ def save_to_csv(data: List[ScrapedData], filename: str):
 if __name__ == "__main__":
 
     logging.info("Starting the Scraping Process")
-    driver = webdriver.Chrome()
+    driver = new_driver(headless=False, site='databank.worldbank.org')
     driver.get('https://databank.worldbank.org/databases/page/1')
 
     # Wait for user confirmation to start scraping
     input("Press Enter to start scraping...")
 
-    all_data = []
     total_pages = 9 # Define the number of pages you want to scrape
 
-    for page in range(1, total_pages + 1):  # Iterate through the pages
-        data_on_page = scrape_page_data(driver)
-        all_data.extend(data_on_page)
-        go_to_next_page(driver, page + 1)
-
-    driver.quit()
+    with SeenIndex() as index:
+        # The database list isn't ordered by update date, so every page is read
+        all_data = crawl_new(driver, 'databank', go_to_next_page, scrape_page_data, total_pages, index,
+                             ordered=False)
+        driver.quit()
 
-    # Save the scraped data to a CSV file
-    current_time = time.strftime("%Y%m%d_%H%M%S")
-    filename = f"data_bank_worldbank_{current_time}.csv"
-    save_to_csv(all_data, filename)
+        # Append the new and changed records to the dataset store
+        store.write_records('databank', all_data)
+        index.mark('databank', all_data)
 
     logger.info(f"Scraping completed. Total items scraped: {len(all_data)}")
@@ -1,6 +1,7 @@
 import pandas as pd 
 import csv
-import requests 
+from APIs import store
+from APIs.unations import fetch_pages, pages_to_dataframe
 
 
 # url = '/api/v1/data/indicators/{indicators}/locations/{locations}'
@@ -11,33 +12,22 @@ import requests
 def callAPI(relative_path:str, topic_list:bool = False) -> pd.DataFrame:
     base_url = "https://population.un.org/dataportalapi/api/v1" 
     target = base_url + relative_path # Query string parameters may be appended here or directly in the provided relative path
-    # Calls the API
-    response = requests.get(target)
-    # Reformats response into a JSON object
-    j = response.json()
-    # The block below will deal with paginated results.
-    # If results not paginated, this will be skipped.
-    try:
-        # If results are paginated, they are transformed into a python dictionary.
-        # The data may be accessed using the 'data' key of the dictionary.
-        df = pd.json_normalize(j['data'])
-        # As long as the nextPage key of the dictionary contains an address for the next API call, the function will continue to call the API and append the results to the dataframe.
-        while j['nextPage'] is not None:
-            response = requests.get(j['nextPage'])
-            j = response.json()
-            df_temp = pd.json_normalize(j['data'])
-            df = df.append(df_temp)
-    except:
+    # Calls the API; page 1 gives the page count and the remaining pages are fetched in parallel.
+    # Error statuses raise requests.HTTPError instead of failing on .json() of an error page
+    pages = fetch_pages(target)
+    j = pages[0]
+    if isinstance(j, dict) and 'data' in j:
+        # Paginated results: the records of every page, in page order, in one dataframe
+        df = pages_to_dataframe(pages)
+    else:
         if topic_list:
             df = pd.json_normalize(j, 'indicators')
         else:
             df = pd.DataFrame(j)
     return(df)
 
-# Uses callAPI function to get a list of locations
+# Uses callAPI function to get a list of locations (already one row per location)
 df_locations = callAPI("/locations/")
-df_normalized = pd.json_normalize(df_locations['data']) 
-df_locations = pd.concat([df_locations, df_normalized], axis=1)
 
 # Identifies ID code for Western Africa
 western_africa_id = df_locations.loc[df_locations["name"]=="Western Africa", "id"].iloc[0]
@@ -67,8 +57,8 @@ df = callAPI(f"/data/indicators/{indicator_selection_string}/locations/{country_
 df2 = df.loc[(df['variant']=="Median") & (df['category']=="All women"), ['location', "indicator", "variant","category","value"]]
 
 
-# Save the DataFrame to a CSV file
-df2.to_csv('output.csv', index=False)
+# Appends the DataFrame to the dataset store
+store.write_records('un_population_fp', df2)
 
 
 
@@ -0,0 +1,92 @@
+import csv
+import logging
+import os
+from typing import List
+import pyarrow as pa
+import pyarrow.parquet as pq
+from APIs.scheduler import get_scheduler
+from scraping.readiness import ElementPresent, RowsStable, navigate, wait_until
+from scraping.snapshots import capture
+
+logger = logging.getLogger(__name__)
+
+EXPLORER_URL = "http://data.un.org/Explorer.aspx?d=16&f=docID:337"
+FIELDS = ['Mart Name', 'Data Title', 'Data Link']
+
+# YUI 2 TreeView markup: every node is a div.ygtvitem holding its own table row and a
+# div.ygtvchildren; collapsed nodes with children have a td.ygtvtp / td.ygtvlp toggle.
+# Only class names are relied on; the generated ygtv<N> ids change between loads.
+# Clicking a toggle runs the tree's own expand handler (and its dynamic load).
+EXPAND_MARTS_SCRIPT = """
+const toggles = Array.from(document.querySelectorAll('td.ygtvtp, td.ygtvlp'))
+    .filter(td => td.closest('table').querySelector('span.martName'));
+for (const td of toggles) {
+    td.click();
+}
+return toggles.length;
+"""
+
+SERIALIZE_SCRIPT = """
+const text = el => el ? (el.innerText || el.textContent || '').trim() : '';
+const martOf = label => {
+    for (let item = label.closest('div.ygtvitem'); item; item = item.parentElement && item.parentElement.closest('div.ygtvitem')) {
+        const name = item.querySelector(':scope > table span.martName');
+        if (name) return text(name);
+    }
+    return null;
+};
+const records = [];
+for (const label of document.querySelectorAll('.ygtvlabel')) {
+    if (label.querySelector('span.martName')) continue;
+    const mart = martOf(label);
+    const title = text(label.querySelector(':scope > span'));
+    if (mart === null || !title) continue;
+    const link = label.querySelector(':scope > span a[href]');
+    records.push({'Mart Name': mart, 'Data Title': title, 'Data Link': link ? link.href : ''});
+}
+return records;
+"""
+
+
+class TreeSettled(RowsStable):
+    """RowsStable over the tree rows, plus no node still showing YUI's loading spinner."""
+
+    def __init__(self, settle: float = 0.75):
+        super().__init__("//tr[contains(concat(' ', normalize-space(@class), ' '), ' ygtvrow ')]", settle=settle)
+
+    def check(self, driver, state: dict) -> bool:
+        if driver.execute_script("return document.querySelector('td.ygtvloading') !== null;"):
+            state['count'] = None
+            return False
+        return super().check(driver, state)
+
+
+def extract_tree(driver, url: str = EXPLORER_URL) -> List[dict]:
+    """Every dataset under every mart of an Explorer tree: one script to expand, one to read."""
+    logger.info(f"Connecting to {url}")
+    navigate(driver, lambda: get_scheduler().run(url, driver.get, url), ElementPresent("//span[@class='martName']"),
+             'un_explorer')
+    expanded = driver.execute_script(EXPAND_MARTS_SCRIPT)
+    wait_until(driver, TreeSettled(), 'un_explorer')
+    capture(driver, 'un_explorer')
+    records = driver.execute_script(SERIALIZE_SCRIPT) or []
+    logger.info(f"Expanded {expanded} marts, extracted {len(records)} datasets")
+    return records
+
+
+def save_to_csv(data: List[dict], filename: str):
+    if not data:
+        logger.warning("No data to save to CSV.")
+        return
+    with open(filename, 'w', newline='', encoding='utf-8') as output_file:
+        writer = csv.DictWriter(output_file, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(data)
+    logger.info(f"Data saved to {filename}")
+
+
+def save_to_parquet(data: List[dict], filename: str):
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    table = pa.Table.from_pylist(data, schema=pa.schema([(name, pa.string()) for name in FIELDS]))
+    pq.write_table(table, filename)
+    logger.info(f"Data saved to {filename}")
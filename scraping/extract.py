@@ -0,0 +1,109 @@
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger(__name__)
+
+Model = TypeVar('Model', bound=BaseModel)
+
+
+class Field(NamedTuple):
+    xpath: str                       # relative to the row node
+    attribute: Optional[str] = None  # None reads the element's visible text
+
+
+class ListingSpec(NamedTuple):
+    """Where the records sit on a listing page: one XPath for the rows, one per field.
+
+    `postprocess(row, loaded_at)` tidies each raw row before validation, on live
+    pages and stored snapshots alike; loaded_at is when the page was loaded
+    (UTC), for text relative to it. Use a module-level function, as snapshots
+    are re-extracted in worker processes.
+    """
+    rows: str
+    fields: Dict[str, Field]
+    postprocess: Optional[Callable[[dict, datetime], dict]] = None
+
+
+# Runs in the page. Attributes are read as DOM properties first, so href/src come
+# back absolute just like WebElement.get_attribute() returns them.
+EXTRACT_SCRIPT = """
+const spec = arguments[0];
+const rows = document.evaluate(spec.rows, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+const records = [];
+for (let i = 0; i < rows.snapshotLength; i++) {
+    const row = rows.snapshotItem(i);
+    const record = {};
+    for (const [name, field] of Object.entries(spec.fields)) {
+        const node = document.evaluate(field.xpath, row, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        if (node === null) {
+            record[name] = null;
+        } else if (field.attribute === null) {
+            record[name] = (node.innerText || node.textContent || '').trim();
+        } else {
+            const value = node[field.attribute];
+            record[name] = typeof value === 'string' ? value : node.getAttribute(field.attribute);
+        }
+    }
+    records.push(record);
+}
+return records;
+"""
+
+
+def normalize_text(text: str) -> str:
+    """Spaces collapsed and trimmed per line, blank lines dropped.
+
+    Applied to live innerText (which keeps runs of whitespace in <pre>-styled
+    elements and textContent fallbacks) and to snapshot text alike, so records
+    re-extracted from snapshots match the live ones.
+    """
+    lines = (re.sub(r'\s+', ' ', line).strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def extract_rows(driver, spec: ListingSpec) -> List[dict]:
+    """Every row of the current page as a dict, in a single WebDriver round trip.
+
+    Fields that don't match inside a row come back as None.
+    """
+    payload = {
+        'rows': spec.rows,
+        'fields': {name: {'xpath': f.xpath, 'attribute': f.attribute} for name, f in spec.fields.items()},
+    }
+    rows = driver.execute_script(EXTRACT_SCRIPT, payload) or []
+    text_fields = [name for name, field in spec.fields.items() if field.attribute is None]
+    for row in rows:
+        for name in text_fields:
+            if row.get(name) is not None:
+                row[name] = normalize_text(row[name])
+    return postprocess_rows(rows, spec)
+
+
+def postprocess_rows(rows: List[dict], spec: ListingSpec, loaded_at: Optional[datetime] = None) -> List[dict]:
+    """The spec's postprocess over extracted rows; loaded_at defaults to now."""
+    if spec.postprocess is None:
+        return rows
+    loaded_at = loaded_at or datetime.now(timezone.utc)
+    return [spec.postprocess(row, loaded_at) for row in rows]
+
+
+def validate_rows(rows: List[dict], model: Type[Model]) -> List[Model]:
+    """Validates a page worth of rows, dropping (and logging once) those that don't fit the model."""
+    records, errors = [], []
+    for index, row in enumerate(rows):
+        try:
+            records.append(model(**row))
+        except ValidationError as e:
+            errors.append(f"row {index + 1}: {e.errors()[0]['loc'][0]} {e.errors()[0]['msg']}")
+    if errors:
+        logger.warning(f"Skipped {len(errors)} of {len(rows)} rows: {'; '.join(errors)}")
+    return records
+
+
+def extract_models(driver, spec: ListingSpec, model: Type[Model]) -> List[Model]:
+    records = validate_rows(extract_rows(driver, spec), model)
+    logger.info(f"Extracted {len(records)} {model.__name__} records")
+    return records
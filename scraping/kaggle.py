@@ -1,12 +1,18 @@
 import csv
-import time
 import logging
-from pydantic import BaseModel, ValidationError
-from typing import List
-from selenium import webdriver
-from selenium.webdriver.common.by import By
+import re
+from datetime import datetime, timedelta
+from pydantic import BaseModel
+from typing import List, Optional
+from scraping.extract import Field, ListingSpec, extract_models
+from scraping.snapshots import capture
+from scraping.readiness import RowsStable, navigate
+from APIs.scheduler import get_scheduler
+from APIs import store
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from scraping.browser import new_driver
+from scraping.seen_index import SeenIndex, crawl_new
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -15,52 +21,79 @@ class ScrapedData(BaseModel):
     data_name: str
     data_link: str
     last_updated: str 
+    last_updated_at: Optional[str] = None
+
+# last_updated is relative ("2 days ago") and changes daily without the dataset
+# changing, so the absolute last_updated_at is hashed instead
+SEEN_FIELDS = ('data_name', 'data_link', 'last_updated_at')
+TOOLTIP_DATE = re.compile(r'([A-Z][a-z]{2}) (\d{1,2}) (\d{4})')
+RELATIVE_TIME = re.compile(r'(a|an|\d+) (second|minute|hour|day|week|month|year)s? ago')
+
+
+def absolute_date(tooltip: Optional[str], relative: str, now: datetime) -> Optional[str]:
+    """YYYY-MM-DD of the last update, from the tooltip or else from the relative text.
+
+    Without a tooltip the date is only as precise as the text ("3 months ago"
+    gives the first of that month), so it holds still from one day to the next.
+    """
+    match = TOOLTIP_DATE.search(tooltip or '')
+    if match:
+        return datetime.strptime(' '.join(match.groups()), '%b %d %Y').strftime('%Y-%m-%d')
+    match = RELATIVE_TIME.search(relative.lower())
+    if not match:
+        return None
+    count = 1 if match.group(1) in ('a', 'an') else int(match.group(1))
+    unit = match.group(2)
+    if unit == 'year':
+        return f"{now.year - count}-01-01"
+    if unit == 'month':
+        month = now.year * 12 + now.month - 1 - count
+        return f"{month // 12}-{month % 12 + 1:02d}-01"
+    if unit == 'week':
+        day = now - timedelta(weeks=count)
+        return (day - timedelta(days=day.weekday())).strftime('%Y-%m-%d')
+    seconds = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}[unit]
+    return (now - timedelta(seconds=count * seconds)).strftime('%Y-%m-%d')
+
+
+def tidy_row(row: dict, loaded_at: datetime) -> dict:
+    row['last_updated_at'] = absolute_date(row.get('last_updated_at'), row.get('last_updated') or '', loaded_at)
+    return row
+
+
+LISTING = ListingSpec(
+    rows='//*[@id="site-content"]/div[2]/div[5]/div/div/div/ul[1]/li',
+    fields={
+        'data_name': Field('div/a/div/div[2]/div'),
+        'data_link': Field('div/a', 'href'),
+        'last_updated': Field('div/a/div/div[2]/span[1]/span'),
+        # The relative text carries the full timestamp in its tooltip
+        'last_updated_at': Field('div/a/div/div[2]/span[1]/span', 'title'),
+    },
+    postprocess=tidy_row,
+)
+
+# The dataset list renders client-side, a few cards at a time
+READY = RowsStable(LISTING.rows, settle=0.75)
+
 
 def scrape_page_data(driver) -> List[ScrapedData]:
-    data_list = []
-
-    for i in range(1, 21):  # Adjust range according to the number of entries per page 
-        try:
-            data_name_xpath = f'//*[@id="site-content"]/div[2]/div[5]/div/div/div/ul[1]/li[{i}]/div/a/div/div[2]/div' 
-            data_link_xpath = f'//*[@id="site-content"]/div[2]/div[5]/div/div/div/ul[1]/li[{i}]/div/a' 
-            last_updated_xpath = f'//*[@id="site-content"]/div[2]/div[5]/div/div/div/ul[1]/li[{i}]/div/a/div/div[2]/span[1]/span'
-            
-            # Extract the data
-            data_name = driver.find_element(By.XPATH, data_name_xpath).text 
-            data_link = driver.find_element(By.XPATH, data_link_xpath).get_attribute('href')
-            last_updated = driver.find_element(By.XPATH, last_updated_xpath).text
-           
-
-            # Validate and store the data
-            scraped_data = ScrapedData(
-                data_name=data_name,
-                data_link=data_link,
-                last_updated=last_updated,
-            )
-            data_list.append(scraped_data)
-            logger.info(f"Scraped data: {scraped_data}")
-
-        except ValidationError as ve:
-            logger.error(f"Validation error: {ve}")
-        except Exception as e:
-            logger.error(f"Error while scraping data entry {i}: {e}")
-            continue
-
-    return data_list
+    capture(driver, 'kaggle')
+    return extract_models(driver, LISTING, ScrapedData)
 
 
 def go_to_next_page(driver, page_num: int):
-    base_url = 'https://www.kaggle.com/datasets?search=africa&page='
+    # Most recently updated first, so an incremental crawl can stop early
+    base_url = 'https://www.kaggle.com/datasets?search=africa&sort=updated&page='
     next_page_url = base_url + str(page_num)
-    driver.get(next_page_url)
-    time.sleep(4)
+    navigate(driver, lambda: get_scheduler().run(next_page_url, driver.get, next_page_url), READY, 'kaggle')
     logger.info(f"Navigated to page {page_num}")
 
 
 def save_to_csv(data: List[ScrapedData], filename: str):
     with open(filename, 'w', newline='', encoding='utf-8') as output_file:
         writer = csv.DictWriter(output_file, fieldnames=[
-            'data_name', 'data_link', 'last_updated'
+            'data_name', 'data_link', 'last_updated', 'last_updated_at'
         ])
         writer.writeheader()
         for item in data:
@@ -71,25 +104,22 @@ def save_to_csv(data: List[ScrapedData], filename: str):
 if __name__ == "__main__":
 
     logging.info("Starting the Scraping Process")
-    driver = webdriver.Chrome()
-    driver.get('https://www.kaggle.com/datasets?search=africa')
+    driver = new_driver(headless=False, site='kaggle.com')
+    driver.get('https://www.kaggle.com/datasets?search=africa&sort=updated')
 
     # Wait for user confirmation to start scraping
     input("Press Enter to start scraping...")
 
-    all_data = []
     total_pages = 44 # Define the number of pages you want to scrape
 
-    for page in range(1, total_pages + 1):  # Iterate through the pages
-        data_on_page = scrape_page_data(driver)
-        all_data.extend(data_on_page)
-        go_to_next_page(driver, page + 1)
-
-    driver.quit()
+    with SeenIndex() as index:
+        # Updated datasets we already know can fill the first page ahead of new ones
+        all_data = crawl_new(driver, 'kaggle', go_to_next_page, scrape_page_data, total_pages, index,
+                             fields=SEEN_FIELDS, stop_after=2)
+        driver.quit()
 
-    # Save the scraped data to a CSV file
-    current_time = time.strftime("%Y%m%d_%H%M%S")
-    filename = f"kaggle_africa_{current_time}.csv"
-    save_to_csv(all_data, filename)
+        # Append the new records to the dataset store
+        store.write_records('kaggle', all_data)
+        index.mark('kaggle', all_data, fields=SEEN_FIELDS)
 
     logger.info(f"Scraping completed. Total items scraped: {len(all_data)}")
@@ -1,10 +1,13 @@
 import csv
-import time
 import logging
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel
 from typing import List
-from selenium import webdriver
-from selenium.webdriver.common.by import By
+from APIs import store
+from APIs.scheduler import get_scheduler
+from scraping.extract import Field, ListingSpec, extract_models
+from scraping.snapshots import capture
+from scraping.readiness import ElementPresent, navigate
+from scraping.browser import new_driver
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -16,43 +19,29 @@ class ScrapedData(BaseModel):
     created_at: str
     last_updated: str 
 
+LISTING = ListingSpec(
+    rows='//*[@id="surveys"]/div[h2]',
+    fields={
+        'data_name': Field('h2'),
+        'data_link': Field('h2/a', 'href'),
+        'data_source': Field('div[3]/div'),
+        'created_at': Field('div[4]/span[1]'),
+        'last_updated': Field('div[4]/span[2]'),
+    },
+)
+
+CATALOG_URL = 'https://nigerianstat.gov.ng/nada/index.php/catalog#_r=&collection=&country=&dtype=&from=1999&page=1&ps=100&sk=&sort_by=titl&sort_order=&to=2023&topic=&view=s&vk='
+# The survey list is filled in by the catalog's own script after DOMContentLoaded
+READY = ElementPresent(LISTING.rows)
+
+
+def load_catalog(driver):
+    navigate(driver, lambda: get_scheduler().run(CATALOG_URL, driver.get, CATALOG_URL), READY, 'nbs')
+
+
 def scrape_page_data(driver) -> List[ScrapedData]:
-    data_list = []
-
-    for i in range(3, 72):  # Adjust range according to the number of entries per page 
-        try:
-            catalog_name_xpath = f'//*[@id="surveys"]/div[{i}]/h2'   
-            data_link_xpath = f'//*[@id="surveys"]/div[{i}]/h2/a'
-            data_source_xpath = f'//*[@id="surveys"]/div[{i}]/div[3]/div' 
-            created_at_xpath = f'//*[@id="surveys"]/div[{i}]/div[4]/span[1]'
-            last_updated_xpath = f'//*[@id="surveys"]/div[{i}]/div[4]/span[2]'
-            
-            # Extract the data
-            data_name = driver.find_element(By.XPATH, catalog_name_xpath).text 
-            data_link = driver.find_element(By.XPATH, data_link_xpath).get_attribute('href')
-            data_source = driver.find_element(By.XPATH, data_source_xpath).text
-            created_at = driver.find_element(By.XPATH, created_at_xpath).text 
-            last_updated = driver.find_element(By.XPATH, last_updated_xpath).text
-           
-
-            # Validate and store the data
-            scraped_data = ScrapedData(
-                data_name=data_name,
-                data_link=data_link,
-                data_source=data_source,
-                created_at = created_at,
-                last_updated=last_updated,
-            )
-            data_list.append(scraped_data)
-            logger.info(f"Scraped data: {scraped_data}")
-
-        except ValidationError as ve:
-            logger.error(f"Validation error: {ve}")
-        except Exception as e:
-            logger.error(f"Error while scraping data entry {i}: {e}")
-            continue
-
-    return data_list
+    capture(driver, 'nbs')
+    return extract_models(driver, LISTING, ScrapedData)
 
 
 def save_to_csv(data: List[ScrapedData], filename: str):
@@ -69,8 +58,8 @@ def save_to_csv(data: List[ScrapedData], filename: str):
 if __name__ == "__main__":
 
     logging.info("Starting the Scraping Process")
-    driver = webdriver.Chrome()
-    driver.get('https://nigerianstat.gov.ng/nada/index.php/catalog#_r=&collection=&country=&dtype=&from=1999&page=1&ps=100&sk=&sort_by=titl&sort_order=&to=2023&topic=&view=s&vk=')
+    driver = new_driver(headless=False, site='nigerianstat.gov.ng')
+    load_catalog(driver)
 
     input("Press Enter to start scraping...")
 
@@ -84,9 +73,7 @@ if __name__ == "__main__":
 
     driver.quit()
 
-    # Save the scraped data to a CSV file
-    current_time = time.strftime("%Y%m%d_%H%M%S")
-    filename = f"nigeria_bureau_statistics_{current_time}.csv"
-    save_to_csv(all_data, filename)
+    # Append the scraped data to the dataset store
+    store.write_records('nbs', all_data)
 
     logger.info(f"Scraping completed. Total items scraped: {len(all_data)}")
@@ -1,12 +1,14 @@
 import csv
-import time
 import logging
 from pydantic import BaseModel, ValidationError
 from typing import List
-from selenium import webdriver
 from selenium.webdriver.common.by import By
+from APIs.scheduler import get_scheduler
+from APIs import store
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from scraping.readiness import ElementPresent, navigate
+from scraping.browser import new_driver
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -69,6 +71,8 @@ def scrape_page_data(driver) -> List[ScrapedData]:
 
     return data_list
 
+READY = ElementPresent('//*[@id="primary-datasetId"]/div/ul/li')
+
 # Function to click the next page button
 def click_next_page(driver):
     try:
@@ -76,8 +80,7 @@ def click_next_page(driver):
         next_button = WebDriverWait(driver, 10).until(
             EC.element_to_be_clickable((By.XPATH, next_page_xpath))
         )
-        next_button.click()
-        time.sleep(3)  # Wait for the next page to load
+        navigate(driver, lambda: get_scheduler().run('open.africa', next_button.click), READY, 'open_africa')
         logger.info("Navigated to the next page")
     except Exception as e:
         logger.error("Error clicking next page:", e)
@@ -98,7 +101,7 @@ def save_to_csv(data: List[ScrapedData], filename: str):
 if __name__ == "__main__":
     logger.info("Starting the scraping process")
     
-    driver = webdriver.Chrome()
+    driver = new_driver(headless=False, site='open.africa')
     driver.get('https://open.africa/dataset?q=&sort=score+desc%2C+metadata_modified+desc')
 
     # Wait for user confirmation to start scraping
@@ -113,9 +116,7 @@ if __name__ == "__main__":
 
     driver.quit()
 
-    # Save the scraped data to a CSV file
-    current_time = time.strftime("%Y%m%d_%H%M%S")
-    filename = f"scraped_open_africa_{current_time}.csv"
-    save_to_csv(all_data, filename)
+    # Append the scraped data to the dataset store
+    store.write_records('open_africa', all_data)
 
     logger.info(f"Scraping completed. Total items scraped: {len(all_data)}")
@@ -1,10 +1,16 @@
 import csv
-import time
 import logging
-from pydantic import BaseModel, ValidationError
+import re
+from datetime import datetime
+from pydantic import BaseModel
 from typing import List
-from selenium import webdriver
-from selenium.webdriver.common.by import By
+from scraping.extract import Field, ListingSpec, extract_models
+from scraping.snapshots import capture
+from scraping.readiness import ElementPresent, navigate
+from APIs.scheduler import get_scheduler
+from APIs import store
+from scraping.browser import new_driver
+from scraping.seen_index import SeenIndex, crawl_new
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -18,52 +24,67 @@ class ScrapedData(BaseModel):
     dataset_date_sourced: str
     data_file: str
 
-def scrape_page_data(driver) -> List[ScrapedData]:
-    data_list = []
+# Hashed for the seen index. The listing and the CKAN API agree on these once the
+# listing's "Updated ..." date is reduced to YYYY-MM-DD (CKAN's metadata_modified);
+# data_file and the description differ between them.
+SEEN_FIELDS = ('data_name', 'data_link', 'dataset_date_sourced')
+DATE_FORMATS = ('%B %d, %Y', '%b %d, %Y', '%d %B %Y', '%d %b %Y', '%d/%m/%Y')
+# The listing's date line: "Updated August 7, 2024 | Created August 7, 2024"
+UPDATED_DATE = re.compile(r'Updated\s+([^|]+)')
+
 
-    for i in range(1, 21): 
+def iso_date(text: str) -> str:
+    """YYYY-MM-DD for an ISO timestamp or a listing date such as "March 5, 2024"; other text as is."""
+    text = (text or '').strip()
+    match = re.match(r'\d{4}-\d{2}-\d{2}', text)
+    if match:
+        return match.group(0)
+    for date_format in DATE_FORMATS:
         try:
-            data_name_xpath = f'//*[@id="primary-datasetId"]/div/ul/li[{i}]/div/div[1]/h5'
-            data_link_xpath = f'//*[@id="primary-datasetId"]/div/ul/li[{i}]/div/div[1]/h5/a'
-            data_source_xpath = f'//*[@id="primary-datasetId"]/div/ul/li[{i}]/div/div[1]/h5/div[2]/a' 
-            data_source_link_xpath = f'//*[@id="primary-datasetId"]/div/ul/li[{i}]/div/div[1]/h5/div[2]/a'
-            data_description_xpath = f'//*[@id="primary-datasetId"]/div/ul/li[{i}]/div/div[2]/div[1]'
-            dataset_date_xpath = f'//*[@id="primary-datasetId"]/div/ul/li[{i}]/div/div[1]/h5/div[1]'
-            data_file_xpath = f'//*[@id="primary-datasetId"]/div/ul/li[{i}]/div/div[2]/div[2]/ul/li/a'
-
-            data_name = driver.find_element(By.XPATH, data_name_xpath).text 
-            data_link = driver.find_element(By.XPATH, data_link_xpath).get_attribute('href')
-            data_source = driver.find_element(By.XPATH, data_source_xpath).text
-            data_source_link = driver.find_element(By.XPATH, data_source_link_xpath).get_attribute('href')
-            data_description = driver.find_element(By.XPATH, data_description_xpath).text
-            dataset_date_sourced = driver.find_element(By.XPATH, dataset_date_xpath).text
-            data_file = driver.find_element(By.XPATH, data_file_xpath).get_attribute('href')
-
-            scraped_data = ScrapedData(
-                data_name=data_name,
-                data_link=data_link,
-                data_source=data_source,
-                data_source_link=data_source_link,
-                data_description=data_description,
-                dataset_date_sourced=dataset_date_sourced,
-                data_file=data_file
-            )
-            data_list.append(scraped_data)
-            logger.info(f"Scraped data: {scraped_data}")
-
-        except ValidationError as ve:
-            logger.error(f"Validation error: {ve}")
-        except Exception as e:
-            logger.error(f"Error while scraping data entry {i}: {e}")
+            return datetime.strptime(text, date_format).strftime('%Y-%m-%d')
+        except ValueError:
             continue
+    return text
+
+
+def updated_date(text: str) -> str:
+    """iso_date of the "Updated ..." part of a listing date line (the whole line if there is none)."""
+    match = UPDATED_DATE.search(text or '')
+    return iso_date(match.group(1) if match else text)
+
+
+def tidy_row(row: dict, loaded_at: datetime) -> dict:
+    if row.get('dataset_date_sourced') is not None:
+        row['dataset_date_sourced'] = updated_date(row['dataset_date_sourced'])
+    return row
 
-    return data_list
+
+LISTING = ListingSpec(
+    rows='//*[@id="primary-datasetId"]/div/ul/li',
+    fields={
+        # The h5 also holds the date line and the organisation; the link is the title
+        'data_name': Field('div/div[1]/h5/a'),
+        'data_link': Field('div/div[1]/h5/a', 'href'),
+        'data_source': Field('div/div[1]/h5/div[2]/a'),
+        'data_source_link': Field('div/div[1]/h5/div[2]/a', 'href'),
+        'data_description': Field('div/div[2]/div[1]'),
+        'dataset_date_sourced': Field('div/div[1]/h5/div[1]'),
+        'data_file': Field('div/div[2]/div[2]/ul/li/a', 'href'),
+    },
+    postprocess=tidy_row,
+)
+
+READY = ElementPresent(LISTING.rows)
+
+
+def scrape_page_data(driver) -> List[ScrapedData]:
+    capture(driver, 'open_africa')
+    return extract_models(driver, LISTING, ScrapedData)
 
 def go_to_next_page(driver, page_num: int):
     base_url = 'https://open.africa/dataset/?q=&sort=score+desc%2C+metadata_modified+desc&page='
     next_page_url = base_url + str(page_num)
-    driver.get(next_page_url)
-    time.sleep(3)  # Wait for the page to load
+    navigate(driver, lambda: get_scheduler().run(next_page_url, driver.get, next_page_url), READY, 'open_africa')
     logger.info(f"Navigated to page {page_num}")
 
 def save_to_csv(data: List[ScrapedData], filename: str):
@@ -80,21 +101,18 @@ def save_to_csv(data: List[ScrapedData], filename: str):
 if __name__ == "__main__":
     logger.info("Starting the scraping process")
     
-    driver = webdriver.Chrome()
+    driver = new_driver(headless=False, site='open.africa')
     driver.get('https://open.africa/dataset/?q=&sort=score+desc%2C+metadata_modified+desc&page=1')
     input("Press Enter to start scraping...")
 
-    all_data = []
     total_pages = 372
 
-    for page in range(1, total_pages + 1): 
-        data_on_page = scrape_page_data(driver)
-        all_data.extend(data_on_page)
-        go_to_next_page(driver, page + 1)
-
-    driver.quit()
-    current_time = time.strftime("%Y%m%d_%H%M%S")
-    filename = f"scraped_open_africa_{current_time}.csv"
-    save_to_csv(all_data, filename)
+    # Newest modifications first: stops at the first page with nothing new
+    with SeenIndex() as index:
+        all_data = crawl_new(driver, 'open_africa', go_to_next_page, scrape_page_data, total_pages, index,
+                             fields=SEEN_FIELDS)
+        driver.quit()
+        store.write_records('open_africa', all_data)
+        index.mark('open_africa', all_data, fields=SEEN_FIELDS)
 
     logger.info(f"Scraping completed. Total items scraped: {len(all_data)}")
@@ -0,0 +1,149 @@
+import logging
+import time
+from typing import List, Optional
+from urllib.parse import urlencode
+from pydantic import ValidationError
+from APIs import http_client, store
+from APIs.fetcher import AsyncFetcher
+from APIs.scheduler import HOST_BUDGETS, host_of
+from scraping.browser import get_pool
+from scraping.openAfrica2 import SEEN_FIELDS, ScrapedData, go_to_next_page, iso_date, scrape_page_data
+from scraping.seen_index import SeenIndex, crawl_new
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SITE_URL = 'https://open.africa'
+PACKAGE_SEARCH_URL = SITE_URL + '/api/3/action/package_search'
+# CKAN's default ckan.search.rows_max; open.africa serves 1000 datasets per call
+ROWS_PER_REQUEST = 1000
+MAX_WORKERS = 2
+# Search requests started per second: the open.africa host budget's rate
+REQUESTS_PER_SECOND = HOST_BUDGETS[host_of(SITE_URL)].rate
+LISTING_SORT = 'score desc, metadata_modified desc'
+MODIFIED_SORT = 'metadata_modified desc'
+SEEN_SOURCE = 'open_africa'
+
+
+class CKANError(Exception):
+    pass
+
+
+def search_url(start: int, rows: int = ROWS_PER_REQUEST, sort: str = LISTING_SORT) -> str:
+    # LISTING_SORT is the ordering of the Selenium crawl of /dataset/
+    return PACKAGE_SEARCH_URL + '?' + urlencode({
+        'q': '',
+        'sort': sort,
+        'rows': rows,
+        'start': start,
+    })
+
+
+def fetch_search_page(url: str) -> dict:
+    payload = http_client.get_json(url)
+    if not payload.get('success'):
+        raise CKANError(f"package_search failed: {payload.get('error')}")
+    return payload['result']
+
+
+def to_scraped_data(package: dict) -> ScrapedData:
+    organization = package.get('organization') or {}
+    resources = package.get('resources') or []
+    return ScrapedData(
+        data_name=package.get('title') or package['name'],
+        data_link=f"{SITE_URL}/dataset/{package['name']}",
+        data_source=organization.get('title') or '',
+        data_source_link=f"{SITE_URL}/organization/{organization['name']}" if organization.get('name') else '',
+        data_description=package.get('notes') or '',
+        dataset_date_sourced=iso_date(package.get('metadata_modified') or ''),
+        data_file=resources[0].get('url') or '' if resources else '',
+    )
+
+
+def fetch_datasets(max_datasets: Optional[int] = None, rows: int = ROWS_PER_REQUEST,
+                   max_workers: int = MAX_WORKERS, rate: float = REQUESTS_PER_SECOND) -> List[ScrapedData]:
+    """Every open.africa dataset as ScrapedData, read from the CKAN API in bulk.
+
+    The first call reports the total count; the remaining offsets are then
+    requested concurrently (within the open.africa host budget) and put back in
+    listing order.
+    """
+    first = fetch_search_page(search_url(0, rows))
+    total = first['count'] if max_datasets is None else min(first['count'], max_datasets)
+    logger.info(f"open.africa reports {first['count']} datasets")
+
+    pages = {0: first['results']}
+    fetcher = AsyncFetcher(max_per_host=max_workers, rate=rate, fetch=fetch_search_page)
+    offsets = {search_url(start, rows): start for start in range(rows, total, rows)}
+    for result in fetcher.iter_completed(offsets):
+        if result.error is not None:
+            raise result.error
+        pages[offsets[result.url]] = result.response['results']
+
+    return convert_packages(package for start in sorted(pages) for package in pages[start])[:total]
+
+
+def convert_packages(packages) -> List[ScrapedData]:
+    data_list = []
+    for package in packages:
+        try:
+            data_list.append(to_scraped_data(package))
+        except (ValidationError, KeyError) as e:
+            logger.error(f"Skipping dataset {package.get('name')}: {e}")
+    return data_list
+
+
+def fetch_new_datasets(index: SeenIndex, rows: int = ROWS_PER_REQUEST) -> List[ScrapedData]:
+    """Only the datasets that are new or changed since the index was last marked.
+
+    Pages are read one at a time, most recently modified first, and paging
+    stops at the first page without anything new.
+    """
+    fresh = []
+    start = 0
+    while True:
+        result = fetch_search_page(search_url(start, rows, sort=MODIFIED_SORT))
+        new = index.unseen(SEEN_SOURCE, convert_packages(result['results']), SEEN_FIELDS)
+        fresh.extend(new)
+        start += rows
+        logger.info(f"open.africa: {len(new)} new or changed in datasets {start - rows}-{start}")
+        if not new or start >= result['count']:
+            return fresh
+
+
+def scrape_with_fallback(driver=None, total_pages: int = 372, index: Optional[SeenIndex] = None) -> List[ScrapedData]:
+    """CKAN API first; drives Chrome through the listing pages only if the API is unavailable.
+
+    With a seen `index` only new or changed datasets are fetched and returned.
+    """
+    try:
+        return fetch_datasets() if index is None else fetch_new_datasets(index)
+    except Exception as e:
+        logger.error(f"CKAN API unavailable ({e}), falling back to the Selenium crawl")
+
+    if driver is None:
+        with get_pool().driver(SITE_URL) as driver:
+            return crawl_listing(driver, total_pages, index)
+    return crawl_listing(driver, total_pages, index)
+
+
+def crawl_listing(driver, total_pages: int, index: Optional[SeenIndex] = None) -> List[ScrapedData]:
+    if index is not None:
+        return crawl_new(driver, SEEN_SOURCE, go_to_next_page, scrape_page_data, total_pages, index,
+                         fields=SEEN_FIELDS)
+    all_data = []
+    for page in range(1, total_pages + 1):
+        go_to_next_page(driver, page)
+        all_data.extend(scrape_page_data(driver))
+    return all_data
+
+
+if __name__ == "__main__":
+    logger.info("Fetching open.africa datasets from the CKAN API")
+    started = time.monotonic()
+    with SeenIndex() as index:
+        all_data = scrape_with_fallback(index=index)
+        store.write_records('open_africa', all_data)
+        index.mark(SEEN_SOURCE, all_data, fields=SEEN_FIELDS)
+
+    logger.info(f"Fetched {len(all_data)} new or changed datasets in {time.monotonic() - started:.1f}s")
@@ -0,0 +1,132 @@
+import argparse
+import logging
+import multiprocessing
+import multiprocessing.util
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from APIs import store
+from scraping import databank_worldbank, kaggle, openAfrica2
+from scraping.browser import DriverPool, new_driver
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+PAGE_RETRIES = 2
+
+
+class PagedSource(NamedTuple):
+    site: str               # host, for the browser's blocking profile
+    go_to_page: Callable    # (driver, page_number) -> None
+    scrape_page: Callable   # (driver) -> List[BaseModel]
+    total_pages: int
+
+
+# Listings that can be opened directly by page number
+SOURCES: Dict[str, PagedSource] = {
+    'open_africa': PagedSource('open.africa', openAfrica2.go_to_next_page, openAfrica2.scrape_page_data, 372),
+    'kaggle': PagedSource('kaggle.com', kaggle.go_to_next_page, kaggle.scrape_page_data, 44),
+    'databank': PagedSource('databank.worldbank.org', databank_worldbank.go_to_next_page,
+                            databank_worldbank.scrape_page_data, 9),
+}
+
+# One browser per worker process, created by the pool initializer
+_driver_pool: Optional[DriverPool] = None
+
+
+def _init_worker(factory: Callable = new_driver):
+    global _driver_pool
+    _driver_pool = DriverPool(size=1, factory=factory)
+    # Worker processes leave through os._exit, which skips atexit; finalizers
+    # with an exit priority still run, so Chrome is quit along with the worker
+    multiprocessing.util.Finalize(_driver_pool, _driver_pool.close, exitpriority=10)
+
+
+def _scrape_page(source: PagedSource, page: int):
+    with _driver_pool.driver(source.site) as driver:
+        source.go_to_page(driver, page)
+        return source.scrape_page(driver)
+
+
+def crawl_pages(source_name: str, pages: Iterable[int], workers: int = DEFAULT_WORKERS,
+                retries: int = PAGE_RETRIES, source: Optional[PagedSource] = None,
+                factory: Callable = new_driver) -> List:
+    """Scrapes the given pages of a listing with `workers` browsers, each in its own process.
+
+    Records come back in page order. Each worker takes one page at a time, so
+    a page that raises can be retried on a different worker (and browser)
+    than the one it failed on, up to `retries` times before it is given up on.
+    A worker process that dies is replaced. Host budgets are enforced per
+    process, so K workers put up to K times a single crawler's load on the site.
+    """
+    source = source or SOURCES[source_name]
+    pages = list(pages)
+    results: Dict[int, List] = {}
+    failures: Counter = Counter()
+    started = time.monotonic()
+
+    context = multiprocessing.get_context('spawn')
+
+    def new_worker() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_init_worker,
+                                   initargs=(factory,))
+
+    # (page, worker it last failed on)
+    queued = deque((page, None) for page in pages)
+    running: Dict[Future, Tuple[int, int]] = {}
+    executors = [new_worker() for _ in range(workers)]
+    try:
+        while queued or running:
+            busy = {worker for _, worker in running.values()}
+            for worker in range(workers):
+                if worker in busy:
+                    continue
+                item = next((item for item in queued if item[1] != worker or workers == 1), None)
+                if item is None:
+                    continue
+                queued.remove(item)
+                running[executors[worker].submit(_scrape_page, source, item[0])] = (item[0], worker)
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                page, worker = running.pop(future)
+                try:
+                    results[page] = future.result()
+                    logger.info(f"{source_name} page {page}: {len(results[page])} records")
+                except Exception as e:
+                    if isinstance(e, BrokenProcessPool):
+                        executors[worker].shutdown(wait=False)
+                        executors[worker] = new_worker()
+                    failures[page] += 1
+                    if failures[page] > retries:
+                        logger.error(f"Giving up on {source_name} page {page} after {failures[page]} attempts: {e}")
+                        continue
+                    logger.warning(f"{source_name} page {page} failed on worker {worker} ({e}); retrying elsewhere")
+                    queued.appendleft((page, worker))
+    finally:
+        for executor in executors:
+            executor.shutdown()
+
+    missing = sorted(set(pages) - set(results))
+    if missing:
+        logger.error(f"{source_name}: {len(missing)} pages could not be scraped: {missing}")
+    logger.info(f"Crawled {len(results)} {source_name} pages with {workers} workers in "
+                f"{time.monotonic() - started:.1f}s")
+    return [record for page in sorted(results) for record in results[page]]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl a paged listing with several browsers at once.")
+    parser.add_argument('source', choices=sorted(SOURCES))
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--pages', type=int, help="Number of pages to crawl (default: the whole listing)")
+    args = parser.parse_args()
+
+    source = SOURCES[args.source]
+    all_data = crawl_pages(args.source, range(1, (args.pages or source.total_pages) + 1), workers=args.workers)
+
+    store.write_records(args.source, all_data)
+    logger.info(f"Scraping completed. Total items scraped: {len(all_data)}")
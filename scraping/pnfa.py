@@ -1,12 +1,12 @@
 import csv
-import time
 import logging
 from pydantic import BaseModel, validator, ValidationError
 from typing import List
-from selenium import webdriver
+from APIs import store
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from scraping.browser import new_driver
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -65,7 +65,7 @@ def save_to_csv(data: List[ScrapedData], filename: str):
 
 if __name__ == "__main__":
     logger.info("Starting the scraping process")
-    driver = webdriver.Chrome()
+    driver = new_driver(headless=False, site='pdp.unfpa.org')
     driver.get('https://pdp.unfpa.org/?data_id=dataSource_8-3%3A6%2B7%2B8%2CdataSource_8-2%3A7%2B6%2B1%2B4%2B5%2B2%2B3%2B8%2B32%2B31%2B26%2B28%2CdataSource_8-0%3A386&page=Data')
     input("Press Enter to start scraping...")
     all_data = []
@@ -80,8 +80,6 @@ if __name__ == "__main__":
 
     driver.quit()
 
-    current_time = time.strftime("%Y%m%d_%H%M%S")
-    filename = f"population_data_portal_{current_time}.csv"
-    save_to_csv(all_data, filename)
+    store.write_records('pnfa', all_data)
 
     logger.info(f"Scraping completed. Total items scraped: {len(all_data)}")
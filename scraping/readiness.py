@@ -0,0 +1,190 @@
+import csv
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+READY_TIMEOUT = 20.0
+POLL_INTERVAL = 0.1
+# Every wait is appended here (time, source, url, seconds, timed_out) so load times can be compared across runs
+PAGE_WAIT_LOG = os.environ.get('PAGE_WAIT_LOG', os.path.join('cache', 'page_waits.csv'))
+
+# Set on the old document before navigating; its absence means the new page has replaced it
+_MARKER_SET = "window.__readinessMarker = true;"
+_NEW_DOCUMENT = "return window.__readinessMarker === undefined && document.readyState !== 'loading';"
+
+
+class ElementPresent:
+    """Ready once the XPath matches something."""
+
+    def __init__(self, xpath: str):
+        self.xpath = xpath
+
+    def start(self, driver) -> dict:
+        return {}
+
+    def check(self, driver, state: dict) -> bool:
+        return driver.execute_script(
+            "return document.evaluate(arguments[0], document, null,"
+            " XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue !== null;",
+            self.xpath,
+        )
+
+
+class RowsStable:
+    """Ready once at least `min_rows` rows match and the count hasn't changed for `settle` seconds.
+
+    For listings that render client-side and fill in over several frames.
+    """
+
+    def __init__(self, xpath: str, settle: float = 0.5, min_rows: int = 1):
+        self.xpath = xpath
+        self.settle = settle
+        self.min_rows = min_rows
+
+    def start(self, driver) -> dict:
+        return {'count': None, 'since': time.monotonic()}
+
+    def check(self, driver, state: dict) -> bool:
+        count = driver.execute_script(
+            "return document.evaluate(arguments[0], document, null,"
+            " XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null).snapshotLength;",
+            self.xpath,
+        )
+        now = time.monotonic()
+        if count != state['count']:
+            state['count'], state['since'] = count, now
+            return False
+        return count >= self.min_rows and now - state['since'] >= self.settle
+
+
+class NetworkIdle:
+    """Ready once no request has been in flight for `idle` seconds.
+
+    Reads the DevTools Network events from Chrome's performance log, so the
+    session must be started with goog:loggingPrefs performance=ALL
+    (chrome_options(performance_log=True), or get_pool(performance_log=True)).
+    """
+
+    def __init__(self, idle: float = 0.5):
+        self.idle = idle
+
+    def start(self, driver) -> dict:
+        driver.get_log('performance')  # drop events from before this wait
+        return {'in_flight': set(), 'last_activity': time.monotonic()}
+
+    def check(self, driver, state: dict) -> bool:
+        for entry in driver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            method = message.get('method', '')
+            request_id = message.get('params', {}).get('requestId')
+            if method == 'Network.requestWillBeSent':
+                state['in_flight'].add(request_id)
+            elif method in ('Network.loadingFinished', 'Network.loadingFailed'):
+                state['in_flight'].discard(request_id)
+            else:
+                continue
+            state['last_activity'] = time.monotonic()
+        return not state['in_flight'] and time.monotonic() - state['last_activity'] >= self.idle
+
+
+_waits: Dict[str, List[float]] = defaultdict(list)
+_timeouts: Dict[str, int] = defaultdict(int)
+_waits_lock = threading.Lock()
+
+
+def _record(source: str, url: str, seconds: float, timed_out: bool):
+    with _waits_lock:
+        _waits[source].append(seconds)
+        if timed_out:
+            _timeouts[source] += 1
+        try:
+            os.makedirs(os.path.dirname(PAGE_WAIT_LOG) or '.', exist_ok=True)
+            with open(PAGE_WAIT_LOG, 'a', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerow([time.strftime('%Y-%m-%dT%H:%M:%S'), source, url, f"{seconds:.3f}", int(timed_out)])
+        except OSError as e:
+            logger.debug(f"Could not append to {PAGE_WAIT_LOG}: {e}")
+
+
+def _poll(driver, condition, state: dict, source: str, started: float, timeout: float, new_document: bool) -> float:
+    deadline = started + timeout
+    ready = False
+    while True:
+        try:
+            ready = (not new_document or driver.execute_script(_NEW_DOCUMENT)) and condition.check(driver, state)
+        except Exception as e:
+            # The old document can go away between the two scripts; try again on the next poll
+            logger.debug(f"Readiness check failed: {e}")
+        if ready or time.monotonic() >= deadline:
+            break
+        time.sleep(POLL_INTERVAL)
+
+    seconds = time.monotonic() - started
+    url = driver.current_url
+    if not ready:
+        logger.warning(f"{source}: {url} not ready after {timeout:.0f}s, continuing")
+    _record(source, url, seconds, not ready)
+    return seconds
+
+
+def navigate(driver, go: Callable[[], None], condition, source: str, timeout: float = READY_TIMEOUT) -> float:
+    """Runs `go` (driver.get, a click, ...) and returns as soon as the new page satisfies `condition`.
+
+    Returns the seconds spent; on timeout a warning is logged and the caller
+    carries on with whatever has loaded, as the fixed sleeps did.
+    """
+    driver.execute_script(_MARKER_SET)
+    state = condition.start(driver)
+    started = time.monotonic()
+    go()
+    return _poll(driver, condition, state, source, started, timeout, new_document=True)
+
+
+def wait_until(driver, condition, source: str, timeout: float = READY_TIMEOUT) -> float:
+    """navigate() for in-page updates (expanding a tree, an XHR refresh) that don't load a new document."""
+    state = condition.start(driver)
+    return _poll(driver, condition, state, source, time.monotonic(), timeout, new_document=False)
+
+
+def _summarize(waits: Dict[str, List[float]], timeouts: Dict[str, int]) -> Dict[str, dict]:
+    summary = {}
+    for source, times in waits.items():
+        ordered = sorted(times)
+        summary[source] = {
+            'pages': len(ordered),
+            'timeouts': timeouts.get(source, 0),
+            'median': statistics.median(ordered),
+            'p90': ordered[int(0.9 * (len(ordered) - 1))],
+            'max': ordered[-1],
+            'total': sum(ordered),
+        }
+    return summary
+
+
+def wait_summary() -> Dict[str, dict]:
+    """Per-source page-load distribution for the waits made in this process."""
+    with _waits_lock:
+        return _summarize(_waits, _timeouts)
+
+
+def logged_wait_summary(path: str = PAGE_WAIT_LOG) -> Dict[str, dict]:
+    """The same distribution over everything in PAGE_WAIT_LOG, across runs and worker processes."""
+    waits: Dict[str, List[float]] = defaultdict(list)
+    timeouts: Dict[str, int] = defaultdict(int)
+    with open(path, newline='', encoding='utf-8') as f:
+        for _, source, _, seconds, timed_out in csv.reader(f):
+            waits[source].append(float(seconds))
+            timeouts[source] += int(timed_out)
+    return _summarize(waits, timeouts)
+
+
+if __name__ == "__main__":
+    for source, stats in logged_wait_summary().items():
+        print(f"{source:15} pages={stats['pages']:<6} timeouts={stats['timeouts']:<4} median={stats['median']:.2f}s "
+              f"p90={stats['p90']:.2f}s max={stats['max']:.2f}s total={stats['total']:.0f}s")
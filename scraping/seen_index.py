@@ -0,0 +1,113 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Callable, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# What earlier runs emitted, per source: data_link -> hash of the record's fields
+SEEN_INDEX_DB = os.environ.get('SEEN_INDEX_DB', os.path.join('cache', 'seen_index.db'))
+KEY_FIELD = 'data_link'
+
+
+def _as_dict(record) -> dict:
+    return record.dict() if hasattr(record, 'dict') else dict(record)
+
+
+def content_hash(record, fields: Optional[Sequence[str]] = None) -> str:
+    """SHA-1 of a record's fields (all of them, or `fields`) in a stable encoding."""
+    values = _as_dict(record)
+    if fields is not None:
+        values = {name: values.get(name) for name in fields}
+    encoded = json.dumps(values, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+class SeenIndex:
+    """A sqlite index of the records each source has already emitted.
+
+    Records are matched on data_link; a known link whose content hash differs
+    counts as changed. mark() only after the records have been stored, so a
+    crawl that dies halfway doesn't hide its records from the next run.
+    """
+
+    def __init__(self, path: str = SEEN_INDEX_DB):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.con = sqlite3.connect(path)
+        self.con.execute("""
+            CREATE TABLE IF NOT EXISTS seen (
+                source TEXT NOT NULL,
+                data_link TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_changed TEXT NOT NULL,
+                PRIMARY KEY (source, data_link)
+            )
+        """)
+
+    def close(self):
+        self.con.close()
+
+    def __enter__(self) -> 'SeenIndex':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def count(self, source: str) -> int:
+        return self.con.execute("SELECT COUNT(*) FROM seen WHERE source = ?", (source,)).fetchone()[0]
+
+    def unseen(self, source: str, records: Iterable, fields: Optional[Sequence[str]] = None) -> List:
+        """The records that are new to `source` or whose content changed since they were marked."""
+        records = list(records)
+        links = [_as_dict(record)[KEY_FIELD] for record in records]
+        known = {}
+        # Stay under sqlite's bound-parameter limit
+        for i in range(0, len(links), 500):
+            chunk = links[i:i + 500]
+            known.update(self.con.execute(
+                f"SELECT data_link, content_hash FROM seen WHERE source = ? AND data_link IN "
+                f"({', '.join('?' * len(chunk))})", [source, *chunk]).fetchall())
+        return [record for record, link in zip(records, links) if known.get(link) != content_hash(record, fields)]
+
+    def mark(self, source: str, records: Iterable, fields: Optional[Sequence[str]] = None):
+        now = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        with self.con:
+            self.con.executemany("""
+                INSERT INTO seen (source, data_link, content_hash, first_seen, last_changed) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (source, data_link) DO UPDATE SET
+                    content_hash = excluded.content_hash, last_changed = excluded.last_changed
+                WHERE content_hash != excluded.content_hash
+            """, [(source, _as_dict(record)[KEY_FIELD], content_hash(record, fields), now, now) for record in records])
+
+
+def crawl_new(driver, source: str, go_to_page: Callable, scrape_page: Callable, total_pages: int, index: SeenIndex,
+              fields: Optional[Sequence[str]] = None, ordered: bool = True, stop_after: int = 1) -> List:
+    """Crawls a listing and returns only its new or changed records.
+
+    For a listing ordered by modification time (`ordered`), the crawl stops
+    once `stop_after` pages in a row held nothing new; otherwise every page is
+    read and just the output is filtered. The caller marks the records in the
+    index once they're stored.
+    """
+    fresh, emitted = [], set()
+    quiet_pages = 0
+    for page in range(1, total_pages + 1):
+        go_to_page(driver, page)
+        records = scrape_page(driver)
+        if not records:
+            logger.info(f"{source}: page {page} is empty, stopping")
+            break
+        new = [record for record in index.unseen(source, records, fields)
+               if _as_dict(record)[KEY_FIELD] not in emitted]
+        emitted.update(_as_dict(record)[KEY_FIELD] for record in new)
+        fresh.extend(new)
+        logger.info(f"{source}: page {page} has {len(new)} new or changed of {len(records)} records")
+        quiet_pages = 0 if new else quiet_pages + 1
+        if ordered and quiet_pages >= stop_after:
+            logger.info(f"{source}: nothing new for {quiet_pages} page(s), stopping at page {page} of {total_pages}")
+            break
+    return fresh
@@ -0,0 +1,190 @@
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+import lxml.html
+from scraping.extract import ListingSpec, normalize_text, postprocess_rows, validate_rows
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', os.path.join('cache', 'snapshots'))
+# Set CAPTURE_SNAPSHOTS=1 to store every page the listing scrapers extract from
+CAPTURE_SNAPSHOTS = os.environ.get('CAPTURE_SNAPSHOTS', '') not in ('', '0')
+CAPTURED_AT_FORMAT = '%Y%m%dT%H%M%S.%fZ'
+
+
+class Snapshot(NamedTuple):
+    source: str
+    url: str
+    captured_at: str
+    path: str
+
+
+def captured_time(snapshot: Snapshot) -> datetime:
+    return datetime.strptime(snapshot.captured_at, CAPTURED_AT_FORMAT).replace(tzinfo=timezone.utc)
+
+
+def _index_path(source: str) -> str:
+    return os.path.join(SNAPSHOT_DIR, source, 'index.jsonl')
+
+
+def save_snapshot(source: str, url: str, html: str) -> Snapshot:
+    """Stores a rendered page gzip-compressed under SNAPSHOT_DIR/<source>/ and indexes it."""
+    captured_at = datetime.now(timezone.utc).strftime(CAPTURED_AT_FORMAT)
+    name = f"{captured_at}_{hashlib.sha1(url.encode()).hexdigest()[:16]}.html.gz"
+    directory = os.path.join(SNAPSHOT_DIR, source)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=6) as f:
+        f.write(html)
+    # One short line per append, so parallel crawl workers can share the index
+    with open(_index_path(source), 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'url': url, 'captured_at': captured_at, 'file': name}) + '\n')
+    return Snapshot(source, url, captured_at, path)
+
+
+def capture(driver, source: str) -> Optional[Snapshot]:
+    """Snapshots the driver's current page when capture mode is on."""
+    if not CAPTURE_SNAPSHOTS:
+        return None
+    try:
+        return save_snapshot(source, driver.current_url, driver.page_source)
+    except OSError as e:
+        logger.warning(f"Could not store snapshot for {source}: {e}")
+        return None
+
+
+def list_snapshots(source: str, since: Optional[str] = None, latest_only: bool = True) -> List[Snapshot]:
+    """Indexed snapshots of a source in capture order.
+
+    `since` is a captured_at prefix such as '20240601'; `latest_only` keeps one
+    snapshot per URL, the most recent.
+    """
+    snapshots = []
+    with open(_index_path(source), encoding='utf-8') as f:
+        for line in f:
+            entry = json.loads(line)
+            if since and entry['captured_at'] < since:
+                continue
+            snapshots.append(Snapshot(source, entry['url'], entry['captured_at'],
+                                      os.path.join(SNAPSHOT_DIR, source, entry['file'])))
+    if latest_only:
+        latest = {snapshot.url: snapshot for snapshot in snapshots}
+        snapshots = [snapshot for snapshot in snapshots if latest[snapshot.url] is snapshot]
+    return snapshots
+
+
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'fieldset', 'figcaption',
+    'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav',
+    'ol', 'p', 'pre', 'section', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'ul',
+}
+SKIP_TAGS = {'script', 'style', 'noscript', 'template'}
+WHITESPACE = re.compile(r'\s+')
+
+
+def _walk_text(node, parts: List[str], preformatted: bool = False):
+    # Source line breaks are only spaces outside <pre>, as in the rendered page
+    preformatted = preformatted or node.tag == 'pre'
+    space = (lambda text: text) if preformatted else (lambda text: WHITESPACE.sub(' ', text))
+    block = node.tag in BLOCK_TAGS
+    if block:
+        parts.append('\n')
+    if node.text and node.tag not in SKIP_TAGS:
+        parts.append(space(node.text))
+    for child in node:
+        if isinstance(child.tag, str):
+            _walk_text(child, parts, preformatted)
+        if child.tail:
+            parts.append(space(child.tail))
+    if block:
+        parts.append('\n')
+
+
+def inner_text(node) -> str:
+    """Close to the browser's innerText: block elements on their own lines, then normalize_text."""
+    if isinstance(node, str):
+        text = node
+    else:
+        parts: List[str] = []
+        _walk_text(node, parts)
+        text = ''.join(parts)
+    return normalize_text(text)
+
+
+def extract_rows_html(html: str, spec: ListingSpec, base_url: str,
+                      loaded_at: Optional[datetime] = None) -> List[dict]:
+    """extract.extract_rows over stored HTML with lxml instead of a live page.
+
+    `loaded_at` (the capture time) is what the spec's postprocess sees as now.
+    """
+    document = lxml.html.fromstring(html)
+    document.make_links_absolute(base_url, resolve_base_href=True)
+    records = []
+    for row in document.xpath(spec.rows):
+        record = {}
+        for name, field in spec.fields.items():
+            nodes = row.xpath(field.xpath)
+            if not nodes:
+                record[name] = None
+            elif field.attribute is None:
+                record[name] = inner_text(nodes[0])
+            else:
+                record[name] = nodes[0].get(field.attribute) if hasattr(nodes[0], 'get') else None
+        records.append(record)
+    return postprocess_rows(records, spec, loaded_at)
+
+
+def _extract_snapshot(args: Tuple[Snapshot, ListingSpec]) -> List[dict]:
+    snapshot, spec = args
+    with gzip.open(snapshot.path, 'rt', encoding='utf-8') as f:
+        return extract_rows_html(f.read(), spec, snapshot.url, captured_time(snapshot))
+
+
+def reextract(snapshots: Iterable[Snapshot], spec: ListingSpec, model, workers: Optional[int] = None) -> List:
+    """Runs a listing spec over stored snapshots on all cores and validates the rows, in snapshot order."""
+    snapshots = list(snapshots)
+    started = time.monotonic()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pages = list(executor.map(_extract_snapshot, ((s, spec) for s in snapshots),
+                                  chunksize=max(1, len(snapshots) // (4 * (os.cpu_count() or 1)))))
+    elapsed = time.monotonic() - started
+    records = validate_rows([row for rows in pages for row in rows], model)
+    logger.info(f"Re-extracted {len(records)} records from {len(snapshots)} snapshots in {elapsed:.2f}s "
+                f"({len(snapshots) / elapsed if elapsed else 0:.0f} pages/s)")
+    return records
+
+
+def _sources():
+    # Imported here: the scrapers import this module for capture()
+    from scraping import databank_worldbank, kaggle, nbs, openAfrica2
+    return {
+        'open_africa': openAfrica2,
+        'kaggle': kaggle,
+        'databank': databank_worldbank,
+        'nbs': nbs,
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sources = _sources()
+    parser = argparse.ArgumentParser(description="Re-run a source's extraction over its stored page snapshots.")
+    parser.add_argument('source', choices=sorted(sources))
+    parser.add_argument('--since', help="Only snapshots captured at or after this timestamp prefix, e.g. 20240601")
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--output', help="CSV file to write the records to")
+    args = parser.parse_args()
+
+    module = sources[args.source]
+    records = reextract(list_snapshots(args.source, since=args.since), module.LISTING, module.ScrapedData,
+                        workers=args.workers)
+    if args.output:
+        module.save_to_csv(records, args.output)
@@ -1,34 +1,33 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-import pandas as pd
+from APIs import store
+from APIs.scheduler import get_scheduler
+from scraping.browser import get_pool
+from scraping.extract import Field, ListingSpec, extract_rows
+from scraping.readiness import ElementPresent, navigate
 
+COUNTRIES_URL = "https://data.unwomen.org/countries"
 
-driver = webdriver.Chrome() 
-driver.get("https://data.unwomen.org/countries")
+LISTING = ListingSpec(
+    rows='//*[@id="block-unwomen-content"]/div[2]/div/div[1]/div/div[a]',
+    fields={
+        "Country Name": Field('a'),
+        "Country Link": Field('a', 'href'),
+    },
+)
 
+READY = ElementPresent(LISTING.rows)
 
-country_data = []
 
-for i in range(1, 61):
-    try:
-        country_xpath = f'//*[@id="block-unwomen-content"]/div[2]/div/div[1]/div/div[{i}]/a'
-        country_element = driver.find_element(By.XPATH, country_xpath)
-        
-        country_name = country_element.text
-        country_link = country_element.get_attribute('href')
-        
-        
-        country_data.append({"Country Name": country_name, "Country Link": country_link})
-    
-    except Exception as e:
-        print(f"Could not retrieve data for div[{i}]: {e}")
+def scrape_country_profiles(driver=None):
+    if driver is None:
+        with get_pool().driver(COUNTRIES_URL) as driver:
+            return scrape_country_profiles(driver)
 
-driver.quit()
+    navigate(driver, lambda: get_scheduler().run(COUNTRIES_URL, driver.get, COUNTRIES_URL), READY, 'un_women')
+    return extract_rows(driver, LISTING)
 
-df = pd.DataFrame(country_data)
 
+if __name__ == "__main__":
+    country_data = scrape_country_profiles()
 
-save_file = f"un_women_country_profiles.csv"
-df.to_csv(save_file, index=False)
-
-print(f"{save_file} is saved successfully")
+    rows = store.write_records('un_women', country_data)
+    print(f"Stored {rows} UN Women country profiles")
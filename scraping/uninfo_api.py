@@ -0,0 +1,218 @@
+import json
+import logging
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from APIs import http_client
+from APIs.countries import is_african as is_african_country
+from APIs.scheduler import get_scheduler
+from scraping.browser import get_pool
+
+logger = logging.getLogger(__name__)
+
+DOCUMENTS_URL = "https://uninfo.org/documents"
+MAX_PAGE_SIZE = 1000
+DISCOVERY_TIMEOUT = 30.0
+DISCOVERY_IDLE = 1.0
+
+# The document types uninfoed.py used to check for in the filter panel
+DOCUMENT_TYPES = (
+    "Cooperation Framework",
+    "Country plans for MCO settings",
+    "Management response for UNDAF/Cooperation Framework Evaluation",
+    "UN Country Results Report",
+    "UNDAF/Cooperation Framework Evaluation",
+    "Regional CF",
+    "Multiyear funding framework",
+)
+
+PAGE_PARAMS = ('page', 'pageNumber', 'page_number', 'pageIndex')
+SIZE_PARAMS = ('limit', 'perPage', 'per_page', 'pageSize', 'page_size', 'size', 'take')
+OFFSET_PARAMS = ('offset', 'skip', 'start')
+TOTAL_KEYS = ('total', 'totalCount', 'total_count', 'count', 'totalItems')
+RECORD_KEYS = ('data', 'results', 'items', 'documents', 'rows', 'records')
+
+
+class DocumentsEndpoint(NamedTuple):
+    url: str
+    method: str
+    headers: Dict[str, str]
+    body: Optional[dict]
+
+
+def find_records(payload) -> Optional[List[dict]]:
+    """The list of row objects in a JSON response, wherever the API nests it."""
+    if isinstance(payload, list):
+        return payload if all(isinstance(item, dict) for item in payload) else None
+    if isinstance(payload, dict):
+        for key in RECORD_KEYS:
+            if key in payload:
+                found = find_records(payload[key])
+                if found is not None:
+                    return found
+    return None
+
+
+def find_total(payload) -> Optional[int]:
+    if isinstance(payload, dict):
+        for key in TOTAL_KEYS:
+            if isinstance(payload.get(key), int):
+                return payload[key]
+        for value in payload.values():
+            if isinstance(value, dict):
+                total = find_total(value)
+                if total is not None:
+                    return total
+    return None
+
+
+def discover_endpoint(driver) -> DocumentsEndpoint:
+    """Loads the documents page and picks out the XHR/fetch call that returns its rows.
+
+    Reads Network events from the performance log (get_pool(performance_log=True) sessions)
+    and asks DevTools for the candidate response bodies.
+    """
+    driver.get_log('performance')
+    driver.execute_cdp_cmd('Network.enable', {})
+    get_scheduler().run(DOCUMENTS_URL, driver.get, DOCUMENTS_URL)
+
+    requests, candidates = {}, []
+    deadline = time.monotonic() + DISCOVERY_TIMEOUT
+    last_activity = time.monotonic()
+    while time.monotonic() < deadline:
+        for entry in driver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            method, params = message.get('method'), message.get('params', {})
+            if method == 'Network.requestWillBeSent':
+                requests[params['requestId']] = params['request']
+            elif (method == 'Network.responseReceived' and params.get('type') in ('XHR', 'Fetch')
+                  and 'json' in params['response'].get('mimeType', '')):
+                candidates.append(params['requestId'])
+            elif method == 'Network.loadingFinished':
+                last_activity = time.monotonic()
+        if candidates and time.monotonic() - last_activity >= DISCOVERY_IDLE:
+            break
+        time.sleep(0.2)
+
+    best, best_rows = None, 0
+    for request_id in candidates:
+        request = requests.get(request_id)
+        if request is None:
+            continue
+        try:
+            body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+            rows = find_records(json.loads(body['body']))
+        except Exception as e:
+            logger.debug(f"Skipping {request['url']}: {e}")
+            continue
+        # The documents call is the one returning the most row objects
+        if rows and len(rows) > best_rows:
+            best, best_rows = request, len(rows)
+    if best is None:
+        raise RuntimeError(f"No JSON document listing found among {len(candidates)} XHR responses")
+
+    headers = {k: v for k, v in best.get('headers', {}).items()
+               if not k.startswith(':') and k.lower() not in ('content-length', 'host', 'accept-encoding')}
+    body = json.loads(best['postData']) if best.get('postData') else None
+    logger.info(f"Documents endpoint: {best['method']} {best['url']} ({best_rows} rows on first load)")
+    return DocumentsEndpoint(best['url'], best['method'], headers, body)
+
+
+def _paging_keys(values: dict):
+    return (next((k for k in SIZE_PARAMS if k in values), None),
+            next((k for k in PAGE_PARAMS if k in values), None),
+            next((k for k in OFFSET_PARAMS if k in values), None))
+
+
+def _with_paging(values: dict, page: int, offset: int, page_size: int) -> dict:
+    values = dict(values)
+    size_key, page_key, offset_key = _paging_keys(values)
+    if size_key:
+        values[size_key] = page_size
+    if page_key:
+        # Keep the API's own numbering base (0 or 1)
+        values[page_key] = int(values[page_key]) + page if str(values[page_key]).isdigit() else page + 1
+    elif offset_key:
+        values[offset_key] = offset
+    return values
+
+
+def iter_document_pages(endpoint: DocumentsEndpoint, page_size: int = MAX_PAGE_SIZE) -> Iterator[List[dict]]:
+    """Pages through the endpoint at `page_size` rows per call until it runs dry.
+
+    An endpoint without page or offset parameters is taken to return everything at once.
+    """
+    parts = urlsplit(endpoint.url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    _, page_key, offset_key = _paging_keys(endpoint.body if endpoint.body is not None else query)
+    fetched, page = 0, 0
+    while True:
+        if endpoint.body is not None:
+            url, body = endpoint.url, _with_paging(endpoint.body, page, fetched, page_size)
+        else:
+            url = urlunsplit(parts._replace(query=urlencode(_with_paging(query, page, fetched, page_size))))
+            body = None
+        response = get_scheduler().run(
+            url, http_client.request, endpoint.method, url, headers=endpoint.headers, json=body
+        )
+        response.raise_for_status()
+        payload = response.json()
+        rows = find_records(payload) or []
+        if not rows:
+            return
+        yield rows
+        fetched += len(rows)
+        total = find_total(payload)
+        logger.info(f"uninfo.org documents: {fetched}{f'/{total}' if total else ''}")
+        if not (page_key or offset_key) or (total is not None and fetched >= total):
+            return
+        page += 1
+
+
+def _first(record: dict, *keys) -> str:
+    for key in keys:
+        value = record.get(key)
+        if isinstance(value, dict):
+            value = value.get('name') or value.get('title')
+        if value:
+            return str(value)
+    return ''
+
+
+def to_document_row(record: dict) -> dict:
+    """One API record in the column layout of the table scrapers' CSVs."""
+    link = _first(record, 'url', 'link', 'fileUrl', 'file_url', 'downloadUrl', 'file')
+    return {
+        'Country': _first(record, 'country', 'countryName', 'country_name', 'entity', 'location'),
+        'Data_Name': _first(record, 'title', 'name', 'documentName'),
+        'Data_Description': _first(record, 'description', 'documentType', 'document_type', 'type', 'category'),
+        'Data_Link': _first(record, 'fileName', 'file_name', 'filename') or link,
+        'link': link,
+    }
+
+
+def is_african(record: dict, row: dict) -> bool:
+    region = _first(record, 'region', 'regionName', 'region_name')
+    return region.casefold() == 'africa' or is_african_country(row['Country'])
+
+
+def fetch_documents(document_types: Optional[tuple] = None, driver=None) -> List[dict]:
+    """African uninfo.org documents as bulk JSON, optionally limited to `document_types`."""
+    if driver is None:
+        with get_pool(performance_log=True).driver(DOCUMENTS_URL) as driver:
+            endpoint = discover_endpoint(driver)
+    else:
+        endpoint = discover_endpoint(driver)
+
+    wanted = {t.casefold() for t in document_types} if document_types else None
+    results = []
+    for records in iter_document_pages(endpoint):
+        for record in records:
+            row = to_document_row(record)
+            if not is_african(record, row):
+                continue
+            if wanted and row['Data_Description'].casefold() not in wanted:
+                continue
+            results.append(row)
+    logger.info(f"Fetched {len(results)} African documents from uninfo.org")
+    return results
@@ -1,13 +1,15 @@
 import csv
 import time
-from datetime import datetime
 import logging
 from typing import List
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from APIs import store
+from APIs.scheduler import get_scheduler
+from scraping.browser import get_pool
+from scraping.uninfo_api import DOCUMENT_TYPES, fetch_documents
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -18,10 +20,6 @@ def setup_filters_and_pagination(driver):
     base_url = "https://uninfo.org/documents"
     driver.get(base_url)
     
-    options = webdriver.ChromeOptions()
-    options.page_load_strategy = 'normal'  # 'normal', 'eager', 'none'
-    driver = webdriver.Chrome(options=options)
-
     time.sleep(5)
 
     driver.save_screenshot('before_wait.png')
@@ -32,11 +30,9 @@ def setup_filters_and_pagination(driver):
         )
         if africa_filter.text != "Africa":
             logger.error("Filter 'Africa' is not selected. Exiting.")
-            driver.quit()
             exit(1)
     except NoSuchElementException:
         logger.error("Unable to find the 'Africa' filter.")
-        driver.quit()
         exit(1)
 
     categories = {
@@ -56,11 +52,9 @@ def setup_filters_and_pagination(driver):
             )
             if category_element.text != category:
                 logger.error(f"Expected category '{category}' not found. Exiting.")
-                driver.quit()
                 exit(1)
         except NoSuchElementException:
             logger.error(f"Category '{category}' not found.")
-            driver.quit()
             exit(1)
 
     # Set pagination to 100 records per page
@@ -77,11 +71,20 @@ def setup_filters_and_pagination(driver):
         option_100.click()
     except NoSuchElementException:
         logger.error("Unable to set pagination to 100 records per page.")
-        driver.quit()
         exit(1)
 
-def scrape_documents():
-    driver = webdriver.Chrome()  
+def scrape_documents(driver=None, use_api=True):
+    # The table is filled from a JSON endpoint; read that directly unless it can't be found
+    if use_api:
+        try:
+            return fetch_documents(document_types=DOCUMENT_TYPES, driver=driver)
+        except Exception as e:
+            logger.error(f"uninfo.org JSON endpoint unavailable ({e}), falling back to the table scrape")
+
+    if driver is None:
+        with get_pool().driver('uninfo.org') as driver:
+            return scrape_documents(driver, use_api=False)
+
     setup_filters_and_pagination(driver)
     
     results = []
@@ -120,12 +123,11 @@ def scrape_documents():
             next_button = WebDriverWait(driver, 10).until(
                 EC.element_to_be_clickable((By.XPATH, '//*[@id="app"]/div[1]/div/div/div[5]/div/div/div/div/div[3]/button[2]'))
             )
-            next_button.click()
+            get_scheduler().run('uninfo.org', next_button.click)
         except (NoSuchElementException, TimeoutException):
             logger.info("No more pages to scrape or error navigating to next page")
             break
     
-    driver.quit()
     return results
 
 def save_to_csv(data: List[dict], filename: str):
@@ -136,12 +138,10 @@ def save_to_csv(data: List[dict], filename: str):
             writer.writerow(item)
     logger.info(f"Data saved to {filename}")
 
-logger.info("Starting the scraping process")
-data = scrape_documents()
-
-current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-filename = f"un_documents_{current_time}.csv"
+if __name__ == "__main__":
+    logger.info("Starting the scraping process")
+    data = scrape_documents()
 
-save_to_csv(data, filename)
+    store.write_records('un_documents', data)
 
-logger.info(f"Scraping completed. Total items scraped: {len(data)}")
+    logger.info(f"Scraping completed. Total items scraped: {len(data)}")
@@ -1,21 +1,10 @@
-import pandas as pd
-import requests
-import json
+from APIs.unations import iter_pages, write_pages_store
 
 
 base_url = "https://population.un.org/dataportalapi/api/v1"
 target = base_url + "/indicators/"
 
-response = requests.get(target)
-
-j = response.json()
-
-df = pd.json_normalize(j['data']) 
-
-while j['nextPage'] != None:
-    target = j['nextPage']
-
-    response = requests.get(target)
-    j = response.json()
-    df_temp = pd.json_normalize(j['data'])
-    df = df.append(df_temp)
+if __name__ == "__main__":
+    # Pages go straight from the API into the dataset store; the full frame is never built
+    rows = write_pages_store(iter_pages(target), 'un_population_indicators')
+    print(f"Stored {rows} indicators")
@@ -0,0 +1,35 @@
+import lxml.html
+
+from scraping.africaed import form_fields
+
+FORM = """
+<html><body><form method="post" action="./Search.aspx?q=africa">
+  <input type="hidden" name="__VIEWSTATE" value="abc">
+  <input type="hidden" name="__EVENTVALIDATION" value="def">
+  <input type="text" name="q" value="africa">
+  <input type="checkbox" name="ctl00$main$chkData" checked>
+  <input type="checkbox" name="ctl00$main$chkGlossary" value="yes">
+  <input type="radio" name="sort" value="name">
+  <input type="radio" name="sort" value="date" checked>
+  <select name="ctl00$main$ddlPageSize"><option value="10">10</option><option value="50">50</option></select>
+  <select name="topics" multiple><option selected>Health</option><option>Trade</option><option selected>Education</option></select>
+  <textarea name="notes">free text</textarea>
+  <input type="text" name="locked" value="x" disabled>
+  <input type="submit" name="go" value="Search">
+  <input type="button" name="reset" value="Reset">
+</form></body></html>
+"""
+
+
+def test_form_fields_serialises_like_a_browser():
+    assert form_fields(lxml.html.fromstring(FORM)) == [
+        ('__VIEWSTATE', 'abc'),
+        ('__EVENTVALIDATION', 'def'),
+        ('q', 'africa'),
+        ('ctl00$main$chkData', 'on'),
+        ('sort', 'date'),
+        ('ctl00$main$ddlPageSize', '10'),
+        ('topics', 'Health'),
+        ('topics', 'Education'),
+        ('notes', 'free text'),
+    ]
@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+from scraping.browser import DEFAULT_PROFILE, DriverPool, chrome_options, profile_for
+
+
+def test_performance_log_is_opt_in():
+    assert 'goog:loggingPrefs' not in chrome_options().to_capabilities()
+    capabilities = chrome_options(performance_log=True).to_capabilities()
+    assert capabilities['goog:loggingPrefs'] == {'performance': 'ALL'}
+
+
+def test_page_load_strategy():
+    assert chrome_options().to_capabilities()['pageLoadStrategy'] == 'eager'
+    assert chrome_options(page_load_strategy='normal').to_capabilities()['pageLoadStrategy'] == 'normal'
+
+
+def test_profile_for_site():
+    assert profile_for('https://www.kaggle.com/datasets') is not DEFAULT_PROFILE
+    assert profile_for('example.org') is DEFAULT_PROFILE
+    assert profile_for(None) is DEFAULT_PROFILE
+
+
+class FakeDriver:
+    window_handles = ['main']
+
+    def __init__(self):
+        self.switch_to = self
+
+    def window(self, handle):
+        pass
+
+    def execute_cdp_cmd(self, command, params):
+        return {}
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        pass
+
+
+def test_failed_background_start_wakes_a_waiting_checkout():
+    starts = []
+
+    def factory():
+        starts.append(threading.current_thread().name)
+        if len(starts) == 1:
+            time.sleep(0.2)
+            raise RuntimeError("chrome not found")
+        return FakeDriver()
+
+    pool = DriverPool(size=1, factory=factory)
+    pool.prewarm()
+    with pool.driver(timeout=5) as driver:
+        assert isinstance(driver, FakeDriver)
+    assert starts == ['driver-pool-start', 'MainThread']
+    pool.close()
+
+
+def test_checkout_times_out_when_every_session_is_lent():
+    pool = DriverPool(size=1, factory=FakeDriver)
+    with pool.driver():
+        with pytest.raises(TimeoutError):
+            with pool.driver(timeout=0.1):
+                pass
+    pool.close()
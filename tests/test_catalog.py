@@ -0,0 +1,54 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from APIs import store
+from APIs.catalog import Catalog
+
+
+def test_refresh_follows_widened_store_columns(tmp_path):
+    root = str(tmp_path / 'store')
+    store.write_records('pop', [{'unitScaling': 1}], run_date='2024-01-01', root=root)
+    with Catalog(str(tmp_path / 'catalog.db')) as catalog:
+        assert catalog.refresh_store(root=root) == {'pop': 1}
+        store.write_records('pop', [{'unitScaling': 0.01}], run_date='2024-01-02', root=root)
+        assert catalog.refresh_store(root=root) == {'pop': 1}
+        assert sorted(catalog.query("SELECT unitScaling FROM pop")['unitScaling']) == [0.01, 1.0]
+        assert catalog.refresh_store(root=root) == {'pop': 0}
+
+
+def test_apply_delta_upserts_the_table_and_its_africa_subset(tmp_path):
+    base = str(tmp_path / 'base.parquet')
+    delta = str(tmp_path / 'delta.parquet')
+    pq.write_table(pa.table({
+        'Geographic area': ['Nigeria', 'Kenya', 'France', 'NA', 'GH'],
+        'TIME_PERIOD': ['2020', '2020', '2020', '2020', '2020'],
+        'OBS_VALUE': [1.0, 2.0, 3.0, 5.0, 6.0],
+    }), base)
+    pq.write_table(pa.table({
+        'Geographic area': ["Cote d'Ivoire", 'Kenya', 'France'],
+        'TIME_PERIOD': ['2020', '2020', '2020'],
+        'OBS_VALUE': [4.0, 20.0, 30.0],
+        'UNIT': ['%', '%', '%'],
+    }), delta)
+
+    with Catalog(str(tmp_path / 'catalog.db')) as catalog:
+        assert catalog.load_table('cme', base) == 5
+        assert catalog.apply_delta('cme', delta, ['Geographic area', 'TIME_PERIOD']) == 6
+
+        rows = catalog.arrow('SELECT "Geographic area" AS area, OBS_VALUE, UNIT FROM cme ORDER BY area')
+        assert rows.to_pylist() == [
+            {'area': "Cote d'Ivoire", 'OBS_VALUE': 4.0, 'UNIT': '%'},
+            {'area': 'France', 'OBS_VALUE': 30.0, 'UNIT': '%'},
+            {'area': 'GH', 'OBS_VALUE': 6.0, 'UNIT': None},
+            {'area': 'Kenya', 'OBS_VALUE': 20.0, 'UNIT': '%'},
+            {'area': 'NA', 'OBS_VALUE': 5.0, 'UNIT': None},
+            {'area': 'Nigeria', 'OBS_VALUE': 1.0, 'UNIT': None},
+        ]
+        # 'NA' is "not available" here, not Namibia; the exact ISO2 code 'GH' is Ghana
+        africa = catalog.arrow('SELECT "Geographic area" AS area, OBS_VALUE FROM cme_africa ORDER BY area')
+        assert africa.to_pylist() == [
+            {'area': "Cote d'Ivoire", 'OBS_VALUE': 4.0},
+            {'area': 'GH', 'OBS_VALUE': 6.0},
+            {'area': 'Kenya', 'OBS_VALUE': 20.0},
+            {'area': 'Nigeria', 'OBS_VALUE': 1.0},
+        ]
@@ -0,0 +1,55 @@
+import numpy as np
+import pyarrow as pa
+
+from APIs.countries import ALIASES, AFRICA, COUNTRIES, REGIONS, UNKNOWN, CountryIndex, normalize_name
+
+
+def make_index():
+    return CountryIndex(COUNTRIES, ALIASES, REGIONS)
+
+
+def test_normalize_name_folds_case_accents_quotes_and_spacing():
+    assert normalize_name("  CÔTE  d’Ivoire ") == "cote d'ivoire"
+
+
+def test_resolve_matches_names_aliases_and_iso_codes():
+    codes = make_index().resolve(['Nigeria', 'nga', 'NG', 'Congo, Dem. Rep.', 'Swaziland', 'France', None, 'Nigeria'])
+
+    assert codes.dtype == np.int32
+    assert codes.tolist() == [566, 566, 566, 180, 748, UNKNOWN, UNKNOWN, 566]
+
+
+def test_iso2_codes_only_match_exactly_and_na_never():
+    index = make_index()
+
+    assert index.resolve(['NA', 'na', 'N/A', 'ng', ' NG ']).tolist() == [UNKNOWN] * 4 + [566]
+    assert index.code('Namibia') == index.code('NAM') == 516
+    assert 'NA' not in index.iso2_codes()
+
+
+def test_resolve_arrow_matches_resolve():
+    index = make_index()
+    values = ['Kenya', None, 'Ivory Coast', 'Atlantis', 'Kenya']
+
+    arrow = index.resolve_arrow(pa.chunked_array([values[:2], values[2:]]))
+
+    assert arrow.type == pa.int32()
+    assert arrow.to_pylist() == index.resolve(values).tolist()
+
+
+def test_region_membership_follows_the_hierarchy():
+    index = make_index()
+
+    assert len(index.members(AFRICA)) == len(COUNTRIES)
+    assert 566 in index.members(index.region_code('Sub-Saharan Africa'))
+    assert 818 not in index.members(index.region_code('sub-saharan africa'))
+    assert index.in_region(['Egypt', 'Germany', 'TZA']).tolist() == [True, False, True]
+    assert index.in_region_arrow(pa.array(['Egypt', 'Germany', None])).to_pylist() == [True, False, False]
+
+
+def test_added_countries_outside_africa_are_resolved_but_not_members():
+    index = make_index()
+    index.add(COUNTRIES[0]._replace(m49=250, iso2='FR', iso3='FRA', name='France', region=None))
+
+    assert index.code('france') == 250
+    assert 250 not in index.members(AFRICA)
@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pytest
+
+from APIs import fetcher as fetcher_module
+from APIs.fetcher import AsyncFetcher
+from APIs.scheduler import CrawlScheduler, HostBudget
+
+
+@pytest.fixture(autouse=True)
+def scheduler(monkeypatch):
+    scheduler = CrawlScheduler({'example.test': HostBudget(4, 1000.0)})
+    monkeypatch.setattr(fetcher_module, 'get_scheduler', lambda: scheduler)
+    yield scheduler
+    scheduler.shutdown()
+
+
+def test_stopping_early_cancels_pending_fetches():
+    fetched = []
+    lock = threading.Lock()
+
+    def fetch(url):
+        time.sleep(0.05)
+        with lock:
+            fetched.append(url)
+        return url
+
+    fetcher = AsyncFetcher(max_per_host=1, rate=1000.0, fetch=fetch)
+    results = fetcher.iter_completed(f"http://example.test/{page}" for page in range(50))
+    first = next(results)
+    results.close()
+    time.sleep(0.3)
+
+    assert first.error is None
+    # The one in flight when the consumer stopped may finish; nothing new starts
+    assert len(fetched) <= 3
+
+
+def test_fetch_all_returns_every_result():
+    fetcher = AsyncFetcher(max_per_host=4, rate=1000.0, fetch=lambda url: url.upper())
+    urls = [f"http://example.test/{page}" for page in range(10)]
+
+    results = fetcher.fetch_all(urls)
+
+    assert sorted(result.response for result in results) == sorted(url.upper() for url in urls)
+
+
+def test_nested_run_for_the_same_host_runs_inline():
+    # One slot: a nested run() that queued for it would wait forever
+    scheduler = CrawlScheduler({'example.test': HostBudget(1, 1000.0)})
+    try:
+        inner = lambda: scheduler.run('example.test', threading.current_thread)
+        outer = scheduler.submit('http://example.test/a', lambda: (threading.current_thread(), inner()))
+        outer_thread, inner_thread = outer.result(timeout=5)
+        assert outer_thread is inner_thread
+
+        nested_map = scheduler.submit('example.test', scheduler.map, 'example.test', str, [1, 2])
+        assert nested_map.result(timeout=5) == ['1', '2']
+    finally:
+        scheduler.shutdown()
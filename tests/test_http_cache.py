@@ -0,0 +1,95 @@
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from APIs import http_cache, http_client
+
+BODIES = {'/a': b'a' * 100, '/b': b'b' * 100, '/c': b'c' * 100}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = BODIES[self.path]
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, 'HTTP_CACHE_DIR', str(tmp_path / 'http'))
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+
+
+def test_revalidates_with_etag(server):
+    with http_cache.cached_get(server + '/a') as first:
+        assert first.content == BODIES['/a'] and not first.from_cache
+    with http_cache.cached_get(server + '/a') as second:
+        assert second.content == BODIES['/a'] and second.from_cache
+
+
+def test_eviction_skips_bodies_still_handed_out(server, monkeypatch):
+    monkeypatch.setattr(http_cache, 'HTTP_CACHE_MAX_BYTES', 150)
+    held = http_cache.cached_get(server + '/a')
+
+    # Storing /b goes over the limit; /a is the least recently used but not yet read
+    with http_cache.cached_get(server + '/b'):
+        pass
+    assert held.content == BODIES['/a']
+
+    held.close()
+    with http_cache.cached_get(server + '/c'):
+        pass
+    assert not os.path.exists(held.path)
+    assert http_cache.pinned() == set()
+
+
+def test_resume_passes_request_options(server, monkeypatch):
+    url = server + '/a'
+    downloads = os.path.join(http_cache.HTTP_CACHE_DIR, 'downloads')
+    os.makedirs(downloads)
+    key = http_cache.cache_key(url)
+    open(os.path.join(downloads, key + '.part'), 'wb').close()
+    calls = []
+    real_get = http_client.get
+
+    def get(url, **kwargs):
+        calls.append(kwargs)
+        return real_get(url, **kwargs)
+
+    monkeypatch.setattr(http_client, 'get', get)
+
+    with http_cache.cached_get(url, timeout=7) as response:
+        assert response.content == BODIES['/a']
+    assert calls and all(call.get('timeout') == 7 for call in calls)
+
+
+def test_download_keeps_the_existing_file_on_a_checksum_mismatch(server, tmp_path):
+    path = str(tmp_path / 'a.txt')
+    with open(path, 'wb') as f:
+        f.write(b'good')
+
+    with pytest.raises(http_client.IncompleteDownload):
+        http_client.download(server + '/a', path, expected_sha256='0' * 64)
+
+    with open(path, 'rb') as f:
+        assert f.read() == b'good'
+    assert sorted(os.listdir(tmp_path)) == ['a.txt', 'a.txt.part.json']
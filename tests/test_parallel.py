@@ -0,0 +1,55 @@
+import functools
+import os
+
+from scraping.parallel import PagedSource, crawl_pages
+
+# Module level, so the spawned worker processes can unpickle them
+
+
+class FakeDriver:
+    window_handles = ['main']
+
+    def __init__(self, marker_dir):
+        self.marker_dir = marker_dir
+        self.page = None
+        self.switch_to = self
+
+    def window(self, handle):
+        pass
+
+    def execute_cdp_cmd(self, command, params):
+        return {}
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        open(os.path.join(self.marker_dir, f'quit-{os.getpid()}'), 'w').close()
+
+
+def go_to_page(driver, page):
+    driver.page = page
+
+
+def scrape_page(driver):
+    failed = os.path.join(driver.marker_dir, f'failed-{driver.page}')
+    if driver.page == 3 and not os.path.exists(failed):
+        with open(failed, 'w') as f:
+            f.write(str(os.getpid()))
+        raise RuntimeError("page did not load")
+    return [(driver.page, os.getpid())]
+
+
+def test_retries_on_another_worker_and_quits_browsers(tmp_path):
+    marker_dir = str(tmp_path)
+    source = PagedSource('example.org', go_to_page, scrape_page, 6)
+
+    records = crawl_pages('fake', range(1, 7), workers=2, source=source,
+                          factory=functools.partial(FakeDriver, marker_dir))
+
+    assert [page for page, _ in records] == [1, 2, 3, 4, 5, 6]
+    with open(tmp_path / 'failed-3') as f:
+        failed_pid = int(f.read())
+    assert dict(records)[3] != failed_pid
+    quit_pids = {int(name.split('-')[1]) for name in os.listdir(marker_dir) if name.startswith('quit-')}
+    assert quit_pids == {pid for _, pid in records}
@@ -0,0 +1,55 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from APIs.schema_inference import DICTIONARY_TYPE, cast_parquet, infer_schema, optimize_parquet, typed_table
+
+
+def batch(**columns):
+    return pa.RecordBatch.from_pydict({name: pa.array(values, pa.string()) for name, values in columns.items()})
+
+
+def test_infers_narrowest_types():
+    table = pa.Table.from_batches([batch(
+        year=['2019', '2020', None, '2021'],
+        value=['1', '2.5', '3', None],
+        date=['2020-01-01', '2020-02-01', '2020-03-01', '2020-04-01'],
+        area=['NGA', 'KEN', 'NGA', 'KEN'],
+        code=['001', '002', '003', '004'],
+    )])
+
+    schema = typed_table(table).schema
+
+    assert schema.names == ['year', 'value', 'date', 'area', 'code']
+    assert schema.field('year').type == pa.int64()
+    assert schema.field('value').type == pa.float64()
+    assert schema.field('date').type == pa.date32()
+    assert schema.field('area').type == DICTIONARY_TYPE
+    assert schema.field('code').type == pa.string()
+
+
+def test_later_chunk_widens_column():
+    schema = infer_schema([batch(x=['1', '2']), batch(x=['2.5', '3']), batch(x=['2020-Q1', '4'])])
+    assert pa.types.is_string(schema.field('x').type) or schema.field('x').type == DICTIONARY_TYPE
+
+    schema = infer_schema([batch(x=['1', '2']), batch(x=['2.5', None])])
+    assert schema.field('x').type == pa.float64()
+
+
+def test_numbers_then_dates_stay_strings():
+    schema = infer_schema([batch(x=['2019', '2020']), batch(x=['2020-01-01', '2021-01-01'])])
+    assert schema.field('x').type in (pa.string(), DICTIONARY_TYPE)
+
+
+def test_optimize_and_cast_parquet(tmp_path):
+    path = str(tmp_path / 'flow.parquet')
+    pq.write_table(pa.Table.from_batches([batch(year=[str(y) for y in range(2000, 2100)])]), path)
+    assert optimize_parquet(path, batch_size=10).field('year').type == pa.int64()
+
+    delta = str(tmp_path / 'delta.parquet')
+    pq.write_table(pa.Table.from_batches([batch(year=['2100'])]), delta)
+    assert cast_parquet(delta, pq.read_schema(path))
+    assert pq.read_schema(delta).field('year').type == pa.int64()
+
+    pq.write_table(pa.Table.from_batches([batch(year=['2100-Q1'])]), delta)
+    assert not cast_parquet(delta, pq.read_schema(path))
+    assert pq.read_schema(delta).field('year').type == pa.string()
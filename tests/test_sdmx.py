@@ -0,0 +1,71 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from APIs.schema_inference import DICTIONARY_TYPE, cast_parquet, optimize_parquet
+from APIs.sdmx import merge_parquet
+
+KEYS = ['REF_AREA', 'INDICATOR', 'TIME_PERIOD']
+
+
+def write_strings(path, **columns):
+    pq.write_table(pa.table(columns), path)
+    return str(path)
+
+
+@pytest.fixture
+def base(tmp_path):
+    areas = ['NGA', 'KEN', 'GHA', 'ETH'] * 25
+    path = write_strings(
+        tmp_path / 'base.parquet',
+        REF_AREA=areas,
+        INDICATOR=['CME_MRY0'] * 100,
+        TIME_PERIOD=[str(2000 + i // 4) for i in range(100)],
+        OBS_VALUE=[f"{i}.5" for i in range(100)],
+    )
+    optimize_parquet(path)
+    return path
+
+
+def test_merge_keeps_types_and_replaces_keys(base, tmp_path):
+    delta = write_strings(tmp_path / 'delta.parquet', REF_AREA=['NGA', 'ZAF'], INDICATOR=['CME_MRY0'] * 2,
+                          TIME_PERIOD=['2000', '2030'], OBS_VALUE=['99.0', '1.0'])
+    assert cast_parquet(delta, pq.read_schema(base))
+
+    assert merge_parquet(base, delta, KEYS) == 101
+
+    schema = pq.read_schema(base)
+    assert schema.field('REF_AREA').type == DICTIONARY_TYPE
+    assert schema.field('TIME_PERIOD').type == pa.int64()
+    assert schema.field('OBS_VALUE').type == pa.float64()
+    assert pq.ParquetFile(base).metadata.row_group(0).column(0).compression == 'ZSTD'
+    rows = pq.read_table(base).to_pylist()
+    assert [r['OBS_VALUE'] for r in rows if r['REF_AREA'] == 'NGA' and r['TIME_PERIOD'] == 2000] == [99.0]
+
+
+def test_merge_delta_that_does_not_fit(base, tmp_path):
+    delta = write_strings(tmp_path / 'delta.parquet', REF_AREA=['NGA', 'KEN'], INDICATOR=['CME_MRY0'] * 2,
+                          TIME_PERIOD=['2000', '2020-Q1'], OBS_VALUE=['<5', '3.5'])
+    assert not cast_parquet(delta, pq.read_schema(base))
+
+    assert merge_parquet(base, delta, KEYS, as_text=True) == 101
+
+    schema = pq.read_schema(base)
+    assert schema.field('REF_AREA').type == DICTIONARY_TYPE
+    assert pa.types.is_string(schema.field('TIME_PERIOD').type) or schema.field('TIME_PERIOD').type == DICTIONARY_TYPE
+    assert pa.types.is_string(schema.field('OBS_VALUE').type)
+    rows = pq.read_table(base).to_pylist()
+    assert [r['OBS_VALUE'] for r in rows if r['REF_AREA'] == 'NGA' and r['TIME_PERIOD'] == '2000'] == ['<5']
+    assert {'REF_AREA': 'KEN', 'INDICATOR': 'CME_MRY0', 'TIME_PERIOD': '2020-Q1', 'OBS_VALUE': '3.5'} in rows
+
+
+def test_merge_adds_delta_columns(base, tmp_path):
+    delta = write_strings(tmp_path / 'delta.parquet', REF_AREA=['NGA'], INDICATOR=['CME_MRY0'],
+                          TIME_PERIOD=['2000'], OBS_VALUE=['1.0'], UNIT=['DEATHS'])
+    assert cast_parquet(delta, pq.read_schema(base))
+
+    merge_parquet(base, delta, KEYS)
+
+    table = pq.read_table(base)
+    assert table.column_names == ['REF_AREA', 'INDICATOR', 'TIME_PERIOD', 'OBS_VALUE', 'UNIT']
+    assert table.column('UNIT').null_count == 99
@@ -0,0 +1,102 @@
+from datetime import datetime
+
+from scraping.seen_index import SeenIndex, content_hash, crawl_new
+
+
+def record(n, version='1'):
+    return {'data_link': f'https://example.org/{n}', 'data_name': f'Dataset {n}', 'version': version}
+
+
+def test_content_hash_uses_only_given_fields():
+    assert content_hash(record(1, '1'), ['data_link']) == content_hash(record(1, '2'), ['data_link'])
+    assert content_hash(record(1, '1')) != content_hash(record(1, '2'))
+
+
+def test_unseen_returns_new_and_changed(tmp_path):
+    with SeenIndex(str(tmp_path / 'seen.db')) as index:
+        index.mark('src', [record(1), record(2)])
+        assert index.count('src') == 2
+        assert index.unseen('src', [record(1), record(2, '2'), record(3)]) == [record(2, '2'), record(3)]
+        assert index.unseen('other', [record(1)]) == [record(1)]
+
+
+def test_crawl_new_stops_after_quiet_pages(tmp_path):
+    pages = {page: [record(page * 10 + i) for i in range(3)] for page in range(1, 6)}
+    visited = []
+    with SeenIndex(str(tmp_path / 'seen.db')) as index:
+        index.mark('src', pages[2] + pages[3] + pages[4] + pages[5])
+        fresh = crawl_new(None, 'src', lambda driver, page: visited.append(page), lambda driver: pages[visited[-1]],
+                          5, index, stop_after=2)
+    assert fresh == pages[1]
+    assert visited == [1, 2, 3]
+
+
+def test_crawl_new_unordered_reads_every_page(tmp_path):
+    pages = {page: [record(page)] for page in range(1, 4)}
+    visited = []
+    with SeenIndex(str(tmp_path / 'seen.db')) as index:
+        index.mark('src', pages[1])
+        fresh = crawl_new(None, 'src', lambda driver, page: visited.append(page), lambda driver: pages[visited[-1]],
+                          3, index, ordered=False)
+    assert fresh == pages[2] + pages[3]
+    assert visited == [1, 2, 3]
+
+
+def test_kaggle_update_changes_the_hash():
+    from scraping.kaggle import SEEN_FIELDS, absolute_date
+
+    now = datetime(2024, 10, 18)
+    assert absolute_date('Mon Oct 14 2024 10:00:00 GMT+0000', '4 days ago', now) == '2024-10-14'
+    assert absolute_date(None, '2 days ago', now) == absolute_date(None, '3 days ago', datetime(2024, 10, 19))
+    assert absolute_date('', '3 months ago', now) == '2024-07-01'
+    before = {'data_name': 'x', 'data_link': 'l', 'last_updated_at': '2024-10-14'}
+    after = dict(before, last_updated_at='2024-10-18')
+    assert content_hash(before, SEEN_FIELDS) != content_hash(after, SEEN_FIELDS)
+
+
+# One dataset of an open.africa /dataset/ listing page (CKAN's dataset_item snippet)
+OPEN_AFRICA_LISTING = """
+<html><body><div id="primary-datasetId"><div><ul class="dataset-list">
+  <li class="dataset-item">
+    <div class="dataset-content">
+      <div class="dataset-header">
+        <h5 class="dataset-heading">
+          <a href="/dataset/africa-climate-data">Africa Climate Data</a>
+          <div class="dataset-dates">Updated August 7, 2024 | Created August 7, 2024</div>
+          <div class="dataset-organization"><a href="/organization/openup?sort=metadata_modified+desc">OpenUp</a></div>
+        </h5>
+      </div>
+      <div class="dataset-body">
+        <div class="dataset-notes">This dataset has no description</div>
+        <div class="dataset-resources"><ul><li><a href="/dataset/africa-climate-data">CSV</a></li></ul></div>
+      </div>
+    </div>
+  </li>
+</ul></div></div></body></html>
+"""
+
+
+def test_open_africa_paths_hash_alike():
+    from scraping.extract import validate_rows
+    from scraping.openAfrica2 import LISTING, SEEN_FIELDS, ScrapedData
+    from scraping.openAfrica_ckan import to_scraped_data
+    from scraping.snapshots import extract_rows_html
+
+    listing = validate_rows(extract_rows_html(OPEN_AFRICA_LISTING, LISTING, 'https://open.africa/dataset/'),
+                            ScrapedData)[0]
+    api = to_scraped_data({'name': 'africa-climate-data', 'title': 'Africa Climate Data',
+                           'metadata_modified': '2024-08-07T09:41:02.517843',
+                           'organization': {'name': 'openup', 'title': 'OpenUp'}, 'resources': []})
+
+    assert (listing.data_name, listing.dataset_date_sourced) == ('Africa Climate Data', '2024-08-07')
+    assert content_hash(api, SEEN_FIELDS) == content_hash(listing, SEEN_FIELDS)
+
+
+def test_crawl_listing_stops_at_total_pages(monkeypatch):
+    from scraping import openAfrica_ckan
+
+    visited = []
+    monkeypatch.setattr(openAfrica_ckan, 'go_to_next_page', lambda driver, page: visited.append(page))
+    monkeypatch.setattr(openAfrica_ckan, 'scrape_page_data', lambda driver: [visited[-1]])
+    assert openAfrica_ckan.crawl_listing(None, 3) == [1, 2, 3]
+    assert visited == [1, 2, 3]
@@ -0,0 +1,88 @@
+from datetime import datetime, timezone
+
+from scraping.extract import Field, ListingSpec, extract_rows, validate_rows
+from scraping.snapshots import extract_rows_html
+
+SPEC = ListingSpec(
+    rows='//li',
+    fields={'name': Field('span'), 'link': Field('a', 'href')},
+)
+HTML = """
+<ul>
+  <li><span>  Population   by
+      age  </span><a href="/d/1">x</a></li>
+  <li><span><b>GDP</b> <i>per&nbsp;capita</i></span></li>
+  <li><span><pre>  2020
+  2021 </pre></span></li>
+</ul>
+"""
+
+
+class FakeDriver:
+    """What EXTRACT_SCRIPT returns for HTML: innerText, trimmed."""
+
+    def execute_script(self, script, payload):
+        return [
+            {'name': 'Population by age', 'link': 'https://example.test/d/1'},
+            {'name': 'GDP per\xa0capita', 'link': None},
+            {'name': '2020\n  2021', 'link': None},
+        ]
+
+
+def test_live_and_snapshot_text_match():
+    live = extract_rows(FakeDriver(), SPEC)
+    stored = extract_rows_html(HTML, SPEC, 'https://example.test/')
+
+    assert live == stored
+    assert [row['name'] for row in stored] == ['Population by age', 'GDP per capita', '2020\n2021']
+
+
+KAGGLE_PAGE = """
+<html><body><div id="site-content"><div></div><div><div></div><div></div><div></div><div></div><div><div><div><div>
+<ul>
+  <li><div><a href="/datasets/a/nigeria-census"><div><div></div><div>
+    <div>Nigeria Census</div><span><span title="Mon Oct 14 2024 10:00:00 GMT+0000">4 days ago</span></span>
+  </div></div></a></div></li>
+  <li><div><a href="/datasets/b/kenya-rainfall"><div><div></div><div>
+    <div>Kenya   Rainfall</div><span><span>3 months ago</span></span>
+  </div></div></a></div></li>
+</ul>
+</div></div></div></div></div></div></body></html>
+"""
+
+
+class KaggleDriver:
+    """What EXTRACT_SCRIPT returns for KAGGLE_PAGE in Chrome."""
+
+    def execute_script(self, script, payload):
+        return [
+            {'data_name': 'Nigeria Census', 'data_link': 'https://www.kaggle.com/datasets/a/nigeria-census',
+             'last_updated': '4 days ago', 'last_updated_at': 'Mon Oct 14 2024 10:00:00 GMT+0000'},
+            {'data_name': 'Kenya Rainfall', 'data_link': 'https://www.kaggle.com/datasets/b/kenya-rainfall',
+             'last_updated': '3 months ago', 'last_updated_at': ''},
+        ]
+
+
+def test_reextracted_kaggle_records_match_live_ones():
+    from scraping import kaggle
+
+    live = kaggle.scrape_page_data(KaggleDriver())
+    stored = validate_rows(extract_rows_html(KAGGLE_PAGE, kaggle.LISTING, 'https://www.kaggle.com/datasets',
+                                             datetime.now(timezone.utc)), kaggle.ScrapedData)
+
+    assert stored == live
+    assert live[0].last_updated_at == '2024-10-14'
+    assert live[1].last_updated_at.endswith('-01')
+
+
+def test_reextract_applies_the_postprocess_at_capture_time(tmp_path, monkeypatch):
+    from scraping import kaggle, snapshots
+
+    monkeypatch.setattr(snapshots, 'SNAPSHOT_DIR', str(tmp_path))
+    snapshot = snapshots.save_snapshot('kaggle', 'https://www.kaggle.com/datasets', KAGGLE_PAGE)
+
+    records = snapshots.reextract(snapshots.list_snapshots('kaggle'), kaggle.LISTING, kaggle.ScrapedData, workers=1)
+
+    captured = snapshots.captured_time(snapshot)
+    assert [record.last_updated_at for record in records] == [
+        '2024-10-14', kaggle.absolute_date(None, '3 months ago', captured)]
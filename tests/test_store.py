@@ -0,0 +1,65 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from APIs import store
+
+
+def test_to_table_keeps_late_keys_and_mixed_columns():
+    table = store.to_table([{'a': 1}, {'a': 'n/a', 'b': 2.5}])
+    assert table.column('a').to_pylist() == ['1', 'n/a']
+    assert table.column('b').to_pylist() == [None, 2.5]
+
+
+def test_widen():
+    assert store.widen(pa.int32(), pa.int64()) == pa.int64()
+    assert store.widen(pa.int64(), pa.float64()) == pa.float64()
+    assert store.widen(pa.int64(), pa.uint64()) == pa.float64()
+    assert store.widen(pa.float64(), pa.string()) == pa.string()
+    assert store.widen(pa.timestamp('us'), pa.int64()) == pa.string()
+
+
+def test_conform_orders_and_fills():
+    schema = pa.schema([('a', pa.int64()), ('b', pa.string())])
+    table = store.conform(pa.table({'b': ['x'], 'a': [1]}), schema)
+    assert table.schema == schema
+    assert store.conform(pa.table({'a': [1]}), schema).column('b').to_pylist() == [None]
+    with pytest.raises(store.SchemaMismatch):
+        store.conform(pa.table({'a': [0.5]}), schema)
+
+
+def test_writer_widens_schema_and_rewrites_parts(tmp_path):
+    root = str(tmp_path)
+    store.write_records('pop', [{'unitScaling': 1, 'value': 10}], run_date='2024-01-01', root=root)
+    assert store.load_schema('pop', root).field('unitScaling').type == pa.int64()
+
+    store.write_records('pop', [{'unitScaling': 0.01, 'value': 20}], run_date='2024-01-02', root=root)
+
+    assert store.load_schema('pop', root).field('unitScaling').type == pa.float64()
+    for path in store.part_files('pop', root):
+        assert pq.read_schema(path).field('unitScaling').type == pa.float64()
+    assert store.read('pop', root=root).column('unitScaling').to_pylist() == [1.0, 0.01]
+
+    store.write_records('pop', [{'unitScaling': 'n/a', 'value': 30}], run_date='2024-01-03', root=root)
+    assert store.read('pop', root=root).column('unitScaling').to_pylist() == ['1', '0.01', 'n/a']
+
+
+def test_writer_widens_mid_run(tmp_path):
+    root = str(tmp_path)
+    with store.DatasetWriter('pop', '2024-01-01', root) as writer:
+        writer.write([{'x': 1}])
+        writer.write([{'x': 2.5, 'y': 'new'}])
+    assert len(writer.paths) == 2
+    table = store.read('pop', root=root)
+    assert table.column('x').to_pylist() == [1.0, 2.5]
+    assert table.column('y').to_pylist() == [None, 'new']
+
+
+def test_read_filters_run_dates(tmp_path):
+    root = str(tmp_path)
+    for day in ('2024-01-01', '2024-01-02', '2024-01-03'):
+        store.write_records('src', [{'day': day}], run_date=day, root=root)
+    assert store.run_dates('src', root) == ['2024-01-01', '2024-01-02', '2024-01-03']
+    assert store.read('src', latest=True, root=root).column('day').to_pylist() == ['2024-01-03']
+    assert store.read('src', since='2024-01-02', root=root).num_rows == 2
+    assert store.sources(root) == ['src']
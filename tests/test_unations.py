@@ -0,0 +1,33 @@
+import pyarrow as pa
+
+from APIs import store
+from APIs.unations import PageCollector, page_number, page_url, write_pages_store
+
+
+def test_collector_flattens_and_fills_missing():
+    collector = PageCollector()
+    collector.add_records([{'id': 1, 'location': {'name': 'Kenya'}}, {'id': 2, 'extra': 'x'}])
+    table = collector.to_table()
+    assert table.column_names == ['id', 'location.name', 'extra']
+    assert table.column('extra').to_pylist() == [None, 'x']
+
+
+def test_collector_mixed_kinds_become_strings():
+    collector = PageCollector()
+    collector.add_records([{'value': 1}, {'value': 'n/a'}])
+    assert collector.to_table().column('value').type == pa.string()
+
+
+def test_write_pages_store_widens_instead_of_truncating(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, 'STORE_DIR', str(tmp_path))
+    pages = [{'data': [{'unitScaling': 100}]}, {'data': [{'unitScaling': 100.7}, {'unitScaling': 0.01}]}]
+
+    assert write_pages_store(pages, 'un_population') == 3
+
+    assert store.read('un_population').column('unitScaling').to_pylist() == [100.0, 100.7, 0.01]
+
+
+def test_page_url_round_trip():
+    url = page_url('https://example.org/api/v1/indicators?sort=id', 3, page_size=100)
+    assert page_number(url) == 3
+    assert 'pageSize=100' in url and 'sort=id' in url
@@ -0,0 +1,70 @@
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from APIs import unicef_big_data
+from APIs.catalog import Catalog
+from APIs.unicef_big_data import DataflowRefresh, process_with_duckdb
+
+KEYS = ['REF_AREA', 'TIME_PERIOD']
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(unicef_big_data, 'Catalog', lambda: Catalog(str(tmp_path / 'catalog.db')))
+    pq.write_table(pa.table({'REF_AREA': ['NGA', 'KEN'], 'TIME_PERIOD': [2000, 2000], 'OBS_VALUE': [1.0, 2.0]}),
+                   'unicef_FLOW.parquet')
+    assert process_with_duckdb([DataflowRefresh('FLOW', '', True, None, None)]) == ['FLOW']
+    return tmp_path
+
+
+def values(tmp_path):
+    with Catalog(str(tmp_path / 'catalog.db'), read_only=True) as catalog:
+        return sorted(catalog.query("SELECT REF_AREA, OBS_VALUE FROM FLOW").itertuples(index=False, name=None))
+
+
+def test_delta_is_applied_then_removed(workdir):
+    pq.write_table(pa.table({'REF_AREA': ['NGA'], 'TIME_PERIOD': [2000], 'OBS_VALUE': [5.0]}), 'delta.parquet')
+
+    assert process_with_duckdb([DataflowRefresh('FLOW', '', True, 'delta.parquet', KEYS)]) == ['FLOW']
+
+    assert values(workdir) == [('KEN', 2.0), ('NGA', 5.0)]
+    assert not os.path.exists('delta.parquet')
+
+
+def test_failed_delta_reloads_from_parquet(workdir):
+    # A key column the delta doesn't have makes the upsert fail inside DuckDB
+    pq.write_table(pa.table({'REF_AREA': ['NGA'], 'OBS_VALUE': [5.0]}), 'delta.parquet')
+    pq.write_table(pa.table({'REF_AREA': ['NGA', 'KEN'], 'TIME_PERIOD': [2000, 2000], 'OBS_VALUE': [5.0, 2.0]}),
+                   'unicef_FLOW.parquet')
+
+    assert process_with_duckdb([DataflowRefresh('FLOW', '', True, 'delta.parquet', KEYS)]) == ['FLOW']
+
+    assert values(workdir) == [('KEN', 2.0), ('NGA', 5.0)]
+
+
+def test_failed_catalog_update_keeps_delta(workdir):
+    pq.write_table(pa.table({'REF_AREA': ['NGA'], 'OBS_VALUE': [5.0]}), 'delta.parquet')
+    os.remove('unicef_FLOW.parquet')
+
+    assert process_with_duckdb([DataflowRefresh('FLOW', '', True, 'delta.parquet', KEYS)]) == []
+
+    assert os.path.exists('delta.parquet')
+    assert values(workdir) == [('KEN', 2.0), ('NGA', 1.0)]
+
+
+def test_watermarks_wait_for_the_catalog(workdir, monkeypatch):
+    monkeypatch.setattr(unicef_big_data, 'target_url_list', ['UNICEF,FLOW,1.0/all?format=csv'])
+    monkeypatch.setattr(unicef_big_data, 'refresh_dataflow',
+                        lambda url, since=None: DataflowRefresh('FLOW', '', True, None, None))
+
+    def locked():
+        raise OSError("catalog is locked")
+
+    monkeypatch.setattr(unicef_big_data, 'Catalog', locked)
+    with pytest.raises(OSError):
+        unicef_big_data.main()
+    assert unicef_big_data.load_watermarks() == {}